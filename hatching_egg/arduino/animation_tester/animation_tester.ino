@@ -145,17 +145,27 @@ void updateAnimation() {
     }
   }
 
+#ifdef RASTER_TICK_MS
+  // Pre-rasterized animations are a single table read per frame
+  const uint8_t* frame = rasterFrame(currentAnimation, elapsed);
+  if (frame != NULL) {
+    moveLegs(pgm_read_byte(&frame[0]), pgm_read_byte(&frame[1]),
+             pgm_read_byte(&frame[2]), pgm_read_byte(&frame[3]));
+    return;
+  }
+#endif
+
   // Interpolate between keyframes
   int kfCount = pgm_read_word(&(ANIMATIONS[currentAnimation].keyframe_count));
   const Keyframe* keyframes = (const Keyframe*)pgm_read_ptr(&(ANIMATIONS[currentAnimation].keyframes));
 
-  // Find surrounding keyframes
+  // Find surrounding keyframes (SEGMENT_START skips ahead when a time index is generated)
   int kf1 = 0;
   int kf2 = 1;
 
-  for (int i = 0; i < kfCount - 1; i++) {
-    unsigned long t1 = pgm_read_dword(&(keyframes[i].time_ms));
-    unsigned long t2 = pgm_read_dword(&(keyframes[i + 1].time_ms));
+  for (int i = SEGMENT_START(currentAnimation, elapsed); i < kfCount - 1; i++) {
+    unsigned long t1 = KEYFRAME_TIME(keyframes[i]);
+    unsigned long t2 = KEYFRAME_TIME(keyframes[i + 1]);
 
     if (elapsed >= t1 && elapsed < t2) {
       kf1 = i;
@@ -165,18 +175,28 @@ void updateAnimation() {
   }
 
   // Read keyframe data
-  unsigned long t1 = pgm_read_dword(&(keyframes[kf1].time_ms));
-  unsigned long t2 = pgm_read_dword(&(keyframes[kf2].time_ms));
-
-  int ls1 = pgm_read_word(&(keyframes[kf1].left_shoulder_deg));
-  int le1 = pgm_read_word(&(keyframes[kf1].left_elbow_deg));
-  int rs1 = pgm_read_word(&(keyframes[kf1].right_shoulder_deg));
-  int re1 = pgm_read_word(&(keyframes[kf1].right_elbow_deg));
-
-  int ls2 = pgm_read_word(&(keyframes[kf2].left_shoulder_deg));
-  int le2 = pgm_read_word(&(keyframes[kf2].left_elbow_deg));
-  int rs2 = pgm_read_word(&(keyframes[kf2].right_shoulder_deg));
-  int re2 = pgm_read_word(&(keyframes[kf2].right_elbow_deg));
+  unsigned long t1 = KEYFRAME_TIME(keyframes[kf1]);
+  unsigned long t2 = KEYFRAME_TIME(keyframes[kf2]);
+
+  int ls1 = KEYFRAME_DEG(keyframes[kf1], left_shoulder_deg);
+  int le1 = KEYFRAME_DEG(keyframes[kf1], left_elbow_deg);
+  int rs1 = KEYFRAME_DEG(keyframes[kf1], right_shoulder_deg);
+  int re1 = KEYFRAME_DEG(keyframes[kf1], right_elbow_deg);
+
+#ifdef SEGMENT_RECIP_SHIFT
+  // Interpolate with precomputed fixed-point segment data (no float math)
+  const Segment* segments = (const Segment*)pgm_read_ptr(&SEGMENT_TABLES[currentAnimation]);
+  unsigned long fraction = segmentFraction(segments[kf1], elapsed - t1, t2 - t1);
+
+  int leftShoulder = ls1 + fixedStep(SEGMENT_DELTA(segments[kf1], left_shoulder_delta), fraction);
+  int leftElbow = le1 + fixedStep(SEGMENT_DELTA(segments[kf1], left_elbow_delta), fraction);
+  int rightShoulder = rs1 + fixedStep(SEGMENT_DELTA(segments[kf1], right_shoulder_delta), fraction);
+  int rightElbow = re1 + fixedStep(SEGMENT_DELTA(segments[kf1], right_elbow_delta), fraction);
+#else
+  int ls2 = KEYFRAME_DEG(keyframes[kf2], left_shoulder_deg);
+  int le2 = KEYFRAME_DEG(keyframes[kf2], left_elbow_deg);
+  int rs2 = KEYFRAME_DEG(keyframes[kf2], right_shoulder_deg);
+  int re2 = KEYFRAME_DEG(keyframes[kf2], right_elbow_deg);
 
   // Interpolate
   float t = (float)(elapsed - t1) / (float)(t2 - t1);
@@ -186,6 +206,7 @@ void updateAnimation() {
   int leftElbow = le1 + (int)((le2 - le1) * t);
   int rightShoulder = rs1 + (int)((rs2 - rs1) * t);
   int rightElbow = re1 + (int)((re2 - re1) * t);
+#endif
 
   // Move servos
   moveLegs(leftShoulder, leftElbow, rightShoulder, rightElbow);
@@ -194,31 +215,31 @@ void updateAnimation() {
 void moveLegs(int leftShoulder, int leftElbow, int rightShoulder, int rightElbow) {
   // Only move servos if position changed (reduce jitter)
   if (leftShoulder != lastLeftShoulder) {
-    setServo(LEFT_SHOULDER_CHANNEL, leftShoulder, LEFT_SHOULDER_MIN_PULSE, LEFT_SHOULDER_MAX_PULSE);
+    setServo(LEFT_SHOULDER_CHANNEL, leftShoulder, LEFT_SHOULDER_PWM);
     lastLeftShoulder = leftShoulder;
   }
 
   if (leftElbow != lastLeftElbow) {
-    setServo(LEFT_ELBOW_CHANNEL, leftElbow, LEFT_ELBOW_MIN_PULSE, LEFT_ELBOW_MAX_PULSE);
+    setServo(LEFT_ELBOW_CHANNEL, leftElbow, LEFT_ELBOW_PWM);
     lastLeftElbow = leftElbow;
   }
 
   if (rightShoulder != lastRightShoulder) {
-    setServo(RIGHT_SHOULDER_CHANNEL, rightShoulder, RIGHT_SHOULDER_MIN_PULSE, RIGHT_SHOULDER_MAX_PULSE);
+    setServo(RIGHT_SHOULDER_CHANNEL, rightShoulder, RIGHT_SHOULDER_PWM);
     lastRightShoulder = rightShoulder;
   }
 
   if (rightElbow != lastRightElbow) {
-    setServo(RIGHT_ELBOW_CHANNEL, rightElbow, RIGHT_ELBOW_MIN_PULSE, RIGHT_ELBOW_MAX_PULSE);
+    setServo(RIGHT_ELBOW_CHANNEL, rightElbow, RIGHT_ELBOW_PWM);
     lastRightElbow = rightElbow;
   }
 }
 
-void setServo(int channel, int degrees, int minPulse, int maxPulse) {
+void setServo(int channel, int degrees, const uint16_t* pulseTable) {
   // Convert degrees (0-90°) to pulse width
-  // Calibrated ranges support 0-90° movement
-  degrees = constrain(degrees, 0, 90);
-  int pulse = map(degrees, 0, 90, minPulse, maxPulse);
+  // Per-servo lookup table generated from the calibrated ranges (same values as map())
+  degrees = constrain(degrees, 0, PWM_TABLE_SIZE - 1);
+  uint16_t pulse = pgm_read_word(&pulseTable[degrees]);
   pwm.setPWM(channel, 0, pulse);
 }
 
@@ -226,10 +247,10 @@ void moveToResting() {
   // Move to first keyframe of first animation (resting position)
   const Keyframe* keyframes = (const Keyframe*)pgm_read_ptr(&(ANIMATIONS[0].keyframes));
 
-  int ls = pgm_read_word(&(keyframes[0].left_shoulder_deg));
-  int le = pgm_read_word(&(keyframes[0].left_elbow_deg));
-  int rs = pgm_read_word(&(keyframes[0].right_shoulder_deg));
-  int re = pgm_read_word(&(keyframes[0].right_elbow_deg));
+  int ls = KEYFRAME_DEG(keyframes[0], left_shoulder_deg);
+  int le = KEYFRAME_DEG(keyframes[0], left_elbow_deg);
+  int rs = KEYFRAME_DEG(keyframes[0], right_shoulder_deg);
+  int re = KEYFRAME_DEG(keyframes[0], right_elbow_deg);
 
   moveLegs(ls, le, rs, re);
 }
@@ -35,6 +35,77 @@
 #define ELBOW_MIN_ANGLE 0
 #define ELBOW_MAX_ANGLE 90
 
+// Servo PWM Lookup Tables (index = degrees, 0-90)
+#define PWM_TABLE_SIZE 91
+const uint16_t LEFT_SHOULDER_PWM[PWM_TABLE_SIZE] PROGMEM = {
+  440, 439, 437, 436, 434, 433, 431, 430, 428, 426,
+  425, 423, 422, 420, 419, 417, 416, 414, 412, 411,
+  409, 408, 406, 405, 403, 402, 400, 398, 397, 395,
+  394, 392, 391, 389, 388, 386, 384, 383, 381, 380,
+  378, 377, 375, 374, 372, 370, 369, 367, 366, 364,
+  363, 361, 360, 358, 356, 355, 353, 352, 350, 349,
+  347, 346, 344, 342, 341, 339, 338, 336, 335, 333,
+  332, 330, 328, 327, 325, 324, 322, 321, 319, 318,
+  316, 314, 313, 311, 310, 308, 307, 305, 304, 302,
+  300,
+};
+const uint16_t LEFT_ELBOW_PWM[PWM_TABLE_SIZE] PROGMEM = {
+  530, 529, 527, 525, 523, 521, 519, 517, 515, 513,
+  512, 510, 508, 506, 504, 502, 500, 498, 496, 495,
+  493, 491, 489, 487, 485, 483, 481, 479, 478, 476,
+  474, 472, 470, 468, 466, 464, 462, 461, 459, 457,
+  455, 453, 451, 449, 447, 445, 444, 442, 440, 438,
+  436, 434, 432, 430, 428, 427, 425, 423, 421, 419,
+  417, 415, 413, 411, 410, 408, 406, 404, 402, 400,
+  398, 396, 394, 393, 391, 389, 387, 385, 383, 381,
+  379, 377, 376, 374, 372, 370, 368, 366, 364, 362,
+  360,
+};
+const uint16_t RIGHT_SHOULDER_PWM[PWM_TABLE_SIZE] PROGMEM = {
+  150, 151, 152, 154, 155, 157, 158, 160, 161, 163,
+  164, 165, 167, 168, 170, 171, 173, 174, 176, 177,
+  178, 180, 181, 183, 184, 186, 187, 189, 190, 191,
+  193, 194, 196, 197, 199, 200, 202, 203, 204, 206,
+  207, 209, 210, 212, 213, 215, 216, 217, 219, 220,
+  222, 223, 225, 226, 228, 229, 230, 232, 233, 235,
+  236, 238, 239, 241, 242, 243, 245, 246, 248, 249,
+  251, 252, 254, 255, 256, 258, 259, 261, 262, 264,
+  265, 267, 268, 269, 271, 272, 274, 275, 277, 278,
+  280,
+};
+const uint16_t RIGHT_ELBOW_PWM[PWM_TABLE_SIZE] PROGMEM = {
+  150, 152, 154, 156, 158, 160, 162, 164, 166, 168,
+  170, 172, 174, 176, 178, 180, 182, 184, 186, 188,
+  190, 192, 194, 196, 198, 200, 202, 204, 206, 208,
+  210, 212, 214, 216, 218, 220, 222, 224, 226, 228,
+  230, 232, 234, 236, 238, 240, 242, 244, 246, 248,
+  250, 252, 254, 256, 258, 260, 262, 264, 266, 268,
+  270, 272, 274, 276, 278, 280, 282, 284, 286, 288,
+  290, 292, 294, 296, 298, 300, 302, 304, 306, 308,
+  310, 312, 314, 316, 318, 320, 322, 324, 326, 328,
+  330,
+};
+
+// PCA9685 burst groups (consecutive channels, register auto-increment)
+// All servos changing: 4 setPWM writes = 24 bytes, 2 bursts = 20 bytes
+#define PCA9685_LED0_ON_L 0x06
+#define PCA9685_LED_STRIDE 4
+#define SERVO_GROUP_COUNT 2
+#define SERVO_GROUP_0_CHANNEL 0  // RIGHT_ELBOW, RIGHT_SHOULDER
+#define SERVO_GROUP_0_REGISTER 0x06
+#define SERVO_GROUP_0_SIZE 2
+#define SERVO_GROUP_1_CHANNEL 14  // LEFT_SHOULDER, LEFT_ELBOW
+#define SERVO_GROUP_1_REGISTER 0x3E
+#define SERVO_GROUP_1_SIZE 2
+#define RIGHT_ELBOW_GROUP 0
+#define RIGHT_ELBOW_GROUP_SLOT 0
+#define RIGHT_SHOULDER_GROUP 0
+#define RIGHT_SHOULDER_GROUP_SLOT 1
+#define LEFT_SHOULDER_GROUP 1
+#define LEFT_SHOULDER_GROUP_SLOT 0
+#define LEFT_ELBOW_GROUP 1
+#define LEFT_ELBOW_GROUP_SLOT 1
+
 // Animation Keyframe Structure
 struct Keyframe {
   unsigned long time_ms;
@@ -44,6 +115,10 @@ struct Keyframe {
   int right_elbow_deg;
 };
 
+// Keyframe Accessors (PROGMEM)
+#define KEYFRAME_TIME(kf) ((unsigned long)pgm_read_dword(&(kf).time_ms))
+#define KEYFRAME_DEG(kf, joint) ((int)pgm_read_word(&(kf).joint))
+
 struct Animation {
   const char* name;
   unsigned long duration_ms;
@@ -139,6 +214,43 @@ const Animation ANIMATIONS[] PROGMEM = {
   {STABBING_NAME, 4000, true, 15, STABBING_KEYFRAMES},
 };
 
+// Segment Search Start (no time index - scan from first keyframe)
+#define SEGMENT_START(anim, elapsed) 0
+
+// Triggered Sequence (durations pre-scaled by speed, elapsed scaled by time_scale / 2^16)
+#define TIME_SCALE_SHIFT 16
+#define TIME_SCALE_ONE (1UL << TIME_SCALE_SHIFT)
+struct TriggeredStep {
+  uint8_t animation;
+  uint16_t speed_percent;
+  uint32_t duration_ms;
+  uint32_t time_scale;
+};
+
+#define TRIGGERED_SEQUENCE_LENGTH 14
+const TriggeredStep TRIGGERED_SEQUENCE[] PROGMEM = {
+  {5, 100, 3500UL, 65536UL},  // grasping 1.0x
+  {5, 100, 3500UL, 65536UL},  // grasping 1.0x
+  {6, 100, 4000UL, 65536UL},  // stabbing 1.0x
+  {5, 100, 3500UL, 65536UL},  // grasping 1.0x
+  {6, 100, 4000UL, 65536UL},  // stabbing 1.0x
+  {4, 100, 2400UL, 65536UL},  // breaking_through 1.0x
+  {4, 100, 2400UL, 65536UL},  // breaking_through 1.0x
+  {6, 150, 2666UL, 98304UL},  // stabbing 1.5x
+  {4, 150, 1600UL, 98304UL},  // breaking_through 1.5x
+  {6, 200, 2000UL, 131072UL},  // stabbing 2.0x
+  {4, 200, 1200UL, 131072UL},  // breaking_through 2.0x
+  {6, 250, 1600UL, 163840UL},  // stabbing 2.5x
+  {4, 250, 960UL, 163840UL},  // breaking_through 2.5x
+  {4, 30, 8000UL, 19661UL},  // breaking_through 0.3x
+};
+#define TRIGGERED_SEQUENCE_TOTAL_MS 41326UL
+
+inline unsigned long scaleElapsed(unsigned long realElapsed, unsigned long timeScale) {
+  if (timeScale == TIME_SCALE_ONE) return realElapsed;
+  return (realElapsed * timeScale) >> TIME_SCALE_SHIFT;
+}
+
 #define ANIMATION_COUNT 7
 #define DEFAULT_ANIMATION 3  // slow_struggle
 
@@ -9,7 +9,7 @@
  *   Steps 10-11: Very fast (2.0x speed)
  *   Steps 12-13: Violent/jerky (2.5x speed)
  *   Step 14: Very slow/exhausted (0.3x speed)
- *   Total triggered duration: ~36 seconds
+ *   Total triggered duration: 41.3 seconds (TRIGGERED_SEQUENCE_TOTAL_MS)
  *
  * Sequence:
  *   grasping → grasping → stabbing → grasping → stabbing → breaking_through → breaking_through →
@@ -18,6 +18,9 @@
  *   stabbing (violent) → breaking_through (violent) →
  *   breaking_through (slow/exhausted)
  *
+ * The sequence lives in animation-config.json ("triggered_sequence") and is
+ * compiled into TRIGGERED_SEQUENCE with durations pre-scaled by speed.
+ *
  * Available Animations (7 total):
  * - 0: zero - Reference position (straight up)
  * - 1: max - Reference position (perpendicular)
@@ -62,45 +65,7 @@ Adafruit_PWMServoDriver pwm = Adafruit_PWMServoDriver(I2C_ADDRESS);
 // Animation modes
 enum AnimationMode {
   MODE_IDLE_CYCLE,      // Cycle between resting and slow_struggle
-  MODE_TRIGGERED        // Play 13-step sequence with progressive speed increase
-};
-
-// Triggered sequence steps (14 steps total with progressive speed)
-#define TRIGGERED_SEQUENCE_LENGTH 14
-const int triggeredSequence[TRIGGERED_SEQUENCE_LENGTH] = {
-  ANIM_GRASPING,         // Step 0 - Normal speed
-  ANIM_GRASPING,         // Step 1 - Normal speed
-  ANIM_STABBING,         // Step 2 - Normal speed
-  ANIM_GRASPING,         // Step 3 - Normal speed
-  ANIM_STABBING,         // Step 4 - Normal speed
-  ANIM_BREAKING_THROUGH, // Step 5 - Normal speed
-  ANIM_BREAKING_THROUGH, // Step 6 - Normal speed
-  ANIM_STABBING,         // Step 7 - Faster (1.5x)
-  ANIM_BREAKING_THROUGH, // Step 8 - Faster (1.5x)
-  ANIM_STABBING,         // Step 9 - Very fast (2.0x)
-  ANIM_BREAKING_THROUGH, // Step 10 - Very fast (2.0x)
-  ANIM_STABBING,         // Step 11 - Violent (2.5x)
-  ANIM_BREAKING_THROUGH, // Step 12 - Violent (2.5x)
-  ANIM_BREAKING_THROUGH  // Step 13 - Slow/exhausted (0.7x)
-};
-
-// Playback speed multiplier for each step (makes animations faster and jerkier)
-// 1.0 = normal speed, 2.0 = 2x faster (half the duration), 0.3 = very slow (more duration)
-const float triggeredSequenceSpeed[TRIGGERED_SEQUENCE_LENGTH] = {
-  1.0,  // Step 0 - Normal
-  1.0,  // Step 1 - Normal
-  1.0,  // Step 2 - Normal
-  1.0,  // Step 3 - Normal
-  1.0,  // Step 4 - Normal
-  1.0,  // Step 5 - Normal
-  1.0,  // Step 6 - Normal
-  1.5,  // Step 7 - Faster
-  1.5,  // Step 8 - Faster
-  2.0,  // Step 9 - Very fast
-  2.0,  // Step 10 - Very fast
-  2.5,  // Step 11 - Violent/jerky
-  2.5,  // Step 12 - Violent/jerky
-  0.3   // Step 13 - Very slow/exhausted
+  MODE_TRIGGERED        // Play TRIGGERED_SEQUENCE with progressive speed increase
 };
 
 // Animation state
@@ -110,7 +75,8 @@ bool animationActive = true;  // Start immediately with resting
 bool lastTriggerState = HIGH;
 AnimationMode currentMode = MODE_IDLE_CYCLE;
 int triggeredStep = 0;  // Current step in triggered sequence (0-13)
-float playbackSpeed = 1.0;  // Animation playback speed multiplier
+unsigned long playbackDuration = 0;  // Real-time duration of the current animation (ms)
+unsigned long playbackScale = TIME_SCALE_ONE;  // Q16 playback speed multiplier
 
 // Servo position cache
 int lastLeftShoulder = -1;
@@ -137,12 +103,24 @@ void setup() {
   Serial.println(ANIMATION_COUNT);
 
   Serial.println(F("Mode: Idle Cycle (resting <-> slow_struggle)"));
-  Serial.println(F("Trigger: 14-step sequence with progressive speed:"));
-  Serial.println(F("  Steps 1-7: Normal speed"));
-  Serial.println(F("  Steps 8-9: 1.5x faster"));
-  Serial.println(F("  Steps 10-11: 2.0x very fast"));
-  Serial.println(F("  Steps 12-13: 2.5x violent/jerky"));
-  Serial.println(F("  Step 14: 0.3x very slow/exhausted"));
+  Serial.print(F("Trigger: "));
+  Serial.print(TRIGGERED_SEQUENCE_LENGTH);
+  Serial.println(F("-step sequence with progressive speed:"));
+  for (int i = 0; i < TRIGGERED_SEQUENCE_LENGTH; i++) {
+    char name[64];
+    uint8_t animIndex = pgm_read_byte(&TRIGGERED_SEQUENCE[i].animation);
+    strcpy_P(name, (char*)pgm_read_ptr(&(ANIMATIONS[animIndex].name)));
+    Serial.print(F("  Step "));
+    Serial.print(i + 1);
+    Serial.print(F(": "));
+    Serial.print(name);
+    Serial.print(F(" ("));
+    printSpeed(pgm_read_word(&TRIGGERED_SEQUENCE[i].speed_percent));
+    Serial.println(F("x)"));
+  }
+  Serial.print(F("  Total: "));
+  Serial.print(TRIGGERED_SEQUENCE_TOTAL_MS);
+  Serial.println(F(" ms"));
   Serial.println();
 
   // Start with resting animation
@@ -155,11 +133,10 @@ void loop() {
 
   if (triggerState == LOW && lastTriggerState == HIGH) {
     // Trigger pressed - start triggered sequence
-    Serial.println(F("TRIGGERED! Starting 14-step sequence with progressive speed..."));
+    Serial.println(F("TRIGGERED! Starting sequence with progressive speed..."));
     currentMode = MODE_TRIGGERED;
     triggeredStep = 0;
-    playbackSpeed = triggeredSequenceSpeed[0];  // Set speed for first animation
-    startAnimation(triggeredSequence[0]);
+    startTriggeredStep(0);
   }
 
   lastTriggerState = triggerState;
@@ -179,6 +156,10 @@ void startAnimation(int animIndex) {
   animationStartTime = millis();
   animationActive = true;
 
+  // Normal speed until a triggered step overrides it
+  playbackDuration = pgm_read_dword(&(ANIMATIONS[animIndex].duration_ms));
+  playbackScale = TIME_SCALE_ONE;
+
   // Read animation name from PROGMEM
   char name[64];  // Increased from 32 to 64 bytes
   strcpy_P(name, (char*)pgm_read_ptr(&(ANIMATIONS[animIndex].name)));
@@ -187,38 +168,58 @@ void startAnimation(int animIndex) {
   Serial.println(name);
 }
 
-void updateAnimation() {
-  // Read animation from PROGMEM
-  unsigned long duration = pgm_read_dword(&(ANIMATIONS[currentAnimation].duration_ms));
-  bool loop = pgm_read_byte(&(ANIMATIONS[currentAnimation].loop));
+void startTriggeredStep(int step) {
+  // Durations and speeds are precomputed integers (see TRIGGERED_SEQUENCE)
+  startAnimation(pgm_read_byte(&TRIGGERED_SEQUENCE[step].animation));
+  playbackDuration = pgm_read_dword(&TRIGGERED_SEQUENCE[step].duration_ms);
+  playbackScale = pgm_read_dword(&TRIGGERED_SEQUENCE[step].time_scale);
+}
 
+void printSpeed(uint16_t speedPercent) {
+  // 150 -> "1.50" without float formatting
+  Serial.print(speedPercent / 100);
+  Serial.print('.');
+  if (speedPercent % 100 < 10) {
+    Serial.print('0');
+  }
+  Serial.print(speedPercent % 100);
+}
+
+void updateAnimation() {
   // Calculate elapsed time with playback speed multiplier
   // Higher speed = faster playback (elapsed time passes faster)
   unsigned long realElapsed = millis() - animationStartTime;
-  unsigned long elapsed = (unsigned long)(realElapsed * playbackSpeed);
-
-  // Adjust duration check for playback speed
-  // At 2x speed, animation finishes in half the time
-  unsigned long adjustedDuration = (unsigned long)(duration / playbackSpeed);
 
-  // Check if animation finished
-  if (realElapsed >= adjustedDuration) {
+  // Check if animation finished (playbackDuration is already scaled by speed)
+  if (realElapsed >= playbackDuration) {
     // Animation complete - determine next animation
     handleAnimationComplete();
     return;
   }
 
+  unsigned long elapsed = scaleElapsed(realElapsed, playbackScale);
+
+#ifdef RASTER_TICK_MS
+  // Pre-rasterized animations are a single table read per frame
+  const uint8_t* frame = rasterFrame(currentAnimation, elapsed);
+  if (frame != NULL) {
+    moveLegs(pgm_read_byte(&frame[0]), pgm_read_byte(&frame[1]),
+             pgm_read_byte(&frame[2]), pgm_read_byte(&frame[3]));
+    return;
+  }
+#endif
+
   // Interpolate between keyframes
   int kfCount = pgm_read_word(&(ANIMATIONS[currentAnimation].keyframe_count));
   const Keyframe* keyframes = (const Keyframe*)pgm_read_ptr(&(ANIMATIONS[currentAnimation].keyframes));
 
-  // Find surrounding keyframes
+  // Find surrounding keyframes (SEGMENT_START skips ahead when a time index is generated)
   int kf1 = 0;
   int kf2 = 1;
 
-  for (int i = 0; i < kfCount - 1; i++) {
-    unsigned long t1 = pgm_read_dword(&(keyframes[i].time_ms));
-    unsigned long t2 = pgm_read_dword(&(keyframes[i + 1].time_ms));
+  for (int i = SEGMENT_START(currentAnimation, elapsed); i < kfCount - 1; i++) {
+    unsigned long t1 = KEYFRAME_TIME(keyframes[i]);
+    unsigned long t2 = KEYFRAME_TIME(keyframes[i + 1]);
 
     if (elapsed >= t1 && elapsed < t2) {
       kf1 = i;
@@ -228,18 +229,28 @@ void updateAnimation() {
   }
 
   // Read keyframe data
-  unsigned long t1 = pgm_read_dword(&(keyframes[kf1].time_ms));
-  unsigned long t2 = pgm_read_dword(&(keyframes[kf2].time_ms));
-
-  int ls1 = pgm_read_word(&(keyframes[kf1].left_shoulder_deg));
-  int le1 = pgm_read_word(&(keyframes[kf1].left_elbow_deg));
-  int rs1 = pgm_read_word(&(keyframes[kf1].right_shoulder_deg));
-  int re1 = pgm_read_word(&(keyframes[kf1].right_elbow_deg));
-
-  int ls2 = pgm_read_word(&(keyframes[kf2].left_shoulder_deg));
-  int le2 = pgm_read_word(&(keyframes[kf2].left_elbow_deg));
-  int rs2 = pgm_read_word(&(keyframes[kf2].right_shoulder_deg));
-  int re2 = pgm_read_word(&(keyframes[kf2].right_elbow_deg));
+  unsigned long t1 = KEYFRAME_TIME(keyframes[kf1]);
+  unsigned long t2 = KEYFRAME_TIME(keyframes[kf2]);
+
+  int ls1 = KEYFRAME_DEG(keyframes[kf1], left_shoulder_deg);
+  int le1 = KEYFRAME_DEG(keyframes[kf1], left_elbow_deg);
+  int rs1 = KEYFRAME_DEG(keyframes[kf1], right_shoulder_deg);
+  int re1 = KEYFRAME_DEG(keyframes[kf1], right_elbow_deg);
+
+#ifdef SEGMENT_RECIP_SHIFT
+  // Interpolate with precomputed fixed-point segment data (no float math)
+  const Segment* segments = (const Segment*)pgm_read_ptr(&SEGMENT_TABLES[currentAnimation]);
+  unsigned long fraction = segmentFraction(segments[kf1], elapsed - t1, t2 - t1);
+
+  int leftShoulder = ls1 + fixedStep(SEGMENT_DELTA(segments[kf1], left_shoulder_delta), fraction);
+  int leftElbow = le1 + fixedStep(SEGMENT_DELTA(segments[kf1], left_elbow_delta), fraction);
+  int rightShoulder = rs1 + fixedStep(SEGMENT_DELTA(segments[kf1], right_shoulder_delta), fraction);
+  int rightElbow = re1 + fixedStep(SEGMENT_DELTA(segments[kf1], right_elbow_delta), fraction);
+#else
+  int ls2 = KEYFRAME_DEG(keyframes[kf2], left_shoulder_deg);
+  int le2 = KEYFRAME_DEG(keyframes[kf2], left_elbow_deg);
+  int rs2 = KEYFRAME_DEG(keyframes[kf2], right_shoulder_deg);
+  int re2 = KEYFRAME_DEG(keyframes[kf2], right_elbow_deg);
 
   // Interpolate
   float t = (float)(elapsed - t1) / (float)(t2 - t1);
@@ -249,6 +260,7 @@ void updateAnimation() {
   int leftElbow = le1 + (int)((le2 - le1) * t);
   int rightShoulder = rs1 + (int)((rs2 - rs1) * t);
   int rightElbow = re1 + (int)((re2 - re1) * t);
+#endif
 
   // Move servos
   moveLegs(leftShoulder, leftElbow, rightShoulder, rightElbow);
@@ -257,31 +269,31 @@ void updateAnimation() {
 void moveLegs(int leftShoulder, int leftElbow, int rightShoulder, int rightElbow) {
   // Only move servos if position changed (reduce jitter)
   if (leftShoulder != lastLeftShoulder) {
-    setServo(LEFT_SHOULDER_CHANNEL, leftShoulder, LEFT_SHOULDER_MIN_PULSE, LEFT_SHOULDER_MAX_PULSE);
+    setServo(LEFT_SHOULDER_CHANNEL, leftShoulder, LEFT_SHOULDER_PWM);
     lastLeftShoulder = leftShoulder;
   }
 
   if (leftElbow != lastLeftElbow) {
-    setServo(LEFT_ELBOW_CHANNEL, leftElbow, LEFT_ELBOW_MIN_PULSE, LEFT_ELBOW_MAX_PULSE);
+    setServo(LEFT_ELBOW_CHANNEL, leftElbow, LEFT_ELBOW_PWM);
     lastLeftElbow = leftElbow;
   }
 
   if (rightShoulder != lastRightShoulder) {
-    setServo(RIGHT_SHOULDER_CHANNEL, rightShoulder, RIGHT_SHOULDER_MIN_PULSE, RIGHT_SHOULDER_MAX_PULSE);
+    setServo(RIGHT_SHOULDER_CHANNEL, rightShoulder, RIGHT_SHOULDER_PWM);
     lastRightShoulder = rightShoulder;
   }
 
   if (rightElbow != lastRightElbow) {
-    setServo(RIGHT_ELBOW_CHANNEL, rightElbow, RIGHT_ELBOW_MIN_PULSE, RIGHT_ELBOW_MAX_PULSE);
+    setServo(RIGHT_ELBOW_CHANNEL, rightElbow, RIGHT_ELBOW_PWM);
     lastRightElbow = rightElbow;
   }
 }
 
-void setServo(int channel, int degrees, int minPulse, int maxPulse) {
+void setServo(int channel, int degrees, const uint16_t* pulseTable) {
   // Convert degrees (0-90°) to pulse width
-  // Calibrated ranges support 0-90° movement
-  degrees = constrain(degrees, 0, 90);
-  int pulse = map(degrees, 0, 90, minPulse, maxPulse);
+  // Per-servo lookup table generated from the calibrated ranges (same values as map())
+  degrees = constrain(degrees, 0, PWM_TABLE_SIZE - 1);
+  uint16_t pulse = pgm_read_word(&pulseTable[degrees]);
   pwm.setPWM(channel, 0, pulse);
 }
 
@@ -298,13 +310,12 @@ void handleAnimationComplete() {
       startAnimation(ANIM_RESTING);
     }
   } else {
-    // MODE_TRIGGERED: Play through the 14-step sequence
+    // MODE_TRIGGERED: Play through the triggered sequence
     triggeredStep++;
 
     if (triggeredStep < TRIGGERED_SEQUENCE_LENGTH) {
       // Continue to next step in sequence
-      int nextAnim = triggeredSequence[triggeredStep];
-      playbackSpeed = triggeredSequenceSpeed[triggeredStep];  // Set speed for this step
+      uint8_t nextAnim = pgm_read_byte(&TRIGGERED_SEQUENCE[triggeredStep].animation);
 
       // Print animation name and speed for next step
       char name[64];
@@ -316,17 +327,16 @@ void handleAnimationComplete() {
       Serial.print(F(": "));
       Serial.print(name);
       Serial.print(F(" ("));
-      Serial.print(playbackSpeed);
+      printSpeed(pgm_read_word(&TRIGGERED_SEQUENCE[triggeredStep].speed_percent));
       Serial.println(F("x speed)"));
 
-      startAnimation(nextAnim);
+      startTriggeredStep(triggeredStep);
     } else {
       // Sequence complete, return to idle
       Serial.println(F("-> Sequence complete, back to idle cycle (resting)"));
       currentMode = MODE_IDLE_CYCLE;
       triggeredStep = 0;
-      playbackSpeed = 1.0;  // Reset to normal speed for idle animations
-      startAnimation(ANIM_RESTING);
+      startAnimation(ANIM_RESTING);  // Back to normal speed for idle animations
     }
   }
 }
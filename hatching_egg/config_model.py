@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Typed, parse-once model of animation-config.json.
+
+load_config() parses and validates the file once per process and returns
+an AnimationConfig of slotted dataclasses:
+
+- hardware: HardwareConfig with a ServoConfig (channel, pulse range) per
+  joint of each leg;
+- kinematics: KinematicsConfig;
+- animations: Animation per id, whose Keyframes are stored column-wise in
+  array('q') time and array('h') angle columns (10 bytes per keyframe
+  instead of a five-entry dict);
+- triggered_sequence: TriggeredStep tuple.
+
+The header generator and the analysis tools work on these fields and on
+the keyframe columns directly; nothing hands out the JSON document.
+
+Results are cached by path, keyed on (mtime, size, SHA-256 of the
+content), so tools and tests that load the same file share one parse, and
+an edited file is parsed again even if an in-place rewrite kept its size
+and mtime. The model is immutable and shared; derive new values with
+dataclasses.replace() (as --simplify does) rather than changing it.
+"""
+
+import hashlib
+import json
+import os
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+
+JOINTS = ('left_shoulder_deg', 'left_elbow_deg', 'right_shoulder_deg', 'right_elbow_deg')
+LEGS = ('left_leg', 'right_leg')
+LEG_JOINTS = ('shoulder', 'elbow')
+KINEMATICS_FIELDS = ('upper_segment_length', 'lower_segment_length', 'shoulder_min_angle',
+                     'shoulder_max_angle', 'elbow_min_angle', 'elbow_max_angle')
+TIME_TYPECODE = 'q'  # int64, like keyframe_columns()
+ANGLE_TYPECODE = 'h'  # int16: any angle a servo table or packed byte can use
+KEYFRAME_FIELDS = ('time_ms',) + JOINTS
+
+_cache = {}  # resolved path -> ((mtime_ns, size, sha256), AnimationConfig)
+
+
+@dataclass(frozen=True, slots=True)
+class ServoConfig:
+    channel: int
+    min_pulse: int
+    max_pulse: int
+
+
+@dataclass(frozen=True, slots=True)
+class LegConfig:
+    shoulder: ServoConfig
+    elbow: ServoConfig
+
+
+@dataclass(frozen=True, slots=True)
+class HardwareConfig:
+    i2c_address: str
+    servo_frequency: int
+    trigger_pin: int
+    left_leg: LegConfig
+    right_leg: LegConfig
+
+    def servo(self, leg, joint):
+        """ServoConfig for a hardware leg key ('left_leg') and joint ('elbow')."""
+        return getattr(getattr(self, leg), joint)
+
+
+@dataclass(frozen=True, slots=True)
+class KinematicsConfig:
+    upper_segment_length: int
+    lower_segment_length: int
+    shoulder_min_angle: int
+    shoulder_max_angle: int
+    elbow_min_angle: int
+    elbow_max_angle: int
+
+
+@dataclass(frozen=True, slots=True)
+class Keyframes:
+    """Keyframe columns: time_ms plus one angle column per joint (JOINTS order)."""
+    time_ms: array
+    angles: tuple
+
+    def __len__(self):
+        return len(self.time_ms)
+
+    def __iter__(self):
+        return self.rows()
+
+    def column(self, joint):
+        """Angle column of a joint name from JOINTS."""
+        return self.angles[JOINTS.index(joint)]
+
+    def rows(self):
+        """(time_ms, *angles) tuples in keyframe order."""
+        return zip(self.time_ms, *self.angles)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Keyframes from (time_ms, *angles) tuples (OverflowError if a value does not fit)."""
+        rows = list(rows)
+        return cls(array(TIME_TYPECODE, [row[0] for row in rows]),
+                   tuple(array(ANGLE_TYPECODE, [row[j] for row in rows])
+                         for j in range(1, len(KEYFRAME_FIELDS))))
+
+    def to_dicts(self):
+        """Keyframes in the JSON dict form."""
+        return [dict(zip(('time_ms',) + JOINTS, row)) for row in self.rows()]
+
+
+@dataclass(frozen=True, slots=True)
+class Animation:
+    name: str
+    duration_ms: int
+    loop: bool
+    keyframes: Keyframes  # None in parse_scanned_config() results (keyframes are streamed)
+
+
+@dataclass(frozen=True, slots=True)
+class TriggeredStep:
+    animation: str
+    speed: float
+
+
+@dataclass(frozen=True, slots=True)
+class AnimationConfig:
+    hardware: HardwareConfig
+    kinematics: KinematicsConfig
+    animations: MappingProxyType  # read-only {anim_id: Animation}
+    default_animation: str
+    triggered_sequence: tuple
+
+
+def require(section, key, where, kind=int):
+    """section[key], raising ValueError unless it is a `kind` (bools are not ints)."""
+    if not isinstance(section, dict) or key not in section:
+        raise ValueError(f"{where}: missing '{key}'")
+    value = section[key]
+    if not isinstance(value, kind) or (kind is not bool and isinstance(value, bool)):
+        names = kind.__name__ if isinstance(kind, type) else "/".join(k.__name__ for k in kind)
+        raise ValueError(f"{where}.{key}: expected {names}, got {value!r}")
+    return value
+
+
+def parse_hardware(hw, where='hardware'):
+    legs = {}
+    for leg in LEGS:
+        servos = {}
+        for joint in LEG_JOINTS:
+            fields = (f'{joint}_channel', f'{joint}_min_pulse', f'{joint}_max_pulse')
+            servos[joint] = ServoConfig(*(require(hw.get(leg), field, f'{where}.{leg}')
+                                          for field in fields))
+        legs[leg] = LegConfig(**servos)
+    return HardwareConfig(require(hw, 'i2c_address', where, str),
+                          require(hw, 'servo_frequency', where),
+                          require(hw, 'trigger_pin', where), **legs)
+
+
+def _typecode_range(typecode):
+    bits = 8 * array(typecode).itemsize
+    return -(1 << bits - 1), (1 << bits - 1) - 1
+
+
+FIELD_RANGES = {field: _typecode_range(TIME_TYPECODE if field == 'time_ms' else ANGLE_TYPECODE)
+                for field in KEYFRAME_FIELDS}
+
+
+def check_keyframe(kf, where):
+    """Raise ValueError unless kf has every field as an int its column can hold."""
+    for field in KEYFRAME_FIELDS:
+        value = require(kf, field, where)
+        low, high = FIELD_RANGES[field]
+        if not low <= value <= high:
+            raise ValueError(f"{where}.{field}: {value} is out of range")
+
+
+def parse_keyframes(keyframes, where):
+    """Keyframes columns from a non-empty list of keyframe dicts."""
+    if not isinstance(keyframes, list):
+        raise ValueError(f"{where}: expected a list of keyframes")
+    if not keyframes:
+        raise ValueError(f"{where}: expected at least one keyframe")
+    try:
+        time_ms = array(TIME_TYPECODE, [kf['time_ms'] for kf in keyframes])
+        angles = tuple(array(ANGLE_TYPECODE, [kf[joint] for kf in keyframes]) for joint in JOINTS)
+    except (KeyError, TypeError, OverflowError):
+        # Rescan one keyframe at a time to name the offending value
+        for i, kf in enumerate(keyframes):
+            check_keyframe(kf, f"{where}[{i}]")
+        raise
+    return Keyframes(time_ms, angles)
+
+
+def parse_animation(anim, where):
+    return Animation(require(anim, 'name', where, str),
+                     require(anim, 'duration_ms', where),
+                     bool(anim.get('loop', False)),
+                     parse_keyframes(anim.get('keyframes'), f"{where}.keyframes"))
+
+
+def parse_triggered_sequence(sequence, animations, where='triggered_sequence'):
+    if sequence is None:
+        return ()
+    steps = []
+    for i, step in enumerate(require(sequence, 'steps', where, list)):
+        anim_id = require(step, 'animation', f"{where}.steps[{i}]", str)
+        if anim_id not in animations:
+            raise ValueError(f"{where}.steps[{i}]: unknown animation '{anim_id}'")
+        steps.append(TriggeredStep(anim_id, require(step, 'speed', f"{where}.steps[{i}]",
+                                                    (int, float))))
+    return tuple(steps)
+
+
+def parse_sections(data, animations):
+    """AnimationConfig from a document and its already parsed animations."""
+    default_animation = require(data, 'default_animation', 'config', str)
+    if default_animation not in animations:
+        raise ValueError(f"default_animation: unknown animation '{default_animation}'")
+    return AnimationConfig(
+        parse_hardware(require(data, 'hardware', 'config', dict)),
+        KinematicsConfig(*(require(data.get('kinematics'), field, 'kinematics')
+                           for field in KINEMATICS_FIELDS)),
+        MappingProxyType(animations),
+        default_animation,
+        parse_triggered_sequence(data.get('triggered_sequence'), animations),
+    )
+
+
+def parse_config(data, source='animation-config.json'):
+    """AnimationConfig from a parsed JSON document.
+
+    Raises ValueError naming the source and the offending field for
+    missing sections, non-integer values and unknown animation ids.
+    """
+    if not isinstance(data, dict):
+        raise ValueError(f"{source}: expected a JSON object")
+    try:
+        animations = {
+            anim_id: parse_animation(anim, f"animations.{anim_id}")
+            for anim_id, anim in require(data, 'animations', 'config', dict).items()
+        }
+        return parse_sections(data, animations)
+    except ValueError as e:
+        raise ValueError(f"{source}: {e}") from None
+
+
+def parse_scanned_config(config, source='animation-config.json'):
+    """(AnimationConfig, keyframe counts) from a config_stream.scan_config() result.
+
+    The scan has keyframe_count in place of each animation's keyframes, so
+    every Animation.keyframes is None; check the keyframes themselves with
+    check_keyframe() as they stream. Raises ValueError like parse_config().
+    """
+    if not isinstance(config, dict):
+        raise ValueError(f"{source}: expected a JSON object")
+    try:
+        animations, counts = {}, {}
+        for anim_id, anim in require(config, 'animations', 'config', dict).items():
+            where = f"animations.{anim_id}"
+            if not isinstance(anim, dict) or 'keyframe_count' not in anim:
+                raise ValueError(f"{where}: missing 'keyframes'")
+            if anim['keyframe_count'] == 0:
+                raise ValueError(f"{where}.keyframes: expected at least one keyframe")
+            animations[anim_id] = Animation(require(anim, 'name', where, str),
+                                            require(anim, 'duration_ms', where),
+                                            bool(anim.get('loop', False)), None)
+            counts[anim_id] = anim['keyframe_count']
+        return parse_sections(config, animations), counts
+    except ValueError as e:
+        raise ValueError(f"{source}: {e}") from None
+
+
+def load_config(config_path):
+    """Parsed, validated config for a file, cached by (path, mtime, size, hash)."""
+    path = Path(config_path).resolve()
+    with open(path, 'rb') as f:
+        stat = os.fstat(f.fileno())
+        content = f.read()
+    key = (stat.st_mtime_ns, stat.st_size, hashlib.sha256(content).hexdigest())
+    cached = _cache.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    config = parse_config(json.loads(content.decode('utf-8')), config_path)
+    _cache[path] = (key, config)
+    return config
+
+
+def clear_config_cache():
+    """Forget every cached parse (for tests that rewrite files in place)."""
+    _cache.clear()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Incremental reader for large animation-config.json files.
+
+json.load() holds the whole document (and every keyframe dict) in memory
+at once. These helpers walk the file in fixed-size chunks instead, decoding
+one keyframe at a time, so memory stays bounded for mocap-sized configs:
+
+- scan_config() returns every top-level value except keyframes, with each
+  animation's keyframe_count in their place.
+- iter_animation_keyframes() yields each animation's keyframes lazily, in
+  file order.
+"""
+
+import json
+import re
+
+CHUNK_SIZE = 1 << 16
+WHITESPACE = re.compile(r'[ \t\r\n]*')
+NUMBER_CHARS = frozenset('0123456789.eE+-')
+
+
+class JsonStream:
+    """Pull parser over a text file: structural tokens plus whole values.
+
+    Values are decoded with json.JSONDecoder.raw_decode() as soon as they
+    are complete in the buffer; only the unconsumed tail is kept.
+    """
+
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        """Append the next chunk, dropping consumed text. False at EOF."""
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Next non-whitespace character ('' at end of file)."""
+        while True:
+            self.pos = WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char):
+        """Consume a structural character or raise ValueError."""
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"expected '{char}' but found '{found or 'end of file'}'")
+        self.pos += 1
+
+    def value(self):
+        """Decode and return the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                result, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A number is only complete once a non-number character follows it
+            if (isinstance(result, (int, float)) and not isinstance(result, bool)
+                    and (end == len(self.buf) or self.buf[end] in NUMBER_CHARS)
+                    and self._fill()):
+                continue
+            self.pos = end
+            return result
+
+    def keys(self):
+        """Iterate an object's keys; the caller must consume each value."""
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            if not isinstance(key, str):
+                raise ValueError(f"object key must be a string, got {key!r}")
+            self.expect(':')
+            yield key
+            if self._separator('}') == '}':
+                return
+
+    def elements(self):
+        """Iterate an array; the caller must consume each element."""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield
+            if self._separator(']') == ']':
+                return
+
+    def _separator(self, closing):
+        """Consume ',' or the closing bracket and return it."""
+        found = self.peek()
+        if found not in (',', closing):
+            raise ValueError(f"expected ',' or '{closing}' but found '{found or 'end of file'}'")
+        self.pos += 1
+        return found
+
+
+def scan_config(config_path):
+    """First pass: the config without keyframes.
+
+    Each animation keeps its other fields and gains keyframe_count; the
+    keyframes are decoded one at a time and discarded.
+    """
+    config = {}
+    with open(config_path, 'r') as f:
+        stream = JsonStream(f)
+        for key in stream.keys():
+            if key != 'animations':
+                config[key] = stream.value()
+                continue
+            animations = config['animations'] = {}
+            for anim_id in stream.keys():
+                anim = animations[anim_id] = {}
+                for field in stream.keys():
+                    if field != 'keyframes':
+                        anim[field] = stream.value()
+                        continue
+                    count = 0
+                    for _ in stream.elements():
+                        stream.value()
+                        count += 1
+                    anim['keyframe_count'] = count
+        if stream.peek():
+            raise ValueError("unexpected data after the top-level object")
+    return config
+
+
+def iter_animation_keyframes(config_path):
+    """Second pass: yield (anim_id, keyframe iterator) in file order.
+
+    Each iterator decodes keyframes lazily and must be consumed before the
+    next animation is requested (anything left is skipped).
+    """
+    with open(config_path, 'r') as f:
+        stream = JsonStream(f)
+        for key in stream.keys():
+            if key != 'animations':
+                stream.value()
+                continue
+            for anim_id in stream.keys():
+                for field in stream.keys():
+                    if field != 'keyframes':
+                        stream.value()
+                        continue
+                    keyframes = _keyframes(stream)
+                    yield anim_id, keyframes
+                    for _ in keyframes:
+                        pass
+
+
+def _keyframes(stream):
+    for _ in stream.elements():
+        yield stream.value()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+File watching for generate_arduino_config.py --watch.
+
+Uses Linux inotify (through ctypes, no extra dependencies) when available
+and falls back to polling the file's mtime/size elsewhere. The directory
+is watched rather than the file so editors that save by writing a temp
+file and renaming it over the original are still seen.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+from pathlib import Path
+
+DEBOUNCE_S = 0.1  # quiet period that ends a burst of writes
+POLL_INTERVAL_S = 0.2
+IDLE_TIMEOUT_S = 0.5  # how often watch() checks its stop event
+
+# <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+INOTIFY_EVENT = struct.Struct('iIII')  # wd, mask, cookie, len (name follows)
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+
+class PollingWatcher:
+    """Detects changes by comparing the file's (mtime_ns, size) signature."""
+
+    def __init__(self, path, interval_s=POLL_INTERVAL_S):
+        self.path = Path(path)
+        self.interval_s = interval_s
+        self.signature = self._signature()
+
+    def _signature(self):
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def wait(self, timeout_s):
+        """Return True if the file changed within timeout_s seconds."""
+        deadline = time.monotonic() + timeout_s
+        while True:
+            signature = self._signature()
+            if signature != self.signature:
+                self.signature = signature
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(self.interval_s, remaining))
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """Blocks on inotify events for one file in its directory."""
+
+    def __init__(self, path):
+        self.path = Path(path).resolve()
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        wd = libc.inotify_add_watch(self.fd, str(self.path.parent).encode(), WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f'inotify_add_watch failed for {self.path.parent}')
+
+    def _read_events(self):
+        """Drain pending events; True if any named the watched file."""
+        changed = False
+        while True:
+            try:
+                data = os.read(self.fd, 4096)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                _, _, _, name_len = INOTIFY_EVENT.unpack_from(data, offset)
+                offset += INOTIFY_EVENT.size
+                name = data[offset:offset + name_len].rstrip(b'\0').decode(errors='replace')
+                offset += name_len
+                changed = changed or name == self.path.name
+
+    def wait(self, timeout_s):
+        """Return True if the file changed within timeout_s seconds."""
+        deadline = time.monotonic() + timeout_s
+        while True:
+            remaining = max(deadline - time.monotonic(), 0)
+            ready, _, _ = select.select([self.fd], [], [], remaining)
+            if ready and self._read_events():
+                return True
+            if remaining == 0:
+                return False
+
+    def close(self):
+        os.close(self.fd)
+
+
+def open_watcher(path):
+    """InotifyWatcher where the platform supports it, else PollingWatcher."""
+    try:
+        return InotifyWatcher(path)
+    except (OSError, AttributeError, TypeError):
+        return PollingWatcher(path)
+
+
+def watch(path, on_change, debounce_s=DEBOUNCE_S, watcher=None, stop=None):
+    """Call on_change() once per burst of writes to path.
+
+    A burst ends after debounce_s seconds without further changes. Runs
+    until stop (a threading.Event) is set, or forever without one.
+    """
+    watcher = watcher or open_watcher(path)
+    try:
+        while stop is None or not stop.is_set():
+            if not watcher.wait(IDLE_TIMEOUT_S):
+                continue
+            while watcher.wait(debounce_s):
+                pass
+            on_change()
+    finally:
+        watcher.close()
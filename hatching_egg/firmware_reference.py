@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Python reference implementations of the firmware's integer math.
+
+These mirror the C semantics used on the Beetle (truncating integer
+division, Arduino map()/constrain()) so generated tables and tests can be
+checked against what actually runs on the hardware.
+"""
+
+import struct
+
+ANGLE_MIN = 0
+ANGLE_MAX = 90
+
+ULONG_MASK = 0xFFFFFFFF  # unsigned long on AVR
+
+# Fixed-point segment interpolation: fraction = offset * recip in Q24.
+# Q24 (rather than Q16) keeps the error under 1° for multi-second segments
+# while |delta| * fraction still fits in 32 bits for int8_t deltas.
+RECIP_SHIFT = 24
+RECIP_ONE = 1 << RECIP_SHIFT
+
+# Triggered playback speed as a Q16 multiplier on elapsed time.
+TIME_SCALE_SHIFT = 16
+TIME_SCALE_ONE = 1 << TIME_SCALE_SHIFT
+
+
+def c_div(numerator, denominator):
+    """Integer division that truncates toward zero, like C."""
+    quotient = abs(numerator) // abs(denominator)
+    return quotient if (numerator >= 0) == (denominator > 0) else -quotient
+
+
+def constrain(value, low, high):
+    """Arduino constrain()."""
+    if value < low:
+        return low
+    if value > high:
+        return high
+    return value
+
+
+def arduino_map(value, from_low, from_high, to_low, to_high):
+    """Arduino map() / mapValue() from servo_mapping.h."""
+    return c_div((value - from_low) * (to_high - to_low), from_high - from_low) + to_low
+
+
+def degrees_to_pulse(degrees, min_pulse, max_pulse):
+    """Pulse written by setServo() for an angle (constrained to 0-90°)."""
+    degrees = constrain(degrees, ANGLE_MIN, ANGLE_MAX)
+    return arduino_map(degrees, ANGLE_MIN, ANGLE_MAX, min_pulse, max_pulse)
+
+
+def pulse_table(min_pulse, max_pulse):
+    """Degree → pulse lookup table, one entry per degree from 0 to 90."""
+    return [degrees_to_pulse(deg, min_pulse, max_pulse) for deg in range(ANGLE_MIN, ANGLE_MAX + 1)]
+
+
+def find_segment(times, elapsed, start=0):
+    """Keyframe pair updateAnimation() interpolates between.
+
+    Mirrors the firmware scan: the first i >= start with
+    times[i] <= elapsed < times[i + 1], falling back to (0, 1).
+    """
+    for i in range(start, len(times) - 1):
+        if times[i] <= elapsed < times[i + 1]:
+            return i, i + 1
+    return 0, 1
+
+
+def build_segment_index(times, duration_ms, slot_shift):
+    """Starting keyframe for each 2**slot_shift ms time slot.
+
+    Entry k is the last segment starting at or before k << slot_shift, so
+    scanning forward from it finds the same segment as scanning from 0
+    (times must be non-decreasing). Slots cover 0..max(duration, last time).
+    """
+    last_segment = max(len(times) - 2, 0)
+    end_ms = max([duration_ms] + list(times))
+    index = []
+    i = 0
+    for slot in range((end_ms >> slot_shift) + 1):
+        slot_start = slot << slot_shift
+        while i < last_segment and times[i + 1] <= slot_start:
+            i += 1
+        index.append(i)
+    return index
+
+
+def find_segment_indexed(times, index, slot_shift, elapsed):
+    """O(1) slot lookup followed by the firmware's forward scan."""
+    slot = min(elapsed >> slot_shift, len(index) - 1)
+    return find_segment(times, elapsed, start=index[slot])
+
+
+def f32(value):
+    """Round a Python float to IEEE single precision (AVR float/double)."""
+    return struct.unpack('<f', struct.pack('<f', value))[0]
+
+
+def interpolate_float(a1, a2, t1, t2, elapsed):
+    """updateAnimation()'s float interpolation of one joint.
+
+    a1 + (int)((a2 - a1) * t) with t = (float)(elapsed - t1) / (float)(t2 - t1)
+    constrained to 0..1, evaluated in 32-bit float like the AVR. A
+    zero-length segment (undefined on the AVR) is treated as t = 1.
+    """
+    offset = (elapsed - t1) & ULONG_MASK
+    span = (t2 - t1) & ULONG_MASK
+    t = f32(f32(offset) / f32(span)) if span else 1.0
+    t = constrain(t, 0.0, 1.0)
+    return a1 + int(f32((a2 - a1) * t))
+
+
+def segment_reciprocal(span):
+    """Q24 reciprocal of a segment length, rounded up (0 for empty segments)."""
+    return -(-RECIP_ONE // span) if span else 0
+
+
+def segment_fraction(recip, span, offset):
+    """Q24 progress through a segment, as segmentFraction() computes it."""
+    if offset >= span:
+        return RECIP_ONE
+    return offset * recip
+
+
+def fixed_step(delta, fraction):
+    """trunc(delta * fraction / 2**24), as fixedStep() computes it."""
+    magnitude = (abs(delta) * fraction) >> RECIP_SHIFT
+    return -magnitude if delta < 0 else magnitude
+
+
+def interpolate_fixed(a1, delta, recip, t1, t2, elapsed):
+    """Integer-only interpolation of one joint from precomputed segment data."""
+    offset = (elapsed - t1) & ULONG_MASK
+    span = (t2 - t1) & ULONG_MASK
+    return a1 + fixed_step(delta, segment_fraction(recip, span, offset))
+
+
+def keyframe_lists(keyframes, joints):
+    """(times, angle columns) of keyframe dicts, for sample_columns()."""
+    return ([kf['time_ms'] for kf in keyframes],
+            [[kf[joint] for kf in keyframes] for joint in joints])
+
+
+def sample_columns(times, columns, elapsed):
+    """sample_pose() for keyframes stored column-wise.
+
+    `times` and each angle column are sequences indexed by keyframe (lists
+    or config_model array columns), so a caller sampling many times pays
+    for the dict lookups once.
+    """
+    if len(times) < 2:
+        return tuple(column[0] for column in columns) if len(times) else (0,) * len(columns)
+    kf1, kf2 = find_segment(times, elapsed)
+    t1, t2 = times[kf1], times[kf2]
+    return tuple(
+        interpolate_float(column[kf1], column[kf2], t1, t2, elapsed)
+        for column in columns
+    )
+
+
+def sample_pose(keyframes, elapsed, joints):
+    """Joint angles updateAnimation() writes at animation time `elapsed`.
+
+    `keyframes` is a list of dicts with time_ms and the joint keys. A
+    single-keyframe animation holds its only pose (the firmware would
+    read past the end of the array there).
+    """
+    return sample_columns(*keyframe_lists(keyframes, joints), elapsed)
+
+
+def scale_elapsed(real_elapsed, time_scale):
+    """Animation time after real_elapsed ms at a Q16 speed, as scaleElapsed() computes it."""
+    if time_scale == TIME_SCALE_ONE:
+        return real_elapsed
+    return ((real_elapsed * time_scale) & ULONG_MASK) >> TIME_SCALE_SHIFT
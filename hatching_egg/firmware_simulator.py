@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Discrete-event simulator of the hatching_egg.ino state machine.
+
+Models loop() as passes every loop_period_ms (millis() resolution by
+default):
+
+- Each pass reads TRIGGER_PIN, and a HIGH -> LOW edge restarts the
+  triggered sequence at step 0. This happens before updateAnimation(),
+  so a press wins over an animation finishing on the same pass.
+- updateAnimation() notices completion on the first later pass with
+  millis() - start >= playbackDuration. In idle mode it then alternates
+  resting <-> slow_struggle. In triggered mode it advances through
+  TRIGGERED_SEQUENCE, using the generator's pre-scaled durations, and
+  returns to resting after the last step.
+
+Instead of ticking, the simulator jumps from event to event, and whole
+idle cycles between presses are skipped arithmetically, so years of
+operation simulate in milliseconds. millis() wraps after ~49.7 days, but
+the firmware only uses unsigned differences, so unbounded Python ints
+give the same behavior.
+"""
+
+import argparse
+import math
+import sys
+from collections import Counter
+from pathlib import Path
+
+from config_model import load_config
+from generate_arduino_config import compile_triggered_sequence
+
+IDLE_ANIMATIONS = ('resting', 'slow_struggle')  # ANIM_RESTING, ANIM_SLOW_STRUGGLE
+DEFAULT_LOOP_PERIOD_MS = 1
+DEFAULT_PRESS_MS = 200
+MODE_IDLE = 'idle'
+MODE_TRIGGERED = 'triggered'
+
+
+def next_pass(time_ms, loop_period_ms):
+    """First loop pass at or after time_ms (passes run at multiples of the period)."""
+    return -(-time_ms // loop_period_ms) * loop_period_ms
+
+
+def observed_length(duration_ms, loop_period_ms, same_pass=False):
+    """Time from startAnimation() to the pass that sees it complete.
+
+    Animations started by setup() or a trigger are checked by
+    updateAnimation() on the same pass; ones started by
+    handleAnimationComplete() only on later passes, so there even a 0 ms
+    animation lasts one period.
+    """
+    length = next_pass(duration_ms, loop_period_ms)
+    return length if same_pass else max(loop_period_ms, length)
+
+
+def trigger_edges(presses, loop_period_ms=DEFAULT_LOOP_PERIOD_MS, start_ms=0):
+    """Passes at which loop() sees a HIGH -> LOW trigger edge.
+
+    presses are (press_ms, release_ms) intervals with the pin LOW, sorted
+    and non-overlapping. Returns (edge times, missed, merged): missed
+    presses had no pass while held, and merged presses followed the
+    previous one with no pass seeing the pin HIGH in between.
+    """
+    edges, missed, merged = [], 0, 0
+    first_pass = next_pass(start_ms, loop_period_ms)
+    previous = None  # (press, release) of the last interval
+    for press, release in presses:
+        if release <= press or (previous and press < previous[1]):
+            raise ValueError(f"trigger presses must be sorted, non-overlapping intervals: "
+                             f"({press}, {release})")
+        detected = max(next_pass(press, loop_period_ms), first_pass)
+        if detected >= release:
+            missed += 1
+        elif (detected - loop_period_ms >= first_pass and previous
+              and previous[0] <= detected - loop_period_ms < previous[1]):
+            merged += 1  # the previous pass already read LOW
+        else:
+            edges.append(detected)
+        previous = (press, release)
+    return edges, missed, merged
+
+
+def periodic_presses(interval_ms, until_ms, hold_ms=DEFAULT_PRESS_MS, first_ms=None):
+    """A guest pressing every interval_ms for hold_ms, up to until_ms."""
+    first_ms = interval_ms if first_ms is None else first_ms
+    return [(t, t + hold_ms) for t in range(first_ms, until_ms, interval_ms)]
+
+
+def simulate(config, presses=(), until_ms=3_600_000, loop_period_ms=DEFAULT_LOOP_PERIOD_MS,
+             start_ms=0, record=False):
+    """Run the state machine from setup() at start_ms until until_ms.
+
+    Returns a dict of counters ('plays' per animation, 'triggers',
+    'missed_presses', 'merged_presses', 'sequences_completed',
+    'sequences_interrupted', 'idle_cycles'), the final 'state' and, with
+    record=True, every event as (time_ms, kind, detail). Recording logs
+    each idle animation instead of skipping whole cycles.
+    """
+    animations = config.animations
+    steps = compile_triggered_sequence(config.triggered_sequence, animations)
+    idle_lengths = [observed_length(animations[anim_id].duration_ms, loop_period_ms)
+                    for anim_id in IDLE_ANIMATIONS]
+    cycle_ms = sum(idle_lengths)
+    edges, missed, merged = trigger_edges(presses, loop_period_ms, start_ms)
+
+    result = {
+        'plays': Counter(), 'triggers': 0, 'missed_presses': missed, 'merged_presses': merged,
+        'sequences_completed': 0, 'sequences_interrupted': 0, 'idle_cycles': 0,
+        'events': [] if record else None,
+    }
+
+    def start(now, mode, index, same_pass=False):
+        if mode == MODE_IDLE:
+            anim_id = IDLE_ANIMATIONS[index]
+            duration_ms = animations[anim_id].duration_ms
+        else:
+            anim_id, duration_ms = steps[index]['animation'], steps[index]['duration_ms']
+        result['plays'][anim_id] += 1
+        if record:
+            result['events'].append((now, 'start', (anim_id, mode, index)))
+        return now, now + observed_length(duration_ms, loop_period_ms, same_pass)
+
+    mode, index = MODE_IDLE, 0
+    started, deadline = start(next_pass(start_ms, loop_period_ms), mode, index, same_pass=True)
+    edge = 0
+    while True:
+        next_edge = edges[edge] if edge < len(edges) else math.inf
+        if not record and mode == MODE_IDLE and index == 0 and cycle_ms:
+            # Skip whole resting + slow_struggle cycles that end before the next edge
+            cycles = (min(next_edge, until_ms) - deadline) // cycle_ms
+            if cycles > 0:
+                started += cycles * cycle_ms
+                deadline += cycles * cycle_ms
+                result['idle_cycles'] += cycles
+                result['plays'][IDLE_ANIMATIONS[0]] += cycles
+                result['plays'][IDLE_ANIMATIONS[1]] += cycles
+
+        if next_edge <= deadline:
+            if next_edge >= until_ms:
+                break
+            now, edge = next_edge, edge + 1
+            result['triggers'] += 1
+            if mode == MODE_TRIGGERED:
+                result['sequences_interrupted'] += 1
+            if record:
+                result['events'].append((now, 'trigger', None))
+            mode, index = MODE_TRIGGERED, 0
+            started, deadline = start(now, mode, index, same_pass=True)
+            continue
+
+        if deadline >= until_ms:
+            break
+        now = deadline
+        if record:
+            result['events'].append((now, 'complete', None))
+        if mode == MODE_IDLE:
+            if index == 1:
+                result['idle_cycles'] += 1
+            index = 1 - index
+        elif index + 1 < len(steps):
+            index += 1
+        else:
+            result['sequences_completed'] += 1
+            mode, index = MODE_IDLE, 0
+        started, deadline = start(now, mode, index)
+
+    anim_id = IDLE_ANIMATIONS[index] if mode == MODE_IDLE else steps[index]['animation']
+    result['state'] = {'mode': mode, 'step': index, 'animation': anim_id, 'started_ms': started}
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--hours', type=float, default=1000,
+                        help='simulated operating time (default 1000)')
+    parser.add_argument('--trigger-every', type=float, default=300, metavar='SECONDS',
+                        help='seconds between guest presses (default 300, 0 = never)')
+    parser.add_argument('--hold', type=int, default=DEFAULT_PRESS_MS, metavar='MS',
+                        help=f'how long each press holds the pin LOW (default {DEFAULT_PRESS_MS})')
+    parser.add_argument('--loop-ms', type=int, default=DEFAULT_LOOP_PERIOD_MS,
+                        help='time per loop() pass (default 1)')
+    args = parser.parse_args()
+
+    until_ms = int(args.hours * 3_600_000)
+    interval_ms = int(args.trigger_every * 1000)
+    presses = periodic_presses(interval_ms, until_ms, args.hold) if interval_ms else []
+
+    try:
+        config = load_config(Path(__file__).parent / 'animation-config.json')
+        result = simulate(config, presses, until_ms, args.loop_ms)
+    except (ValueError, OSError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    print(f"✓ Simulated {args.hours:g} h ({until_ms} ms), loop pass every {args.loop_ms} ms")
+    print(f"  - presses: {len(presses)}, triggers seen: {result['triggers']}, "
+          f"missed: {result['missed_presses']}, merged: {result['merged_presses']}")
+    print(f"  - sequences: {result['sequences_completed']} completed, "
+          f"{result['sequences_interrupted']} restarted by a new trigger")
+    print(f"  - idle cycles: {result['idle_cycles']}")
+    for anim_id, count in sorted(result['plays'].items()):
+        print(f"    {anim_id:<20} {count:>9} plays")
+    state = result['state']
+    print(f"  - final state: {state['mode']} step {state['step']} ({state['animation']}, "
+          f"started at {state['started_ms']} ms)")
@@ -2,12 +2,129 @@
 """
 Generate Arduino configuration header from animation-config.json
 This ensures Arduino code uses the exact same parameters as the JavaScript preview.
+
+Renderers take the typed config_model sections (HardwareConfig,
+KinematicsConfig, {anim_id: Animation}, TriggeredStep tuple); keyframe
+helpers take (time_ms, *angles) rows, which is what iterating Keyframes
+yields.
 """
 
-import json
+import argparse
+import hashlib
+import os
+import shutil
 import sys
+import tempfile
+import time
+from array import array
+from dataclasses import replace
+from fractions import Fraction
+from itertools import chain
+from operator import itemgetter
 from pathlib import Path
 
+try:
+    import numpy as np
+except ImportError:  # optional: keyframe rows fall back to per-row formatting
+    np = None
+
+from config_model import JOINTS, Keyframes, check_keyframe, load_config, parse_scanned_config
+from config_stream import iter_animation_keyframes, scan_config
+from firmware_reference import (
+    RECIP_SHIFT,
+    TIME_SCALE_ONE,
+    TIME_SCALE_SHIFT,
+    ULONG_MASK,
+    build_segment_index,
+    pulse_table,
+    sample_columns,
+    segment_reciprocal,
+)
+
+# sizeof() for the C types we emit, as laid out by avr-gcc (no padding on AVR)
+AVR_TYPE_SIZES = {
+    'unsigned long': 4,
+    'uint16_t': 2,
+    'uint8_t': 1,
+    'uint32_t': 4,
+    'int8_t': 1,
+    'int': 2,
+    'bool': 1,
+    'char': 1,
+    'pointer': 2,  # any T* (16-bit address space)
+}
+
+# Keyframe field layouts: (C type, field name)
+KEYFRAME_FIELDS = [('unsigned long', 'time_ms')] + [('int', joint) for joint in JOINTS]
+PACKED_KEYFRAME_FIELDS = [('uint16_t', 'time_ms')] + [('uint8_t', joint) for joint in JOINTS]
+ANIMATION_FIELDS = [
+    ('const char*', 'name'),
+    ('unsigned long', 'duration_ms'),
+    ('bool', 'loop'),
+    ('int', 'keyframe_count'),
+    ('const Keyframe*', 'keyframes'),
+]
+TRIGGERED_STEP_FIELDS = [
+    ('uint8_t', 'animation'),
+    ('uint16_t', 'speed_percent'),
+    ('uint32_t', 'duration_ms'),
+    ('uint32_t', 'time_scale'),
+]
+
+# (define prefix, hardware leg key, joint) for each servo
+SERVOS = [
+    ('LEFT_SHOULDER', 'left_leg', 'shoulder'),
+    ('LEFT_ELBOW', 'left_leg', 'elbow'),
+    ('RIGHT_SHOULDER', 'right_leg', 'shoulder'),
+    ('RIGHT_ELBOW', 'right_leg', 'elbow'),
+]
+
+# PCA9685 channel registers: LED0_ON_L at 0x06, then ON_L/ON_H/OFF_L/OFF_H per
+# channel. Adafruit's setPWMFreq() enables register auto-increment, so one
+# I2C write can set consecutive channels. Each write also carries the
+# address and start register bytes; Wire's 32-byte buffer holds the
+# register byte and at most 7 channels.
+PCA9685_CHANNELS = 16
+PCA9685_LED0_ON_L = 0x06
+PCA9685_LED_STRIDE = 4
+PCA9685_WRITE_OVERHEAD = 2  # address + register byte
+SETPWM_BYTES = PCA9685_WRITE_OVERHEAD + PCA9685_LED_STRIDE
+WIRE_BUFFER_BYTES = 32
+BURST_MAX_CHANNELS = (WIRE_BUFFER_BYTES - 1) // PCA9685_LED_STRIDE
+
+PWM_TABLE_SIZE = 91  # 0-90° inclusive
+PWM_TABLE_ROW = 10
+
+# Fixed-point Segment layout: Q24 reciprocal of the segment length + per-joint deltas
+SEGMENT_FIELDS = [('uint32_t', 'recip')] + [
+    ('int8_t', joint.replace('_deg', '_delta')) for joint in JOINTS
+]
+SEGMENT_SPAN_MAX = 0xFFFF
+SEGMENT_DELTA_RANGE = (-128, 127)
+
+RASTER_FRAME_BYTES = len(JOINTS)  # one uint8_t per joint
+RASTER_ROW = 4  # frames per line
+
+PACKED_TIME_MAX = 0xFFFF
+PACKED_ANGLE_MAX = 0xFF
+
+STREAM_BATCH = 4096  # keyframe rows per write in stream_arduino_header()
+BULK_MIN_ROWS = 256  # below this the per-row path is as fast as NumPy setup
+KEYFRAME_VALUES = itemgetter('time_ms', *JOINTS)
+KEYFRAME_ARRAY_CLOSE = ["};", ""]
+
+# Sketches that include animation_config.h (relative to this directory)
+HEADER_TARGETS = [
+    Path('arduino') / 'hatching_egg' / 'animation_config.h',
+    Path('arduino') / 'animation_tester' / 'animation_config.h',
+]
+
+# Pooled keyframes: pose = pool offset << 1 | mirrored flag, a uint8_t while
+# the pool is small enough. Mirrored poses (left == right) store only the
+# left shoulder/elbow in the pool.
+POSE_REF_TYPES = [('uint8_t', 0xFF), ('uint16_t', 0xFFFF)]
+POSE_OFFSET_MAX = 0x7FFF
+
 def generate_header_lines(hw, kin):
     """Generate hardware and kinematics configuration lines."""
     lines = [
@@ -19,108 +136,1181 @@ def generate_header_lines(hw, kin):
         "#define ANIMATION_CONFIG_H",
         "",
         "// Hardware Configuration",
-        f"#define I2C_ADDRESS {hw['i2c_address']}",
-        f"#define SERVO_FREQ {hw['servo_frequency']}",
+        f"#define I2C_ADDRESS {hw.i2c_address}",
+        f"#define SERVO_FREQ {hw.servo_frequency}",
         "",
         "// Left Leg Servos",
-        f"#define LEFT_SHOULDER_CHANNEL {hw['left_leg']['shoulder_channel']}",
-        f"#define LEFT_ELBOW_CHANNEL {hw['left_leg']['elbow_channel']}",
-        f"#define LEFT_SHOULDER_MIN_PULSE {hw['left_leg']['shoulder_min_pulse']}",
-        f"#define LEFT_SHOULDER_MAX_PULSE {hw['left_leg']['shoulder_max_pulse']}",
-        f"#define LEFT_ELBOW_MIN_PULSE {hw['left_leg']['elbow_min_pulse']}",
-        f"#define LEFT_ELBOW_MAX_PULSE {hw['left_leg']['elbow_max_pulse']}",
+        f"#define LEFT_SHOULDER_CHANNEL {hw.left_leg.shoulder.channel}",
+        f"#define LEFT_ELBOW_CHANNEL {hw.left_leg.elbow.channel}",
+        f"#define LEFT_SHOULDER_MIN_PULSE {hw.left_leg.shoulder.min_pulse}",
+        f"#define LEFT_SHOULDER_MAX_PULSE {hw.left_leg.shoulder.max_pulse}",
+        f"#define LEFT_ELBOW_MIN_PULSE {hw.left_leg.elbow.min_pulse}",
+        f"#define LEFT_ELBOW_MAX_PULSE {hw.left_leg.elbow.max_pulse}",
         "",
         "// Right Leg Servos",
-        f"#define RIGHT_SHOULDER_CHANNEL {hw['right_leg']['shoulder_channel']}",
-        f"#define RIGHT_ELBOW_CHANNEL {hw['right_leg']['elbow_channel']}",
-        f"#define RIGHT_SHOULDER_MIN_PULSE {hw['right_leg']['shoulder_min_pulse']}",
-        f"#define RIGHT_SHOULDER_MAX_PULSE {hw['right_leg']['shoulder_max_pulse']}",
-        f"#define RIGHT_ELBOW_MIN_PULSE {hw['right_leg']['elbow_min_pulse']}",
-        f"#define RIGHT_ELBOW_MAX_PULSE {hw['right_leg']['elbow_max_pulse']}",
+        f"#define RIGHT_SHOULDER_CHANNEL {hw.right_leg.shoulder.channel}",
+        f"#define RIGHT_ELBOW_CHANNEL {hw.right_leg.elbow.channel}",
+        f"#define RIGHT_SHOULDER_MIN_PULSE {hw.right_leg.shoulder.min_pulse}",
+        f"#define RIGHT_SHOULDER_MAX_PULSE {hw.right_leg.shoulder.max_pulse}",
+        f"#define RIGHT_ELBOW_MIN_PULSE {hw.right_leg.elbow.min_pulse}",
+        f"#define RIGHT_ELBOW_MAX_PULSE {hw.right_leg.elbow.max_pulse}",
         "",
-        f"#define TRIGGER_PIN {hw['trigger_pin']}",
+        f"#define TRIGGER_PIN {hw.trigger_pin}",
         "",
         "// Kinematics",
-        f"#define UPPER_SEGMENT_LENGTH {kin['upper_segment_length']}",
-        f"#define LOWER_SEGMENT_LENGTH {kin['lower_segment_length']}",
-        f"#define SHOULDER_MIN_ANGLE {kin['shoulder_min_angle']}",
-        f"#define SHOULDER_MAX_ANGLE {kin['shoulder_max_angle']}",
-        f"#define ELBOW_MIN_ANGLE {kin['elbow_min_angle']}",
-        f"#define ELBOW_MAX_ANGLE {kin['elbow_max_angle']}",
+        f"#define UPPER_SEGMENT_LENGTH {kin.upper_segment_length}",
+        f"#define LOWER_SEGMENT_LENGTH {kin.lower_segment_length}",
+        f"#define SHOULDER_MIN_ANGLE {kin.shoulder_min_angle}",
+        f"#define SHOULDER_MAX_ANGLE {kin.shoulder_max_angle}",
+        f"#define ELBOW_MIN_ANGLE {kin.elbow_min_angle}",
+        f"#define ELBOW_MAX_ANGLE {kin.elbow_max_angle}",
         "",
     ]
     return lines
 
-def generate_animation_structures():
-    """Generate animation structure definitions."""
-    return [
-        "// Animation Keyframe Structure",
-        "struct Keyframe {",
-        "  unsigned long time_ms;",
-        "  int left_shoulder_deg;",
-        "  int left_elbow_deg;",
-        "  int right_shoulder_deg;",
-        "  int right_elbow_deg;",
+def servo_pulse_tables(hw):
+    """Degree → PWM table for each servo, keyed by define prefix."""
+    return {
+        prefix: pulse_table(hw.servo(leg, joint).min_pulse, hw.servo(leg, joint).max_pulse)
+        for prefix, leg, joint in SERVOS
+    }
+
+def generate_pwm_tables(hw):
+    """Generate per-servo PROGMEM degree → PWM lookup tables.
+
+    Entries match setServo()'s constrain()+map() exactly, so the firmware
+    can index the table instead of doing a 32-bit multiply/divide.
+    """
+    lines = [
+        "// Servo PWM Lookup Tables (index = degrees, 0-90)",
+        f"#define PWM_TABLE_SIZE {PWM_TABLE_SIZE}",
+    ]
+    for prefix, table in servo_pulse_tables(hw).items():
+        lines.append(f"const uint16_t {prefix}_PWM[PWM_TABLE_SIZE] PROGMEM = {{")
+        for start in range(0, len(table), PWM_TABLE_ROW):
+            row = table[start:start + PWM_TABLE_ROW]
+            lines.append("  " + ", ".join(str(pulse) for pulse in row) + ",")
+        lines.append("};")
+    lines.append("")
+    return lines
+
+def servo_channels(hw):
+    """PCA9685 channel of each servo, keyed by define prefix.
+
+    Raises ValueError for a channel outside 0-15 or shared by two servos.
+    """
+    channels = {}
+    for prefix, leg, joint in SERVOS:
+        channel = hw.servo(leg, joint).channel
+        if not isinstance(channel, int) or not 0 <= channel < PCA9685_CHANNELS:
+            raise ValueError(f"{prefix} channel must be 0-{PCA9685_CHANNELS - 1}, got {channel}")
+        for other, used in channels.items():
+            if used == channel:
+                raise ValueError(f"{prefix} and {other} both use channel {channel}")
+        channels[prefix] = channel
+    return channels
+
+def servo_channel_groups(hw, max_channels=BURST_MAX_CHANNELS):
+    """Servos on consecutive channels, as lists of prefixes in channel order.
+
+    Each group can be written in one auto-increment burst starting at its
+    first channel's LEDn_ON_L register.
+    """
+    channels = servo_channels(hw)
+    groups = []
+    for prefix in sorted(channels, key=channels.get):
+        group = groups[-1] if groups else None
+        if (group and len(group) < max_channels
+                and channels[prefix] == channels[group[-1]] + 1):
+            group.append(prefix)
+        else:
+            groups.append([prefix])
+    return groups
+
+def channel_register(channel):
+    """LEDn_ON_L register address of a PCA9685 channel."""
+    return PCA9685_LED0_ON_L + PCA9685_LED_STRIDE * channel
+
+def burst_write_bytes(groups):
+    """(separate, burst) I2C bytes for a frame that updates every servo.
+
+    separate is one setPWM() per servo; burst is one write per group.
+    """
+    separate = sum(len(group) for group in groups) * SETPWM_BYTES
+    burst = sum(PCA9685_WRITE_OVERHEAD + PCA9685_LED_STRIDE * len(group) for group in groups)
+    return separate, burst
+
+def generate_channel_groups(hw):
+    """Generate PCA9685 burst-write group and register defines.
+
+    Group N starts at SERVO_GROUP_N_REGISTER and covers SERVO_GROUP_N_SIZE
+    channels; each servo's <PREFIX>_GROUP / _GROUP_SLOT locate its 4 bytes
+    in that burst. Defines only, so no flash is used.
+    """
+    channels = servo_channels(hw)
+    groups = servo_channel_groups(hw)
+    separate, burst = burst_write_bytes(groups)
+    lines = [
+        "// PCA9685 burst groups (consecutive channels, register auto-increment)",
+        f"// All servos changing: {len(channels)} setPWM writes = {separate} bytes, "
+        f"{len(groups)} bursts = {burst} bytes",
+        f"#define PCA9685_LED0_ON_L 0x{PCA9685_LED0_ON_L:02X}",
+        f"#define PCA9685_LED_STRIDE {PCA9685_LED_STRIDE}",
+        f"#define SERVO_GROUP_COUNT {len(groups)}",
+    ]
+    for i, group in enumerate(groups):
+        first = channels[group[0]]
+        lines.extend([
+            f"#define SERVO_GROUP_{i}_CHANNEL {first}  // {', '.join(group)}",
+            f"#define SERVO_GROUP_{i}_REGISTER 0x{channel_register(first):02X}",
+            f"#define SERVO_GROUP_{i}_SIZE {len(group)}",
+        ])
+    for i, group in enumerate(groups):
+        for slot, prefix in enumerate(group):
+            lines.append(f"#define {prefix}_GROUP {i}")
+            lines.append(f"#define {prefix}_GROUP_SLOT {slot}")
+    lines.append("")
+    return lines
+
+def format_channel_groups(hw):
+    """Report line: groups and the I2C bytes saved per full frame."""
+    channels = servo_channels(hw)
+    groups = servo_channel_groups(hw)
+    separate, burst = burst_write_bytes(groups)
+    spans = ", ".join(
+        f"CH{channels[group[0]]}" + (f"-{channels[group[-1]]}" if len(group) > 1 else "")
+        for group in groups)
+    saved = separate - burst
+    return (f"  - PCA9685 burst groups: {spans} -> {burst}B vs {separate}B per full frame "
+            f"({saved}B, {saved / separate:.0%} saved; {len(groups)} writes instead of "
+            f"{len(channels)})")
+
+def avr_sizeof(ctype):
+    """sizeof(ctype) on AVR; every pointer type is 2 bytes."""
+    return AVR_TYPE_SIZES['pointer'] if ctype.endswith('*') else AVR_TYPE_SIZES[ctype]
+
+def struct_size(fields):
+    """Size in bytes of a struct with the given (C type, name) fields on AVR."""
+    return sum(avr_sizeof(ctype) for ctype, _ in fields)
+
+def keyframe_fields(packed=False, pose_ref_type=None):
+    """(C type, name) fields of the emitted Keyframe struct.
+
+    With a pose_ref_type the joint angles are replaced by one reference
+    into the shared pose pool.
+    """
+    fields = PACKED_KEYFRAME_FIELDS if packed else KEYFRAME_FIELDS
+    if pose_ref_type:
+        return fields[:1] + [(pose_ref_type, 'pose')]
+    return fields
+
+def keyframe_size(packed=False, pose_ref_type=None):
+    """Size in bytes of one emitted Keyframe on AVR (pool bytes not included)."""
+    return struct_size(keyframe_fields(packed, pose_ref_type))
+
+def generate_animation_structures(packed=False, pose_ref_type=None):
+    """Generate animation structure definitions.
+
+    The KEYFRAME_TIME/KEYFRAME_DEG accessors let sketches read keyframes
+    from PROGMEM without knowing which encoding was generated.
+    """
+    fields = keyframe_fields(packed, pose_ref_type)
+    if packed:
+        time_read, deg_read = "pgm_read_word", "pgm_read_byte"
+    else:
+        time_read, deg_read = "pgm_read_dword", "pgm_read_word"
+
+    lines = ["// Animation Keyframe Structure", "struct Keyframe {"]
+    lines.extend(f"  {ctype} {name};" for ctype, name in fields)
+    lines.extend([
         "};",
         "",
-        "struct Animation {",
-        "  const char* name;",
-        "  unsigned long duration_ms;",
-        "  bool loop;",
-        "  int keyframe_count;",
-        "  const Keyframe* keyframes;",
+        "// Keyframe Accessors (PROGMEM)",
+        f"#define KEYFRAME_TIME(kf) ((unsigned long){time_read}(&(kf).time_ms))",
+    ])
+    if pose_ref_type:
+        # poseDeg() is emitted after POSE_POOL in the animation data
+        ref_read = "pgm_read_byte" if pose_ref_type == 'uint8_t' else "pgm_read_word"
+        lines.extend(f"#define POSE_JOINT_{joint} {i}" for i, joint in enumerate(JOINTS))
+        lines.append("#define KEYFRAME_DEG(kf, joint) "
+                     f"((int)poseDeg({ref_read}(&(kf).pose), POSE_JOINT_##joint))")
+    else:
+        lines.append(f"#define KEYFRAME_DEG(kf, joint) ((int){deg_read}(&(kf).joint))")
+    lines.extend(["", "struct Animation {"])
+    lines.extend(f"  {ctype} {name};" for ctype, name in ANIMATION_FIELDS)
+    lines.extend(["};", ""])
+    return lines
+
+def validate_packed_keyframe(anim_id, i, row):
+    """Raise ValueError if keyframe row i of anim_id does not fit the packed encoding."""
+    if not 0 <= row[0] <= PACKED_TIME_MAX:
+        raise ValueError(
+            f"{anim_id} keyframe {i}: time_ms {row[0]} does not fit "
+            f"in uint16_t (max {PACKED_TIME_MAX}) for --packed"
+        )
+    for joint, deg in zip(JOINTS, row[1:]):
+        if not 0 <= deg <= PACKED_ANGLE_MAX:
+            raise ValueError(
+                f"{anim_id} keyframe {i}: {joint} {deg} does not fit "
+                f"in uint8_t (0-{PACKED_ANGLE_MAX}) for --packed"
+            )
+
+def validate_packed_rows(anim_id, keyframes, columns=None, start=0):
+    """Raise ValueError if any of these keyframe rows does not fit the packed encoding.
+
+    With columns (see keyframe_columns()) the common all-valid case is one
+    vectorized range check; otherwise, or on failure, keyframes are checked
+    one by one so the error names the first offending keyframe (numbered
+    from start).
+    """
+    if columns is not None and packed_columns_fit(columns):
+        return
+    for i, row in enumerate(keyframes, start):
+        validate_packed_keyframe(anim_id, i, row)
+
+def validate_packed_keyframes(animations, columns=None):
+    """Raise ValueError if any keyframe does not fit the packed encoding."""
+    for anim_id, anim in animations.items():
+        anim_columns = columns.get(anim_id) if columns else animation_columns(anim)
+        validate_packed_rows(anim_id, anim.keyframes, anim_columns)
+
+def keyframe_columns(keyframes):
+    """Keyframe rows as an (n, 5) int64 NumPy array: time_ms then JOINTS.
+
+    Values go through array('q'), which rejects floats and values outside
+    int64; those rows return None and use the per-row path, whose
+    formatting the output must match.
+    """
+    try:
+        flat = array('q', list(chain.from_iterable(keyframes)))
+    except (TypeError, OverflowError):
+        return None
+    return np.frombuffer(flat, dtype=np.int64).reshape(-1, len(KEYFRAME_FIELDS))
+
+def model_columns(keyframes):
+    """keyframe_columns() of config_model Keyframes, read straight from its arrays."""
+    return np.column_stack([np.frombuffer(keyframes.time_ms, dtype=np.int64)]
+                           + [np.frombuffer(column, dtype=np.int16) for column in keyframes.angles]
+                           ).astype(np.int64, copy=False)
+
+def animation_columns(anim):
+    """model_columns() for an animation, or None without NumPy."""
+    return model_columns(anim.keyframes) if np is not None else None
+
+def packed_columns_fit(columns):
+    """True if every time and angle in the columns fits the packed encoding."""
+    if not len(columns):
+        return True
+    low, high = columns.min(axis=0), columns.max(axis=0)
+    return (low[0] >= 0 and high[0] <= PACKED_TIME_MAX
+            and low[1:].min() >= 0 and high[1:].max() <= PACKED_ANGLE_MAX)
+
+def keyframe_pose(row):
+    """Joint angles of a keyframe row as a tuple in JOINTS order."""
+    return tuple(row[1:])
+
+def is_mirrored(pose):
+    """True if the right leg repeats the left leg's angles."""
+    return pose[:2] == pose[2:]
+
+def build_pose_pool(animations):
+    """Intern every distinct keyframe pose into one shared byte pool.
+
+    Returns (pool, refs, owners): pool is the list of uint8_t angles, refs
+    maps each pose tuple to its encoded reference (offset << 1 | mirrored)
+    and owners maps each pose to the animation that first used it.
+    Mirrored poses store two angles instead of four.
+    """
+    pool, refs, owners = [], {}, {}
+    for anim_id, anim in animations.items():
+        for i, row in enumerate(anim.keyframes):
+            pose = keyframe_pose(row)
+            if pose in refs:
+                continue
+            for joint, deg in zip(JOINTS, pose):
+                if not 0 <= deg <= PACKED_ANGLE_MAX:
+                    raise ValueError(
+                        f"{anim_id} keyframe {i}: {joint} {deg} does not fit "
+                        f"in uint8_t (0-{PACKED_ANGLE_MAX}) for --pooled"
+                    )
+            if len(pool) > POSE_OFFSET_MAX:
+                raise ValueError(f"pose pool exceeds {POSE_OFFSET_MAX + 1} bytes for --pooled")
+            mirrored = is_mirrored(pose)
+            refs[pose] = (len(pool) << 1) | int(mirrored)
+            owners[pose] = anim_id
+            pool.extend(pose[:2] if mirrored else pose)
+    return pool, refs, owners
+
+def pose_ref_type(refs):
+    """Smallest C type that holds every encoded pose reference."""
+    largest = max(refs.values(), default=0)
+    return next(ctype for ctype, limit in POSE_REF_TYPES if largest <= limit)
+
+def generate_pose_pool(pool):
+    """Generate POSE_POOL and its poseDeg() reader."""
+    lines = [
+        "// Shared Pose Pool (mirrored poses store left shoulder/elbow only)",
+        "const uint8_t POSE_POOL[] PROGMEM = {",
+    ]
+    for i in range(0, len(pool), 16):
+        lines.append("  " + ", ".join(str(deg) for deg in pool[i:i + 16]) + ",")
+    lines.extend([
         "};",
         "",
-    ]
+        "inline uint8_t poseDeg(uint16_t pose, uint8_t joint) {",
+        "  if (pose & 1) joint &= 1;  // mirrored: right joints read the left values",
+        "  return pgm_read_byte(&POSE_POOL[(pose >> 1) + joint]);",
+        "}",
+        "",
+    ])
+    return lines
 
-def generate_animation_data(animations):
-    """Generate animation names, keyframes, and array."""
-    lines = []
+def generate_animation_data(animations, packed=False, pooled=False, columns=None):
+    """Generate animation names, keyframes, and array.
 
-    # Generate animation name strings
-    for anim_id, anim in animations.items():
-        lines.append(f"const char {anim_id.upper()}_NAME[] PROGMEM = \"{anim['name']}\";")
-    lines.append("")
+    columns optionally maps anim_id to keyframe_columns() already at hand;
+    by default they are read from each animation's Keyframes arrays (see
+    model_columns()). They are used for packed validation and bulk row
+    formatting.
+    """
+    if columns is None:
+        columns = {anim_id: animation_columns(anim) for anim_id, anim in animations.items()}
+    if packed:
+        validate_packed_keyframes(animations, columns)
+
+    lines = generate_animation_names(animations)
+
+    refs = None
+    if pooled:
+        pool, refs, _ = build_pose_pool(animations)
+        lines.extend(generate_pose_pool(pool))
 
     # Generate keyframes for each animation
     for anim_id, anim in animations.items():
-        lines.append(f"// {anim['name']}")
-        lines.append(f"const Keyframe {anim_id.upper()}_KEYFRAMES[] PROGMEM = {{")
-        for kf in anim['keyframes']:
-            lines.append(
-                f"  {{{kf['time_ms']}, {kf['left_shoulder_deg']}, {kf['left_elbow_deg']}, "
-                f"{kf['right_shoulder_deg']}, {kf['right_elbow_deg']}}},"
-            )
-        lines.append("};")
-        lines.append("")
+        lines.extend(keyframe_array_open(anim_id, anim))
+        if refs is not None:
+            lines.extend(keyframe_row(row, refs) for row in anim.keyframes)
+        else:
+            lines.extend(keyframe_rows(anim.keyframes, columns.get(anim_id)))
+        lines.extend(KEYFRAME_ARRAY_CLOSE)
+
+    lines.extend(generate_animation_table(
+        animations, {anim_id: len(anim.keyframes) for anim_id, anim in animations.items()}))
+    return lines
+
+def generate_animation_names(animations):
+    """Generate the PROGMEM animation name strings."""
+    lines = [f"const char {anim_id.upper()}_NAME[] PROGMEM = \"{anim.name}\";"
+             for anim_id, anim in animations.items()]
+    lines.append("")
+    return lines
 
-    # Animation array
-    lines.extend(["// Animation Definitions", "const Animation ANIMATIONS[] PROGMEM = {"])
+def keyframe_array_open(anim_id, anim):
+    """Opening lines of one animation's keyframe array."""
+    return [f"// {anim.name}", f"const Keyframe {anim_id.upper()}_KEYFRAMES[] PROGMEM = {{"]
+
+def keyframe_row(row, pose_refs=None):
+    """Initializer row for one keyframe row (a pose reference when pooled)."""
+    if pose_refs is not None:
+        pose = keyframe_pose(row)
+        return f"  {{{row[0]}, {pose_refs[pose]}}},  // " + ", ".join(str(deg) for deg in pose)
+    time_ms, left_shoulder, left_elbow, right_shoulder, right_elbow = row
+    return (
+        f"  {{{time_ms}, {left_shoulder}, {left_elbow}, "
+        f"{right_shoulder}, {right_elbow}}},"
+    )
+
+def keyframe_rows(keyframes, columns=None):
+    """Initializer rows for Keyframes or a list of keyframe rows.
+
+    Large animations whose integer columns were already extracted (see
+    keyframe_columns()) are formatted in bulk; the output is identical to
+    keyframe_row().
+    """
+    if columns is not None and len(keyframes) >= BULK_MIN_ROWS:
+        return format_keyframe_columns(columns)
+    return [keyframe_row(row) for row in keyframes]
+
+def format_keyframe_columns(columns):
+    """keyframe_row() for every row of an (n, 5) column array, in bulk.
+
+    All rows are laid out in one fixed-width byte matrix (each field right
+    aligned to its widest value) with a mask of the bytes in use; gathering
+    the masked bytes yields the rows without per-keyframe Python code.
+    """
+    n, field_count = columns.shape
+    literals = ["  {"] + [", "] * (field_count - 1) + ["},\n"]
+    fields = []
+    for j in range(field_count):
+        column = columns[:, j]
+        magnitude = np.abs(column)
+        top = int(magnitude.max()) if n else 0
+        if top <= np.iinfo(np.int32).max:
+            magnitude = magnitude.astype(np.int32)
+        digits = len(str(top))
+        digit_count = np.ones(n, dtype=np.int8)
+        for place in range(1, digits):
+            digit_count += magnitude >= 10 ** place
+        negative = column < 0
+        fields.append((magnitude, digit_count, digits,
+                       negative if negative.any() else None))
+
+    width = sum(map(len, literals)) + sum(
+        digits + (negative is not None) for _, _, digits, negative in fields)
+    chars = np.empty((n, width), dtype=np.uint8)
+    used = np.ones((n, width), dtype=bool)
+
+    pos = 0
+    for literal, field in zip(literals, fields + [None]):
+        chars[:, pos:pos + len(literal)] = np.frombuffer(literal.encode('ascii'), np.uint8)
+        pos += len(literal)
+        if field is None:
+            break
+        magnitude, digit_count, digits, negative = field
+        field_width = digits + (negative is not None)
+        rest = magnitude
+        # place counts decimal positions from the right edge of the field
+        for place in range(field_width):
+            col = pos + field_width - 1 - place
+            if place < digits:
+                rest, digit = np.divmod(rest, 10)
+                chars[:, col] = digit + ord('0')
+            if place:
+                used[:, col] = digit_count > place
+            if negative is not None and place:
+                minus = negative & (digit_count == place)
+                chars[minus, col] = ord('-')
+                used[:, col] |= minus
+        pos += field_width
+
+    return chars[used].tobytes().decode('ascii').split("\n")[:-1]
+
+def generate_animation_table(animations, keyframe_counts):
+    """Generate the ANIMATIONS array."""
+    lines = ["// Animation Definitions", "const Animation ANIMATIONS[] PROGMEM = {"]
     for anim_id, anim in animations.items():
-        loop_str = "true" if anim['loop'] else "false"
-        kf_count = len(anim['keyframes'])
+        loop_str = "true" if anim.loop else "false"
         lines.append(
-            f"  {{{anim_id.upper()}_NAME, {anim['duration_ms']}, {loop_str}, "
-            f"{kf_count}, {anim_id.upper()}_KEYFRAMES}},"
+            f"  {{{anim_id.upper()}_NAME, {anim.duration_ms}, {loop_str}, "
+            f"{keyframe_counts[anim_id]}, {anim_id.upper()}_KEYFRAMES}},"
         )
     lines.append("};")
     lines.append("")
+    return lines
+
+def keyframe_deviation(keyframes, first, last, k):
+    """Largest joint error at keyframe row k if first..last were one straight segment.
+
+    Measured against exact linear interpolation. Keyframes sharing a time
+    with a neighbour (jumps) are never dropped.
+    """
+    t1, t2, t = keyframes[first][0], keyframes[last][0], keyframes[k][0]
+    if t in (keyframes[k - 1][0], keyframes[k + 1][0]):
+        return float('inf')
+    fraction = (t - t1) / (t2 - t1)
+    return max(
+        abs(a1 + (a2 - a1) * fraction - a)
+        for a1, a2, a in zip(keyframes[first][1:], keyframes[last][1:], keyframes[k][1:])
+    )
+
+def simplify_keyframes(keyframes, max_error_deg):
+    """Drop keyframe rows that linear interpolation reproduces within max_error_deg.
+
+    Ramer-Douglas-Peucker over all four joint tracks together: a segment
+    is split at the keyframe with the largest error on any joint until
+    every dropped keyframe is within tolerance. First and last keyframes
+    are always kept.
+    """
+    keyframes = list(keyframes)
+    if len(keyframes) < 3:
+        return keyframes
 
+    keep = {0, len(keyframes) - 1}
+    stack = [(0, len(keyframes) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        k = max(range(first + 1, last), key=lambda i: keyframe_deviation(keyframes, first, last, i))
+        if keyframe_deviation(keyframes, first, last, k) > max_error_deg:
+            keep.add(k)
+            stack.extend([(first, k), (k, last)])
+    return [kf for i, kf in enumerate(keyframes) if i in keep]
+
+def simplify_animations(animations, max_error_deg):
+    """Animations with every keyframe list simplified (the originals are unchanged)."""
+    return {
+        anim_id: replace(anim, keyframes=Keyframes.from_rows(
+            simplify_keyframes(anim.keyframes, max_error_deg)))
+        for anim_id, anim in animations.items()
+    }
+
+def simplification_report(animations, simplified):
+    """Per-animation keyframe reduction and the error the firmware will see.
+
+    The error compares sample_columns() of both versions at every ms the
+    firmware plays (0 to duration - 1), so it includes integer truncation. Returns a list of
+    (anim_id, keyframes_before, keyframes_after, max_error_deg).
+    """
+    report = []
+    for anim_id, anim in animations.items():
+        before, after = anim.keyframes, simplified[anim_id].keyframes
+        error = 0
+        if len(after) != len(before):
+            for elapsed in range(anim.duration_ms):
+                original = sample_columns(before.time_ms, before.angles, elapsed)
+                reduced = sample_columns(after.time_ms, after.angles, elapsed)
+                error = max(error, max(abs(a - b) for a, b in zip(original, reduced)))
+        report.append((anim_id, len(before), len(after), error))
+    return report
+
+def segment_indexes(animations, slot_shift):
+    """Per-animation segment start table (see build_segment_index)."""
+    indexes = {}
+    for anim_id, anim in animations.items():
+        times = anim.keyframes.time_ms
+        if any(later < earlier for earlier, later in zip(times, times[1:])):
+            raise ValueError(f"{anim_id}: keyframe times must be non-decreasing for --segment-index")
+        indexes[anim_id] = build_segment_index(times, anim.duration_ms, slot_shift)
+    return indexes
+
+def segment_slot_type(indexes):
+    """Smallest unsigned type that holds every segment start."""
+    largest = max((max(index) for index in indexes.values()), default=0)
+    return 'uint8_t' if largest <= 0xFF else 'uint16_t'
+
+def generate_segment_index(animations, slot_shift=None):
+    """Generate the per-animation segment time index.
+
+    Without an index, SEGMENT_START() is 0 and updateAnimation() scans
+    every keyframe. With one, slot (elapsed >> SEGMENT_SLOT_SHIFT) gives
+    the keyframe to start scanning from, so the scan is bounded by the
+    keyframes in one slot rather than the whole animation.
+    """
+    if slot_shift is None:
+        return [
+            "// Segment Search Start (no time index - scan from first keyframe)",
+            "#define SEGMENT_START(anim, elapsed) 0",
+            "",
+        ]
+
+    indexes = segment_indexes(animations, slot_shift)
+    slot_type = segment_slot_type(indexes)
+    slot_read = "pgm_read_byte" if slot_type == 'uint8_t' else "pgm_read_word"
+
+    lines = [
+        f"// Segment Time Index (slot = elapsed_ms >> SEGMENT_SLOT_SHIFT, {1 << slot_shift} ms)",
+        f"#define SEGMENT_SLOT_SHIFT {slot_shift}",
+        f"typedef {slot_type} SegmentSlot;",
+    ]
+    for anim_id, index in indexes.items():
+        lines.append(
+            f"const SegmentSlot {anim_id.upper()}_SEGMENT_INDEX[] PROGMEM = "
+            f"{{{', '.join(str(start) for start in index)}}};"
+        )
+    lines.append("const SegmentSlot* const SEGMENT_INDEXES[] PROGMEM = {")
+    lines.extend(f"  {anim_id.upper()}_SEGMENT_INDEX," for anim_id in indexes)
+    lines.append("};")
+    lines.append("const uint16_t SEGMENT_SLOT_COUNTS[] PROGMEM = {")
+    lines.extend(f"  {len(index)}," for index in indexes.values())
+    lines.extend([
+        "};",
+        "",
+        "inline int segmentStart(int anim, unsigned long elapsed) {",
+        "  const SegmentSlot* index = (const SegmentSlot*)pgm_read_ptr(&SEGMENT_INDEXES[anim]);",
+        "  unsigned long slot = elapsed >> SEGMENT_SLOT_SHIFT;",
+        "  unsigned int slotCount = pgm_read_word(&SEGMENT_SLOT_COUNTS[anim]);",
+        "  if (slot >= slotCount) slot = slotCount - 1;",
+        f"  return {slot_read}(&index[slot]);",
+        "}",
+        "#define SEGMENT_START(anim, elapsed) segmentStart(anim, elapsed)",
+        "",
+    ])
+    return lines
+
+def fixed_point_segments(animations):
+    """Per-animation list of (recip, deltas) for each keyframe segment.
+
+    Animations with fewer than two keyframes get one all-zero segment so
+    segment 0 always exists (the pose then simply holds).
+    """
+    low, high = SEGMENT_DELTA_RANGE
+    segments = {}
+    for anim_id, anim in animations.items():
+        keyframes = list(anim.keyframes)
+        rows = []
+        for i, (kf1, kf2) in enumerate(zip(keyframes, keyframes[1:])):
+            span = kf2[0] - kf1[0]
+            if not 0 <= span <= SEGMENT_SPAN_MAX:
+                raise ValueError(
+                    f"{anim_id} segment {i}: length {span} ms must be 0-{SEGMENT_SPAN_MAX} "
+                    f"for --fixed-point"
+                )
+            deltas = [a2 - a1 for a1, a2 in zip(kf1[1:], kf2[1:])]
+            for joint, delta in zip(JOINTS, deltas):
+                if not low <= delta <= high:
+                    raise ValueError(
+                        f"{anim_id} segment {i}: {joint} change {delta} does not fit "
+                        f"in int8_t for --fixed-point"
+                    )
+            rows.append((segment_reciprocal(span), deltas))
+        segments[anim_id] = rows or [(0, [0] * len(JOINTS))]
+    return segments
+
+def generate_fixed_point_segments(animations, fixed_point=False):
+    """Generate fixed-point segment tables for float-free interpolation.
+
+    For each segment the firmware computes fraction = offset * recip (Q24)
+    and angle = a1 + trunc(delta * fraction >> 24), which needs only 32-bit
+    integer multiplies and shifts.
+    """
+    if not fixed_point:
+        return []
+
+    lines = [
+        f"// Fixed-Point Segments (recip = ceil(2^{RECIP_SHIFT} / segment ms))",
+        f"#define SEGMENT_RECIP_SHIFT {RECIP_SHIFT}",
+        "struct Segment {",
+    ]
+    lines.extend(f"  {ctype} {name};" for ctype, name in SEGMENT_FIELDS)
+    lines.extend(["};", ""])
+
+    segments = fixed_point_segments(animations)
+    for anim_id, rows in segments.items():
+        lines.append(f"const Segment {anim_id.upper()}_SEGMENTS[] PROGMEM = {{")
+        for recip, deltas in rows:
+            lines.append(f"  {{{recip}UL, {', '.join(str(d) for d in deltas)}}},")
+        lines.append("};")
+    lines.append("const Segment* const SEGMENT_TABLES[] PROGMEM = {")
+    lines.extend(f"  {anim_id.upper()}_SEGMENTS," for anim_id in segments)
+    lines.extend([
+        "};",
+        "",
+        "#define SEGMENT_DELTA(seg, joint) ((int8_t)pgm_read_byte(&(seg).joint))",
+        "",
+        "inline unsigned long segmentFraction(const Segment& seg, unsigned long offset, unsigned long span) {",
+        "  if (offset >= span) return 1UL << SEGMENT_RECIP_SHIFT;",
+        "  return offset * pgm_read_dword(&seg.recip);",
+        "}",
+        "",
+        "inline int fixedStep(int delta, unsigned long fraction) {",
+        "  unsigned long magnitude = ((unsigned long)(delta < 0 ? -delta : delta) * fraction) >> SEGMENT_RECIP_SHIFT;",
+        "  return delta < 0 ? -(int)magnitude : (int)magnitude;",
+        "}",
+        "",
+    ])
+    return lines
+
+def raster_frames(anim, tick_ms):
+    """Sample an animation every tick_ms with the firmware's interpolation."""
+    frame_count = max(-(-anim.duration_ms // tick_ms), 1)
+    keyframes = anim.keyframes
+    frames = [sample_columns(keyframes.time_ms, keyframes.angles, k * tick_ms)
+              for k in range(frame_count)]
+    for k, pose in enumerate(frames):
+        if not all(0 <= angle <= PACKED_ANGLE_MAX for angle in pose):
+            raise ValueError(f"frame {k} angles {pose} do not fit in uint8_t for --raster")
+    return frames
+
+def choose_raster_animations(animations, tick_ms, budget_bytes=None):
+    """Decide raster vs keyframe playback per animation.
+
+    Rasterizing costs 4 bytes per tick on top of the keyframes. Animations
+    are rasterized cheapest first while the total stays within
+    budget_bytes (no limit when None), which maximizes how many play back
+    as plain table reads.
+
+    Returns {anim_id: raster_bytes or None if left as keyframes}.
+    """
+    costs = {
+        anim_id: max(-(-anim.duration_ms // tick_ms), 1) * RASTER_FRAME_BYTES
+        for anim_id, anim in animations.items()
+    }
+    chosen = {anim_id: None for anim_id in animations}
+    used = 0
+    for anim_id in sorted(costs, key=lambda a: costs[a]):
+        if budget_bytes is None or used + costs[anim_id] <= budget_bytes:
+            chosen[anim_id] = costs[anim_id]
+            used += costs[anim_id]
+    return chosen
+
+def generate_raster_tables(animations, tick_ms=None, budget_bytes=None):
+    """Generate pre-sampled frame tables for raster playback.
+
+    Each rasterized animation gets RASTER_TICK_MS-spaced frames of four
+    uint8_t angles; rasterFrame() returns the frame for an elapsed time or
+    NULL for animations left as keyframes.
+    """
+    if tick_ms is None:
+        return []
+
+    chosen = choose_raster_animations(animations, tick_ms, budget_bytes)
+    lines = [
+        f"// Raster Frames (pre-sampled every RASTER_TICK_MS, {RASTER_FRAME_BYTES} angles per frame)",
+        f"#define RASTER_TICK_MS {tick_ms}",
+    ]
+    for anim_id, anim in animations.items():
+        if chosen[anim_id] is None:
+            continue
+        try:
+            frames = raster_frames(anim, tick_ms)
+        except ValueError as e:
+            raise ValueError(f"{anim_id}: {e}") from None
+        lines.append(f"const uint8_t {anim_id.upper()}_FRAMES[] PROGMEM = {{")
+        for start in range(0, len(frames), RASTER_ROW):
+            row = frames[start:start + RASTER_ROW]
+            lines.append("  " + "  ".join(f"{', '.join(map(str, pose))}," for pose in row))
+        lines.append("};")
+    lines.append("const uint8_t* const RASTER_TABLES[] PROGMEM = {")
+    lines.extend(
+        f"  {anim_id.upper()}_FRAMES," if chosen[anim_id] is not None else "  NULL,"
+        for anim_id in animations
+    )
+    lines.append("};")
+    lines.append("const uint16_t RASTER_FRAME_COUNTS[] PROGMEM = {")
+    lines.extend(
+        f"  {(chosen[anim_id] or 0) // RASTER_FRAME_BYTES}," for anim_id in animations
+    )
+    lines.extend([
+        "};",
+        "",
+        "inline const uint8_t* rasterFrame(int anim, unsigned long elapsed) {",
+        "  const uint8_t* frames = (const uint8_t*)pgm_read_ptr(&RASTER_TABLES[anim]);",
+        "  if (frames == NULL) return NULL;",
+        "  unsigned long frame = elapsed / RASTER_TICK_MS;",
+        "  unsigned int frameCount = pgm_read_word(&RASTER_FRAME_COUNTS[anim]);",
+        "  if (frame >= frameCount) frame = frameCount - 1;",
+        f"  return &frames[frame * {RASTER_FRAME_BYTES}];",
+        "}",
+        "",
+    ])
+    return lines
+
+def raster_report(animations, tick_ms, budget_bytes=None):
+    """Per-animation flash cost of both encodings and the chosen one.
+
+    Returns a list of (anim_id, keyframe_bytes, raster_bytes, rasterized).
+    """
+    chosen = choose_raster_animations(animations, tick_ms, budget_bytes)
+    return [
+        (anim_id, len(anim.keyframes) * keyframe_size(),
+         max(-(-anim.duration_ms // tick_ms), 1) * RASTER_FRAME_BYTES,
+         chosen[anim_id] is not None)
+        for anim_id, anim in animations.items()
+    ]
+
+def segment_index_report(animations, slot_shift):
+    """Per-animation index size and worst-case scan length.
+
+    Returns a list of (anim_id, keyframe_count, index_bytes, max_scan_steps).
+    max_scan_steps is the most loop iterations any slot can need before
+    finding its segment (the linear scan needs up to keyframe_count - 1).
+    """
+    indexes = segment_indexes(animations, slot_shift)
+    entry_size = AVR_TYPE_SIZES[segment_slot_type(indexes)]
+    report = []
+    for anim_id, index in indexes.items():
+        times = animations[anim_id].keyframes.time_ms
+        max_scan = 0
+        for slot, start in enumerate(index):
+            slot_end = (slot + 1) << slot_shift
+            end = start
+            while end < len(times) - 2 and times[end + 1] < slot_end:
+                end += 1
+            max_scan = max(max_scan, end - start + 1)
+        report.append((anim_id, len(times), len(index) * entry_size, max_scan))
+    return report
+
+def keyframe_flash_report(animations):
+    """Per-animation keyframe flash usage (bytes) for both encodings.
+
+    Returns a list of (anim_id, keyframe_count, wide_bytes, packed_bytes).
+    """
+    wide, packed = keyframe_size(), keyframe_size(packed=True)
+    return [
+        (anim_id, len(anim.keyframes),
+         len(anim.keyframes) * wide, len(anim.keyframes) * packed)
+        for anim_id, anim in animations.items()
+    ]
+
+def pose_pool_report(animations, packed=False):
+    """Per-animation keyframe flash with and without the pose pool.
+
+    Pool bytes are charged to the first animation that uses each pose, so
+    the rows sum to the pooled total. Returns a list of (anim_id,
+    keyframe_count, before_bytes, after_bytes).
+    """
+    pool_bytes = {anim_id: 0 for anim_id in animations}
+    _, refs, owners = build_pose_pool(animations)
+    for pose, anim_id in owners.items():
+        pool_bytes[anim_id] += 2 if refs[pose] & 1 else len(JOINTS)
+    before, after = keyframe_size(packed), keyframe_size(packed, pose_ref_type(refs))
+    return [
+        (anim_id, len(anim.keyframes),
+         len(anim.keyframes) * before, len(anim.keyframes) * after + pool_bytes[anim_id])
+        for anim_id, anim in animations.items()
+    ]
+
+def format_flash_report(report):
+    """Format keyframe_flash_report() output as printable lines."""
+    lines = [f"  {'animation':<20} {'keyframes':>9} {'before':>8} {'after':>8}"]
+    for anim_id, count, wide, packed in report:
+        lines.append(f"  {anim_id:<20} {count:>9} {wide:>7}B {packed:>7}B")
+    total_wide = sum(row[2] for row in report)
+    total_packed = sum(row[3] for row in report)
+    lines.append(
+        f"  {'total':<20} {sum(row[1] for row in report):>9} "
+        f"{total_wide:>7}B {total_packed:>7}B  (saves {total_wide - total_packed}B)"
+    )
+    return lines
+
+def flash_usage(animations, sequence=None, packed=False, pooled=False, segment_slot_shift=None,
+                fixed_point=False, raster_tick_ms=None, raster_budget=None, keyframe_counts=None):
+    """Flash bytes of every PROGMEM table the header will contain.
+
+    Sizes come from the same data and struct layouts the generators emit
+    (AVR types, no padding), so this runs without rendering anything.
+    keyframe_counts ({anim_id: count}) stands in for the keyframes of
+    streamed animations. Returns a list of (anim_id, table, bytes);
+    anim_id is None for tables shared by all animations. Pool bytes are
+    charged to the first animation using each pose, as in
+    pose_pool_report().
+    """
+    pointer = AVR_TYPE_SIZES['pointer']
+    count = len(animations)
+    if keyframe_counts is None:
+        keyframe_counts = {anim_id: len(anim.keyframes) for anim_id, anim in animations.items()}
+    usage = [(None, 'PWM tables', len(SERVOS) * PWM_TABLE_SIZE * AVR_TYPE_SIZES['uint16_t'])]
+
+    ref_type, pool_bytes = None, {}
+    if pooled:
+        _, refs, owners = build_pose_pool(animations)
+        ref_type = pose_ref_type(refs)
+        for pose, anim_id in owners.items():
+            pool_bytes[anim_id] = pool_bytes.get(anim_id, 0) + (2 if refs[pose] & 1 else len(JOINTS))
+    indexes = segment_indexes(animations, segment_slot_shift) if segment_slot_shift is not None else {}
+    slot_size = AVR_TYPE_SIZES[segment_slot_type(indexes)] if indexes else 0
+    segments = fixed_point_segments(animations) if fixed_point else {}
+    rasters = (choose_raster_animations(animations, raster_tick_ms, raster_budget)
+               if raster_tick_ms is not None else {})
+
+    for anim_id, anim in animations.items():
+        usage.append((anim_id, 'name', len(anim.name.encode('utf-8')) + 1))
+        usage.append((anim_id, 'keyframes',
+                      keyframe_counts[anim_id] * keyframe_size(packed, ref_type)))
+        if anim_id in pool_bytes:
+            usage.append((anim_id, 'pose pool', pool_bytes[anim_id]))
+        if anim_id in indexes:
+            usage.append((anim_id, 'segment index', len(indexes[anim_id]) * slot_size))
+        if anim_id in segments:
+            usage.append((anim_id, 'segments', len(segments[anim_id]) * struct_size(SEGMENT_FIELDS)))
+        if rasters.get(anim_id) is not None:
+            usage.append((anim_id, 'raster frames', rasters[anim_id]))
+
+    usage.append((None, 'ANIMATIONS', count * struct_size(ANIMATION_FIELDS)))
+    if indexes:
+        usage.append((None, 'SEGMENT_INDEXES', count * pointer))
+        usage.append((None, 'SEGMENT_SLOT_COUNTS', count * AVR_TYPE_SIZES['uint16_t']))
+    if segments:
+        usage.append((None, 'SEGMENT_TABLES', count * pointer))
+    if rasters:
+        usage.append((None, 'RASTER_TABLES', count * pointer))
+        usage.append((None, 'RASTER_FRAME_COUNTS', count * AVR_TYPE_SIZES['uint16_t']))
+    if sequence:
+        steps = compile_triggered_sequence(sequence, animations)
+        usage.append((None, 'TRIGGERED_SEQUENCE', len(steps) * struct_size(TRIGGERED_STEP_FIELDS)))
+    return usage
+
+def check_flash_budget(usage, budget_bytes):
+    """Raise ValueError if flash_usage() exceeds budget_bytes, naming the biggest tables."""
+    total = sum(size for _, _, size in usage)
+    if total <= budget_bytes:
+        return
+    largest = sorted(usage, key=lambda row: row[2], reverse=True)[:3]
+    names = ", ".join(f"{anim_id + ' ' if anim_id else ''}{table} {size}B"
+                      for anim_id, table, size in largest)
+    raise ValueError(
+        f"PROGMEM data is {total}B, {total - budget_bytes}B over the {budget_bytes}B "
+        f"flash budget (largest: {names})"
+    )
+
+def format_flash_usage(usage, budget_bytes=None):
+    """Format flash_usage() as a per-animation breakdown plus shared tables."""
+    total = sum(size for _, _, size in usage)
+    budget = f" of {budget_bytes}B budget" if budget_bytes is not None else ""
+    lines = [f"  - flash (PROGMEM data): {total}B{budget}"]
+    per_animation = {}
+    for anim_id, table, size in usage:
+        if anim_id is not None:
+            per_animation.setdefault(anim_id, []).append((table, size))
+    for anim_id, tables in per_animation.items():
+        parts = ", ".join(f"{table} {size}B" for table, size in tables)
+        lines.append(f"    {anim_id:<20} {sum(size for _, size in tables):>6}B  ({parts})")
+    shared = [(table, size) for anim_id, table, size in usage if anim_id is None]
+    lines.append(f"    {'shared':<20} {sum(size for _, size in shared):>6}B  ("
+                 + ", ".join(f"{table} {size}B" for table, size in shared) + ")")
+    return lines
+
+def print_flash_usage(usage, budget_bytes=None):
+    """Print the flash total, with the full breakdown when a budget is set."""
+    lines = format_flash_usage(usage, budget_bytes)
+    for line in lines if budget_bytes is not None else lines[:1]:
+        print(line)
+
+def parse_byte_count(text):
+    """Parse a byte count such as 28672, 28K or 28KB (K = 1024)."""
+    value = text.strip().upper().removesuffix('B')
+    scale = 1024 if value.endswith('K') else 1
+    try:
+        count = int(value.removesuffix('K')) * scale
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid byte count '{text}'") from None
+    if count <= 0:
+        raise argparse.ArgumentTypeError(f"byte count must be positive, got '{text}'")
+    return count
+
+def compile_triggered_sequence(sequence, animations):
+    """Pre-scale each triggered step to integer real-time values.
+
+    sequence is a tuple of config_model TriggeredStep. Returns a list of
+    dicts with animation index/id, speed, the real
+    duration in ms (floor(duration / speed), computed exactly from the
+    decimal speed) and the Q16 time scale the firmware multiplies elapsed
+    time by.
+    """
+    anim_ids = list(animations.keys())
+    steps = []
+    for i, step in enumerate(sequence):
+        anim_id = step.animation
+        if anim_id not in animations:
+            raise ValueError(f"triggered step {i}: unknown animation '{anim_id}'")
+        speed = Fraction(str(step.speed))
+        if speed <= 0:
+            raise ValueError(f"triggered step {i}: speed must be positive")
+        duration = animations[anim_id].duration_ms
+        real_duration = int(duration / speed)
+        time_scale = round(speed * TIME_SCALE_ONE)
+        if time_scale != TIME_SCALE_ONE and real_duration * time_scale > ULONG_MASK:
+            raise ValueError(
+                f"triggered step {i}: {anim_id} at {step.speed}x overflows "
+                f"32-bit elapsed scaling ({real_duration} ms)"
+            )
+        steps.append({
+            'index': anim_ids.index(anim_id),
+            'animation': anim_id,
+            'speed': step.speed,
+            'speed_percent': round(speed * 100),
+            'duration_ms': real_duration,
+            'time_scale': time_scale,
+        })
+    return steps
+
+def generate_triggered_sequence(sequence, animations):
+    """Generate the compiled triggered sequence table.
+
+    Durations are already divided by the step speed and the speed is a
+    Q16 integer, so the firmware's triggered path needs no float math.
+    """
+    if not sequence:
+        return []
+
+    steps = compile_triggered_sequence(sequence, animations)
+    lines = [
+        "// Triggered Sequence (durations pre-scaled by speed, elapsed scaled by time_scale / 2^16)",
+        f"#define TIME_SCALE_SHIFT {TIME_SCALE_SHIFT}",
+        "#define TIME_SCALE_ONE (1UL << TIME_SCALE_SHIFT)",
+        "struct TriggeredStep {",
+    ]
+    lines.extend(f"  {ctype} {name};" for ctype, name in TRIGGERED_STEP_FIELDS)
+    lines.extend([
+        "};",
+        "",
+        f"#define TRIGGERED_SEQUENCE_LENGTH {len(steps)}",
+        "const TriggeredStep TRIGGERED_SEQUENCE[] PROGMEM = {",
+    ])
+    for step in steps:
+        lines.append(
+            f"  {{{step['index']}, {step['speed_percent']}, {step['duration_ms']}UL, "
+            f"{step['time_scale']}UL}},  // {step['animation']} {step['speed']}x"
+        )
+    lines.extend([
+        "};",
+        f"#define TRIGGERED_SEQUENCE_TOTAL_MS {sum(step['duration_ms'] for step in steps)}UL",
+        "",
+        "inline unsigned long scaleElapsed(unsigned long realElapsed, unsigned long timeScale) {",
+        "  if (timeScale == TIME_SCALE_ONE) return realElapsed;",
+        "  return (realElapsed * timeScale) >> TIME_SCALE_SHIFT;",
+        "}",
+        "",
+    ])
     return lines
 
-def generate_arduino_header(config_path, output_path):
-    """Generate Arduino header file from JSON config."""
-    with open(config_path, 'r') as f:
-        config = json.load(f)
+def content_hash(data):
+    """SHA-256 hex digest of header bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+def file_hash(path):
+    """SHA-256 hex digest of a file read in chunks (None if it does not exist)."""
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 16), b''):
+                digest.update(chunk)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
+
+def write_if_changed(path, content):
+    """Write content to path only if the file's hash differs.
+
+    Leaving unchanged headers untouched keeps their mtime, so arduino-cli
+    does not rebuild sketches whose config did not change. Returns True
+    if the file was written.
+    """
+    data = content.encode('utf-8')
+    if file_hash(path) == content_hash(data):
+        return False
+    with open(path, 'wb') as f:
+        f.write(data)
+    return True
+
+def header_targets(output_path):
+    """Normalize a single output path or a list of them to a list."""
+    if isinstance(output_path, (str, Path)):
+        return [output_path]
+    return list(output_path)
+
+class HeaderWriter:
+    """Writes lines to a file with "\\n".join() semantics, hashing as it goes."""
+
+    def __init__(self, f):
+        self.f = f
+        self.digest = hashlib.sha256()
+        self.started = False
+
+    def write_lines(self, lines):
+        if not lines:
+            return
+        text = ("\n" if self.started else "") + "\n".join(lines)
+        self.started = True
+        self.f.write(text)
+        self.digest.update(text.encode('utf-8'))
+
+def stream_batch_rows(anim_id, start, batch, packed):
+    """Validate (when packed) and format one batch of streamed keyframe rows."""
+    if not packed:
+        return keyframe_rows(batch)
+    columns = keyframe_columns(batch) if np is not None else None
+    validate_packed_rows(anim_id, batch, columns, start)
+    return keyframe_rows(batch, columns)
+
+def stream_arduino_header(config_path, output_path, packed=False, flash_budget=None):
+    """Generate the header(s) without holding the keyframes in memory.
 
-    animations = config['animations']
-    default_anim_name = config['default_animation']
+    Reads the config in two incremental passes (metadata, then keyframes)
+    and writes keyframe rows to a temporary file in batches, so memory use
+    does not grow with keyframe count. Output is byte-identical to
+    generate_arduino_header() for the default and packed encodings; the
+    options that need whole keyframe lists are not available here.
+    The metadata and every keyframe get the same checks as load_config(),
+    so invalid configs raise ValueError here too.
+    """
+    output_paths = header_targets(output_path)
+    config, counts = parse_scanned_config(scan_config(config_path), config_path)
+    animations, hw, sequence = config.animations, config.hardware, config.triggered_sequence
+    default_anim_name = config.default_animation
     default_index = list(animations.keys()).index(default_anim_name)
+    usage = flash_usage(animations, sequence, packed, keyframe_counts=counts)
+    if flash_budget is not None:
+        check_flash_budget(usage, flash_budget)
+
+    tmp = tempfile.NamedTemporaryFile('w', encoding='utf-8', newline='', suffix='.tmp',
+                                      dir=Path(output_paths[0]).parent, delete=False)
+    try:
+        with tmp:
+            writer = HeaderWriter(tmp)
+            writer.write_lines(generate_header_lines(hw, config.kinematics))
+            writer.write_lines(generate_pwm_tables(hw))
+            writer.write_lines(generate_channel_groups(hw))
+            writer.write_lines(generate_animation_structures(packed))
+            writer.write_lines(generate_animation_names(animations))
+            for anim_id, keyframes in iter_animation_keyframes(config_path):
+                writer.write_lines(keyframe_array_open(anim_id, animations[anim_id]))
+                batch, start = [], 0
+                for kf in keyframes:
+                    check_keyframe(kf, f"{config_path}: animations.{anim_id}.keyframes"
+                                       f"[{start + len(batch)}]")
+                    batch.append(KEYFRAME_VALUES(kf))
+                    if len(batch) == STREAM_BATCH:
+                        writer.write_lines(stream_batch_rows(anim_id, start, batch, packed))
+                        start += len(batch)
+                        batch = []
+                writer.write_lines(stream_batch_rows(anim_id, start, batch, packed))
+                writer.write_lines(KEYFRAME_ARRAY_CLOSE)
+            writer.write_lines(generate_animation_table(animations, counts))
+            writer.write_lines(generate_segment_index(animations))
+            writer.write_lines(generate_triggered_sequence(sequence, animations))
+            writer.write_lines([
+                f"#define ANIMATION_COUNT {len(animations)}",
+                f"#define DEFAULT_ANIMATION {default_index}  // {default_anim_name}",
+                "",
+                "#endif // ANIMATION_CONFIG_H",
+                ""
+            ])
+
+        digest = writer.digest.hexdigest()
+        for path in output_paths:
+            if file_hash(path) == digest:
+                print(f"✓ Unchanged {path} (sha256 {digest[:12]})")
+            else:
+                shutil.copyfile(tmp.name, path)
+                print(f"✓ Generated {path}")
+    finally:
+        os.unlink(tmp.name)
+
+    print(f"  - {len(animations)} animations (streamed)")
+    print(f"  - {sum(counts.values())} total keyframes")
+    print(format_channel_groups(hw))
+    if sequence:
+        steps = compile_triggered_sequence(sequence, animations)
+        total_ms = sum(step['duration_ms'] for step in steps)
+        print(f"  - triggered sequence: {len(steps)} steps, {total_ms} ms ({total_ms / 1000:.3f} s)")
+    print_flash_usage(usage, flash_budget)
+
+def generate_arduino_header(config_path, output_path, packed=False, segment_slot_shift=None,
+                            fixed_point=False, raster_tick_ms=None, raster_budget=None,
+                            pooled=False, simplify_deg=None, flash_budget=None):
+    """Generate Arduino header file(s) from JSON config.
+
+    output_path may be a single path or a list of paths; the config is
+    parsed and rendered once and each target is rewritten only if its
+    content changed. With a flash_budget (bytes) the PROGMEM data size is
+    checked before anything is rendered.
+    """
+    output_paths = header_targets(output_path)
+
+    config = load_config(config_path)
+    animations, hw, sequence = config.animations, config.hardware, config.triggered_sequence
+    if simplify_deg is not None:
+        animations = simplify_animations(config.animations, simplify_deg)
+    default_anim_name = config.default_animation
+    default_index = list(animations.keys()).index(default_anim_name)
+    usage = flash_usage(animations, sequence, packed, pooled,
+                        segment_slot_shift, fixed_point, raster_tick_ms, raster_budget)
+    if flash_budget is not None:
+        check_flash_budget(usage, flash_budget)
 
     header_lines = []
-    header_lines.extend(generate_header_lines(config['hardware'], config['kinematics']))
-    header_lines.extend(generate_animation_structures())
-    header_lines.extend(generate_animation_data(animations))
+    header_lines.extend(generate_header_lines(hw, config.kinematics))
+    header_lines.extend(generate_pwm_tables(hw))
+    header_lines.extend(generate_channel_groups(hw))
+    ref_type = pose_ref_type(build_pose_pool(animations)[1]) if pooled else None
+    header_lines.extend(generate_animation_structures(packed, ref_type))
+    header_lines.extend(generate_animation_data(animations, packed, pooled))
+    header_lines.extend(generate_segment_index(animations, segment_slot_shift))
+    header_lines.extend(generate_fixed_point_segments(animations, fixed_point))
+    header_lines.extend(generate_raster_tables(animations, raster_tick_ms, raster_budget))
+    header_lines.extend(generate_triggered_sequence(sequence, animations))
     header_lines.extend([
         f"#define ANIMATION_COUNT {len(animations)}",
         f"#define DEFAULT_ANIMATION {default_index}  // {default_anim_name}",
@@ -130,18 +1320,129 @@ def generate_arduino_header(config_path, output_path):
     ])
 
     output = "\n".join(header_lines)
-    with open(output_path, 'w') as f:
-        f.write(output)
-
-    print(f"✓ Generated {output_path}")
+    for path in output_paths:
+        if write_if_changed(path, output):
+            print(f"✓ Generated {path}")
+        else:
+            print(f"✓ Unchanged {path} (sha256 {content_hash(output.encode('utf-8'))[:12]})")
     print(f"  - {len(animations)} animations")
-    print(f"  - {sum(len(a['keyframes']) for a in animations.values())} total keyframes")
+    print(f"  - {sum(len(anim.keyframes) for anim in animations.values())} total keyframes")
+    print(format_channel_groups(hw))
+    if sequence:
+        steps = compile_triggered_sequence(sequence, animations)
+        total_ms = sum(step['duration_ms'] for step in steps)
+        print(f"  - triggered sequence: {len(steps)} steps, {total_ms} ms ({total_ms / 1000:.3f} s)")
+    print_flash_usage(usage, flash_budget)
+    if packed:
+        print("  - packed keyframes (flash before/after):")
+        for line in format_flash_report(keyframe_flash_report(animations)):
+            print(line)
+    if simplify_deg is not None:
+        print(f"  - simplified keyframes (tolerance {simplify_deg}°):")
+        for anim_id, before, after, error in simplification_report(config.animations, animations):
+            print(f"    {anim_id:<20} {before:>4} -> {after:<4} keyframes  max error {error}°")
+    if pooled:
+        pool, refs, _ = build_pose_pool(animations)
+        mirrored = sum(ref & 1 for ref in refs.values())
+        print(f"  - pose pool: {len(refs)} unique poses ({mirrored} mirrored), {len(pool)}B, "
+              f"{pose_ref_type(refs)} references")
+        for line in format_flash_report(pose_pool_report(animations, packed)):
+            print(line)
+    if fixed_point:
+        segment_count = sum(len(rows) for rows in fixed_point_segments(animations).values())
+        print(f"  - fixed-point segments: {segment_count} "
+              f"({segment_count * struct_size(SEGMENT_FIELDS)}B)")
+    if raster_tick_ms is not None:
+        report = raster_report(animations, raster_tick_ms, raster_budget)
+        used = sum(raster for _, _, raster, rasterized in report if rasterized)
+        budget = f"{raster_budget}B" if raster_budget is not None else "unlimited"
+        print(f"  - raster frames every {raster_tick_ms} ms ({used}B of {budget} budget):")
+        for anim_id, kf_bytes, raster, rasterized in report:
+            choice = "raster" if rasterized else "keyframes"
+            print(f"    {anim_id:<20} keyframes {kf_bytes:>5}B  raster {raster:>6}B  -> {choice}")
+    if segment_slot_shift is not None:
+        print(f"  - segment index ({1 << segment_slot_shift} ms slots):")
+        for anim_id, count, size, max_scan in segment_index_report(animations, segment_slot_shift):
+            print(f"    {anim_id:<20} {count:>4} keyframes  {size:>5}B  scan <= {max_scan}")
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--packed', action='store_true',
+                        help='emit uint16 times and uint8 angles (6-byte keyframes)')
+    parser.add_argument('--pooled', action='store_true',
+                        help='intern keyframe poses into a shared pool with mirrored poses stored once')
+    parser.add_argument('--simplify', type=float, default=None, metavar='DEG',
+                        dest='simplify_deg',
+                        help='drop keyframes reproduced by interpolation within DEG degrees')
+    parser.add_argument('--segment-index', nargs='?', type=int, const=7, default=None,
+                        metavar='SHIFT', dest='segment_slot_shift',
+                        help='emit a segment time index with 2**SHIFT ms slots (default 7 = 128 ms)')
+    parser.add_argument('--fixed-point', action='store_true',
+                        help='emit per-segment reciprocals and deltas for integer-only interpolation')
+    parser.add_argument('--raster', nargs='?', type=int, const=20, default=None,
+                        metavar='TICK_MS', dest='raster_tick_ms',
+                        help='pre-sample animations every TICK_MS (default 20 ms = 50 Hz servo frame)')
+    parser.add_argument('--raster-budget', type=int, default=None, metavar='BYTES',
+                        help='flash bytes available for raster frames (default: rasterize everything)')
+    parser.add_argument('--stream', action='store_true',
+                        help='read keyframes incrementally for very large configs '
+                             '(default or --packed encoding only)')
+    parser.add_argument('--watch', action='store_true',
+                        help='stay running and regenerate whenever animation-config.json changes')
+    parser.add_argument('--flash-budget', type=parse_byte_count, default=None, metavar='BYTES',
+                        help='fail if PROGMEM data exceeds BYTES (e.g. 28K) and print '
+                             'a per-animation breakdown')
+    args = parser.parse_args()
+    if args.stream and (args.segment_slot_shift is not None or args.fixed_point or args.pooled
+                        or args.raster_tick_ms is not None or args.simplify_deg is not None):
+        parser.error("--stream supports the default and --packed encodings only")
+
     config_path = Path(__file__).parent / 'animation-config.json'
-    output_path = Path(__file__).parent / 'arduino' / 'hatching_egg' / 'animation_config.h'
+    output_paths = [Path(__file__).parent / target for target in HEADER_TARGETS]
+
+    # Create arduino directories if needed
+    for output_path in output_paths:
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    def regenerate():
+        if args.stream:
+            stream_arduino_header(config_path, output_paths, packed=args.packed,
+                                  flash_budget=args.flash_budget)
+            return
+        generate_arduino_header(config_path, output_paths, packed=args.packed,
+                                segment_slot_shift=args.segment_slot_shift,
+                                fixed_point=args.fixed_point,
+                                raster_tick_ms=args.raster_tick_ms,
+                                raster_budget=args.raster_budget,
+                                pooled=args.pooled,
+                                simplify_deg=args.simplify_deg,
+                                flash_budget=args.flash_budget)
+
+    if not args.watch:
+        try:
+            regenerate()
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        sys.exit(0)
+
+    from config_watch import open_watcher, watch
 
-    # Create arduino directory if needed
-    output_path.parent.mkdir(parents=True, exist_ok=True)
+    def regenerate_reporting_errors():
+        # A half-saved or invalid config must not end the watch session,
+        # whatever it breaks (Ctrl+C is not an Exception and still stops it)
+        start = time.perf_counter()
+        try:
+            regenerate()
+        except Exception as e:
+            print(f"❌ {type(e).__name__}: {e}")
+            return
+        print(f"  ({(time.perf_counter() - start) * 1000:.1f} ms)")
 
-    generate_arduino_header(config_path, output_path)
+    watcher = open_watcher(config_path)
+    print(f"👀 Watching {config_path} ({type(watcher).__name__}), Ctrl+C to stop")
+    regenerate_reporting_errors()
+    try:
+        watch(config_path, regenerate_reporting_errors, watcher=watcher)
+    except KeyboardInterrupt:
+        print("\nStopped watching")
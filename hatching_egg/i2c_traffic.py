@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Estimate PCA9685 I2C traffic from moveLegs() change detection.
+
+moveLegs() only calls pwm.setPWM() for a joint whose integer angle differs
+from the last one written, so bus load depends on how fast each animation
+moves and on the playback speed. This replays animations the way loop()
+does - one updateAnimation() per pass at the loop rate, with the Q16
+scaleElapsed() time of each triggered step - and counts the setPWM()
+transactions per channel.
+
+One setPWM() is an I2C write of 6 bytes (address, LEDn_ON_L register and
+four ON/OFF bytes), each 8 bits + ACK, plus START and STOP: SETPWM_CLOCKS
+SCL periods. Wire runs at 100 kHz unless the sketch calls Wire.setClock().
+Utilization is bus time over a sliding window (default one 20 ms servo
+frame). The replay does not slow the loop down when writes block it, so
+the estimate is pessimistic once a pass needs more bus time than its
+period. Requires NumPy.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from config_model import TriggeredStep, load_config
+from firmware_reference import TIME_SCALE_ONE, TIME_SCALE_SHIFT, ULONG_MASK
+from generate_arduino_config import (
+    JOINTS, PCA9685_CHANNELS, SERVOS, SETPWM_BYTES, compile_triggered_sequence
+)
+from trajectory import sample_animations, sample_times
+
+SETPWM_CLOCKS = SETPWM_BYTES * 9 + 2  # 8 data bits + ACK per byte, START and STOP
+BUS_SPEEDS_HZ = (100_000, 400_000)
+DEFAULT_LOOP_RATE_HZ = 1000  # one pass per millis() tick
+DEFAULT_WINDOW_MS = 20  # one 50 Hz servo frame
+DEFAULT_SPEEDS = (1.0, 1.5, 2.0, 2.5)
+CHANNEL_NAMES = [prefix for prefix, _, _ in SERVOS]
+
+
+def transaction_us(bus_hz):
+    """Bus time of one setPWM() write in microseconds."""
+    return SETPWM_CLOCKS * 1e6 / bus_hz
+
+
+def playback(anim, duration_ms, time_scale=TIME_SCALE_ONE, rate_hz=DEFAULT_LOOP_RATE_HZ):
+    """(real_ms, angles) for the passes that call moveLegs() during one play.
+
+    real_ms are millis() - animationStartTime, 0 <= real < duration_ms;
+    angles are (n, 4) in JOINTS order after scaleElapsed().
+    """
+    real = sample_times(duration_ms, rate_hz)
+    if time_scale == TIME_SCALE_ONE:
+        elapsed = real
+    else:
+        elapsed = ((real * time_scale) & ULONG_MASK) >> TIME_SCALE_SHIFT
+    return real, sample_animations({'play': anim}, {'play': elapsed})['play']
+
+
+def written_channels(angles, last=None):
+    """Bool (n, 4): which joints moveLegs() writes on each pass.
+
+    last is the previous play's final angles; None means the -1 values
+    after reset, so every channel is written on the first pass.
+    """
+    previous = np.empty_like(angles)
+    previous[1:] = angles[:-1]
+    previous[:1] = -1 if last is None else last
+    return angles != previous
+
+
+def window_peak(times_ms, counts, window_ms):
+    """Most writes falling in any window_ms interval starting at a pass."""
+    if len(times_ms) == 0:
+        return 0
+    totals = np.concatenate(([0], np.cumsum(counts)))
+    ends = np.searchsorted(times_ms, times_ms + window_ms, side='left')
+    return int((totals[ends] - totals[:-1]).max())
+
+
+def traffic_stats(times_ms, written, duration_ms, window_ms=DEFAULT_WINDOW_MS):
+    """Write counts and rates for passes at times_ms over duration_ms.
+
+    Returns a dict with per-channel 'writes' and 'peak_window' counts,
+    'per_second' rates, and the busiest single pass and window overall.
+    """
+    seconds = duration_ms / 1000 if duration_ms else 1
+    per_pass = written.sum(axis=1)
+    return {
+        'duration_ms': duration_ms,
+        'writes': written.sum(axis=0).tolist(),
+        'per_second': (written.sum(axis=0) / seconds).tolist(),
+        'peak_window': [window_peak(times_ms, written[:, j], window_ms)
+                        for j in range(written.shape[1])],
+        'peak_window_total': window_peak(times_ms, per_pass, window_ms),
+        'peak_pass': int(per_pass.max(initial=0)),
+        'window_ms': window_ms,
+    }
+
+
+def utilization(stats, bus_hz):
+    """Average and peak-window fraction of bus time spent in setPWM()."""
+    tx_us = transaction_us(bus_hz)
+    seconds = stats['duration_ms'] / 1000 if stats['duration_ms'] else 1
+    average = sum(stats['writes']) * tx_us / (seconds * 1e6)
+    peak = stats['peak_window_total'] * tx_us / (stats['window_ms'] * 1000)
+    return average, peak
+
+
+def servo_capacity(stats, bus_hz):
+    """Servos that fit if each wrote as often as the busiest channel's worst window."""
+    busiest = max(stats['peak_window'], default=0)
+    if busiest == 0:
+        return PCA9685_CHANNELS
+    fit = int(stats['window_ms'] * 1000 // (busiest * transaction_us(bus_hz)))
+    return min(fit, PCA9685_CHANNELS)
+
+
+def animation_traffic(config, speeds=DEFAULT_SPEEDS, rate_hz=DEFAULT_LOOP_RATE_HZ,
+                      window_ms=DEFAULT_WINDOW_MS, anim_ids=None):
+    """traffic_stats() for each animation played once at each speed.
+
+    Returns {(anim_id, speed): stats}. Durations and Q16 scales are
+    compiled like triggered steps, so they match what the firmware plays.
+    """
+    animations = config.animations
+    anim_ids = list(animations) if anim_ids is None else list(anim_ids)
+    steps = compile_triggered_sequence(
+        [TriggeredStep(anim_id, speed) for anim_id in anim_ids for speed in speeds], animations)
+    result = {}
+    for step in steps:
+        real, angles = playback(animations[step['animation']], step['duration_ms'],
+                                step['time_scale'], rate_hz)
+        result[(step['animation'], step['speed'])] = traffic_stats(
+            real, written_channels(angles), step['duration_ms'], window_ms)
+    return result
+
+
+def sequence_traffic(config, rate_hz=DEFAULT_LOOP_RATE_HZ, window_ms=DEFAULT_WINDOW_MS):
+    """traffic_stats() for the whole triggered sequence, steps back to back.
+
+    The last angles carry over between steps like lastLeftShoulder etc.,
+    so a step starting where the previous one ended writes nothing new.
+    """
+    animations = config.animations
+    steps = compile_triggered_sequence(config.triggered_sequence, animations)
+    times, writes, offset, last = [], [], 0, None
+    for step in steps:
+        real, angles = playback(animations[step['animation']], step['duration_ms'],
+                                step['time_scale'], rate_hz)
+        times.append(real + offset)
+        writes.append(written_channels(angles, last))
+        offset += step['duration_ms']
+        if len(angles):
+            last = angles[-1]
+    return traffic_stats(np.concatenate(times),
+                         np.concatenate(writes).reshape(-1, len(JOINTS)), offset, window_ms)
+
+
+def format_traffic_row(label, stats):
+    """One report line: rates, worst window and utilization at each bus speed."""
+    total = sum(stats['per_second'])
+    busiest = max(stats['per_second'])
+    columns = [f"{label:<28}", f"{total:>8.1f}", f"{busiest:>8.1f}",
+               f"{stats['peak_window_total']:>5}", f"{stats['peak_pass']:>4}"]
+    for bus_hz in BUS_SPEEDS_HZ:
+        average, peak = utilization(stats, bus_hz)
+        columns.append(f"{average:>6.1%} {peak:>6.1%} {servo_capacity(stats, bus_hz):>3}")
+    return " ".join(columns)
+
+
+def format_traffic_header(window_ms):
+    """Two header lines matching format_traffic_row()."""
+    labels = (f"{'animation':<28} {'setPWM/s':>8} {'max ch/s':>8} "
+              f"{f'/{window_ms}ms':>5} {'pass':>4}")
+    buses = " ".join(f"{f'{bus_hz // 1000} kHz':^17}" for bus_hz in BUS_SPEEDS_HZ)
+    columns = " ".join(f"{'avg':>6} {'peak':>6} {'fit':>3}" for _ in BUS_SPEEDS_HZ)
+    return f"{'':<{len(labels)}} {buses}\n{labels} {columns}"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('anim_ids', nargs='*', help='animations to replay (default: all)')
+    parser.add_argument('--rate', type=float, default=DEFAULT_LOOP_RATE_HZ, metavar='HZ',
+                        help=f'loop() passes per second (default {DEFAULT_LOOP_RATE_HZ})')
+    parser.add_argument('--window', type=int, default=DEFAULT_WINDOW_MS, metavar='MS',
+                        help=f'peak utilization window (default {DEFAULT_WINDOW_MS} ms)')
+    parser.add_argument('--speeds', default=",".join(f"{s:g}" for s in DEFAULT_SPEEDS),
+                        help='comma-separated playback speeds (default 1,1.5,2,2.5)')
+    parser.add_argument('--config', type=Path,
+                        default=Path(__file__).parent / 'animation-config.json')
+    args = parser.parse_args()
+
+    try:
+        speeds = [float(speed) for speed in args.speeds.split(',')]
+        if args.window <= 0:
+            raise ValueError(f"window must be positive, got {args.window}")
+        config = load_config(args.config)
+        for anim_id in args.anim_ids:
+            if anim_id not in config.animations:
+                raise ValueError(f"unknown animation '{anim_id}'")
+        per_animation = animation_traffic(config, speeds, args.rate, args.window,
+                                          args.anim_ids or None)
+        sequence = sequence_traffic(config, args.rate, args.window)
+    except (ValueError, OSError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    print(f"✓ setPWM traffic at {args.rate:g} loop passes/s "
+          f"({SETPWM_CLOCKS} SCL clocks per write, channels: {', '.join(CHANNEL_NAMES)})")
+    print(format_traffic_header(args.window))
+    for (anim_id, speed), stats in per_animation.items():
+        print(format_traffic_row(f"{anim_id} @{speed:g}x", stats))
+    print(format_traffic_row("triggered sequence", sequence))
+    worst = max(list(per_animation.values()) + [sequence],
+                key=lambda stats: stats['peak_window_total'])
+    for bus_hz in BUS_SPEEDS_HZ:
+        _, peak = utilization(worst, bus_hz)
+        pass_us = worst['peak_pass'] * transaction_us(bus_hz)
+        print(f"  - {bus_hz // 1000} kHz: worst {args.window} ms window {peak:.1%} busy, "
+              f"busiest pass blocks {pass_us:.0f} µs "
+              f"(period {1e6 / args.rate:.0f} µs)")
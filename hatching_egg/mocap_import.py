@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Import joint-angle recordings (mocap / puppet rig CSV) as animations.
+
+Each CSV row is one sample: time followed by the four joint angles in
+degrees (left shoulder, left elbow, right shoulder, right elbow). A header
+row is optional; when present, columns are picked by name (time_ms / time
+and the joint names with or without the _deg suffix) in any order.
+
+Recordings may be minutes long at 1 kHz, so the file is read CHUNK_ROWS
+rows at a time. Each chunk is:
+
+1. clamped to the kinematics min/max angles from animation-config.json,
+2. linearly resampled onto a fixed-rate grid starting at the first sample,
+3. decimated to keyframes with the generator's joint RDP simplification
+   (simplify_keyframes), one window of resampled frames at a time.
+
+Memory holds one chunk, one window and the kept keyframes, whatever the
+recording length. Requires NumPy.
+"""
+
+import argparse
+import json
+import re
+import sys
+from itertools import islice
+from pathlib import Path
+
+import numpy as np
+
+from config_model import load_config
+from generate_arduino_config import JOINTS, simplify_keyframes
+
+CHUNK_ROWS = 1 << 14
+SIMPLIFY_WINDOW = 512  # resampled frames simplified together (window ends are kept)
+DEFAULT_RATE_HZ = 50  # one keyframe candidate per 20 ms servo frame
+DEFAULT_MAX_ERROR_DEG = 1.0
+MAX_RATE_HZ = 1000  # keyframe times are whole milliseconds
+TIME_UNITS = {'ms': 1.0, 's': 1000.0}
+TIME_COLUMNS = ('time_ms', 'time', 't')
+
+
+def joint_limits(kinematics):
+    """(low, high) angle arrays in JOINTS order from a config_model KinematicsConfig."""
+    low, high = [], []
+    for joint in JOINTS:
+        kind = joint.split('_')[1]  # shoulder or elbow
+        low.append(getattr(kinematics, f'{kind}_min_angle'))
+        high.append(getattr(kinematics, f'{kind}_max_angle'))
+    return np.array(low, dtype=float), np.array(high, dtype=float)
+
+
+def header_columns(header):
+    """Column indexes of time and each joint (JOINTS order) in a header row."""
+    names = [name.strip().lower() for name in header]
+
+    def find(candidates):
+        for candidate in candidates:
+            if candidate in names:
+                return names.index(candidate)
+        raise ValueError(f"CSV header has no {candidates[0]} column "
+                         f"(found: {', '.join(names)})")
+
+    return [find(TIME_COLUMNS)] + [find((joint, joint[:-len('_deg')])) for joint in JOINTS]
+
+
+def read_samples(csv_path, time_scale=1.0, chunk_rows=CHUNK_ROWS):
+    """Yield (times_ms, angles) float arrays for each chunk of CSV rows.
+
+    Raises ValueError if the file has no data rows, before looking at its
+    header.
+    """
+    with open(csv_path, 'r', newline='') as f:
+        first = f.readline()
+        try:
+            [float(field) for field in first.split(',')]
+        except ValueError:
+            header, columns = first.split(','), None  # parsed once there is data
+            pending, line_number = [], 2
+        else:
+            columns = list(range(len(JOINTS) + 1))
+            pending, line_number = [first], 1
+
+        while True:
+            lines = pending + list(islice(f, chunk_rows - len(pending)))
+            pending = []
+            if not lines:
+                if columns is None:
+                    raise ValueError(f"{csv_path} contains no samples")
+                return
+            start, line_number = line_number, line_number + len(lines)
+            rows = [line for line in lines if line.strip()]
+            if not rows:
+                continue
+            if columns is None:
+                columns = header_columns(header)
+            try:
+                data = np.loadtxt(rows, delimiter=',', ndmin=2, usecols=columns)
+            except ValueError as e:
+                raise ValueError(f"{csv_path} lines {start}-{line_number - 1}: {e}") from None
+            if not np.isfinite(data).all():
+                raise ValueError(f"{csv_path} lines {start}-{line_number - 1}: "
+                                 f"non-finite value")
+            yield data[:, 0] * time_scale, data[:, 1:]
+
+
+def resample(chunks, limits, rate_hz, stats):
+    """Clamp chunks to limits and resample them every 1000 / rate_hz ms.
+
+    Time 0 is the first sample. Each chunk is interpolated together with
+    the last sample of the previous one, so output does not depend on
+    chunk size. Yields (times_ms, angles) integer arrays and counts samples
+    and clamped angle values in stats.
+    """
+    low, high = limits
+    period_ms = 1000 / rate_hz
+    origin = prev_time = prev_angles = None
+    tick = 0
+    for times, angles in chunks:
+        if origin is None:
+            origin = times[0]
+        clamped = np.clip(angles, low, high)
+        stats['samples'] += len(times)
+        stats['clamped'] += int(np.count_nonzero(clamped != angles))
+
+        times = times - origin
+        if prev_time is not None:
+            times = np.concatenate(([prev_time], times))
+            clamped = np.vstack((prev_angles, clamped))
+        backwards = np.flatnonzero(np.diff(times) < 0)
+        if len(backwards):
+            raise ValueError(f"sample time goes backwards at "
+                             f"{times[backwards[0] + 1] + origin:g} ms")
+
+        last_tick = int(np.floor(times[-1] / period_ms + 1e-9))
+        ticks = np.arange(tick, last_tick + 1) * period_ms
+        tick = max(tick, last_tick + 1)
+        if len(ticks):
+            frames = np.column_stack([np.interp(ticks, times, clamped[:, j])
+                                      for j in range(clamped.shape[1])])
+            yield np.rint(ticks).astype(np.int64), np.rint(frames).astype(np.int64)
+        prev_time, prev_angles = times[-1], clamped[-1]
+
+
+def decimate(frames, max_error_deg, window=SIMPLIFY_WINDOW):
+    """Keyframe dicts from resampled frames, simplified one window at a time.
+
+    The last kept keyframe of each window starts the next one, so the
+    output is continuous and only `window` frames are held at once.
+    """
+    fields = ('time_ms',) + JOINTS
+    buffer = []
+    for times, angles in frames:
+        for time_ms, pose in zip(times.tolist(), angles.tolist()):
+            buffer.append((time_ms, *pose))
+            if len(buffer) >= window:
+                kept = simplify_keyframes(buffer, max_error_deg)
+                yield from (dict(zip(fields, row)) for row in kept[:-1])
+                buffer = kept[-1:]
+    yield from (dict(zip(fields, row)) for row in simplify_keyframes(buffer, max_error_deg))
+
+
+def import_recording(csv_path, kinematics, rate_hz=DEFAULT_RATE_HZ,
+                     max_error_deg=DEFAULT_MAX_ERROR_DEG, time_unit='ms',
+                     chunk_rows=CHUNK_ROWS):
+    """Keyframes for a CSV recording, plus stats (samples, clamped, frames).
+
+    Raises ValueError for unreadable rows, time running backwards, an
+    empty recording, one too short to give two keyframes (duration 0) or
+    a rate outside 1-MAX_RATE_HZ.
+    """
+    if not 0 < rate_hz <= MAX_RATE_HZ:
+        raise ValueError(f"resample rate must be 1-{MAX_RATE_HZ} Hz, got {rate_hz}")
+    stats = {'samples': 0, 'clamped': 0, 'frames': 0}
+
+    def counted(frames):
+        for times, angles in frames:
+            stats['frames'] += len(times)
+            yield times, angles
+
+    chunks = read_samples(csv_path, TIME_UNITS[time_unit], chunk_rows)
+    keyframes = list(decimate(counted(resample(chunks, joint_limits(kinematics),
+                                               rate_hz, stats)), max_error_deg))
+    if not keyframes:
+        raise ValueError(f"{csv_path} contains no samples")
+    if len(keyframes) < 2 or keyframes[-1]['time_ms'] <= 0:
+        raise ValueError(f"{csv_path} is shorter than one {rate_hz:g} Hz frame "
+                         f"({stats['samples']} samples); an animation needs a duration")
+    return keyframes, stats
+
+
+def build_animation(name, keyframes, loop=False):
+    """Animation entry in the animation-config.json schema."""
+    return {
+        'name': name,
+        'duration_ms': keyframes[-1]['time_ms'],
+        'loop': loop,
+        'keyframes': keyframes,
+    }
+
+
+def add_animation(config_path, anim_id, animation):
+    """Append an animation to the config's animations object in place.
+
+    The entry is inserted as text before the object's closing brace, so
+    the rest of the hand-formatted file is left exactly as it was.
+    """
+    text = Path(config_path).read_text(encoding='utf-8')
+    config = json.loads(text)
+    if anim_id in config['animations']:
+        raise ValueError(f"animation '{anim_id}' already exists in {config_path}")
+
+    decoder = json.JSONDecoder()
+    for match in re.finditer(r'"animations"\s*:\s*', text):
+        try:
+            value, end = decoder.raw_decode(text, match.end())
+        except json.JSONDecodeError:
+            continue
+        if value == config['animations']:
+            break
+    else:
+        raise ValueError(f"could not locate the animations object in {config_path}")
+
+    entry = json.dumps({anim_id: animation}, indent=2, ensure_ascii=False)
+    entry = "\n".join("  " + line for line in entry.splitlines()[1:-1])
+    close = end - 1
+    head = text[:close].rstrip()
+    separator = "," if config['animations'] else ""
+    updated = f"{head}{separator}\n{entry}\n  {text[close:]}"
+    if json.loads(updated)['animations'].get(anim_id) != animation:
+        raise ValueError(f"inserting '{anim_id}' did not produce the expected config")
+    Path(config_path).write_text(updated, encoding='utf-8')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('csv', type=Path, help='recording: time then four joint angle columns')
+    parser.add_argument('anim_id', help='animation id (e.g. puppet_wave)')
+    parser.add_argument('--name', help='display name (default: from the id)')
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE_HZ, metavar='HZ',
+                        help=f'resample rate before decimation (default {DEFAULT_RATE_HZ})')
+    parser.add_argument('--max-error', type=float, default=DEFAULT_MAX_ERROR_DEG,
+                        metavar='DEG',
+                        help=f'keyframe decimation tolerance (default {DEFAULT_MAX_ERROR_DEG}°)')
+    parser.add_argument('--time-unit', choices=sorted(TIME_UNITS), default='ms',
+                        help='unit of the time column (default ms)')
+    parser.add_argument('--loop', action='store_true', help='mark the animation as looping')
+    parser.add_argument('--config', type=Path,
+                        default=Path(__file__).parent / 'animation-config.json',
+                        help='config providing kinematics limits (and target of --add)')
+    output = parser.add_mutually_exclusive_group(required=True)
+    output.add_argument('--add', action='store_true',
+                        help='append the animation to the config')
+    output.add_argument('--output', type=Path, metavar='JSON',
+                        help='write {"<id>": animation} to this file instead')
+    args = parser.parse_args()
+
+    try:
+        kinematics = load_config(args.config).kinematics
+        keyframes, stats = import_recording(args.csv, kinematics, args.rate,
+                                            args.max_error, args.time_unit)
+        name = args.name or args.anim_id.replace('_', ' ').title()
+        animation = build_animation(name, keyframes, args.loop)
+        if args.add:
+            add_animation(args.config, args.anim_id, animation)
+            destination = args.config
+        else:
+            args.output.write_text(json.dumps({args.anim_id: animation}, indent=2,
+                                              ensure_ascii=False) + "\n", encoding='utf-8')
+            destination = args.output
+    except (ValueError, OSError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    print(f"✓ Imported {args.csv} as '{args.anim_id}' → {destination}")
+    print(f"  - {stats['samples']} samples, {stats['clamped']} angle values clamped "
+          f"to kinematics limits")
+    print(f"  - {stats['frames']} frames at {args.rate:g} Hz → {len(keyframes)} keyframes "
+          f"(max error {args.max_error:g}°), {animation['duration_ms']} ms")
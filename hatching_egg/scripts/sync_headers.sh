@@ -52,6 +52,7 @@ sync_to() {
 sync_to "arduino/servo_tester/servo_mapping.h"
 sync_to "arduino/servo_sweep_test/servo_mapping.h"
 # hatching_egg doesn't need servo_mapping.h (uses animation_config.h)
+# animation_config.h is written to every sketch by generate_arduino_config.py
 
 # Summary
 echo ""
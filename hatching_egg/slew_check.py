@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Check animation segments against the servos' maximum slew rate.
+
+A segment asks a joint to move |a2 - a1| degrees in (t2 - t1) / speed ms.
+Servos have a top speed (datasheets quote seconds per 60°), so faster
+segments - typically breaking_through and stabbing at 2.0-2.5x in the
+triggered sequence - arrive late and blur the choreography.
+
+For every animation at 1.0x and at each speed the triggered sequence
+plays it, all segments and joints are evaluated in one NumPy broadcast:
+
+- peak angular velocity (deg/s) per segment and joint, with angles
+  constrained to 0-90° like setServo(); a time jump is infinitely fast;
+- segments over the servo limit;
+- playback latency: how late each joint reaches its keyframe poses if it
+  chases them at top speed, carried across segments (and across steps for
+  the whole triggered sequence).
+
+Requires NumPy.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from config_model import load_config
+from firmware_reference import ANGLE_MAX, ANGLE_MIN, TIME_SCALE_SHIFT
+from generate_arduino_config import JOINTS, SERVOS, compile_triggered_sequence
+from trajectory import keyframe_arrays
+
+DEFAULT_SERVO_SPEED = 0.12  # seconds per 60°
+SERVO_NAMES = {joint: prefix for joint, (prefix, _, _) in zip(JOINTS, SERVOS)}
+
+
+def max_deg_per_s(servo_speed):
+    """Top angular velocity for a servo rated servo_speed seconds per 60°."""
+    if servo_speed <= 0:
+        raise ValueError(f"servo speed must be positive, got {servo_speed}")
+    return 60 / servo_speed
+
+
+def played_keyframes(anim):
+    """(times, angles) of the keyframes reached before duration_ms.
+
+    Angles are constrained to the servo range, since that is what is
+    written; the segment ending past the duration is kept (it is partly
+    played at the same velocity).
+    """
+    times, angles = keyframe_arrays(anim)
+    reached = np.flatnonzero(times[:-1] < anim.duration_ms) if len(times) > 1 else []
+    count = int(reached[-1]) + 2 if len(reached) else min(len(times), 1)
+    return times[:count], np.clip(angles[:count], ANGLE_MIN, ANGLE_MAX)
+
+
+def segment_velocities(times, angles, speeds):
+    """Peak deg/s per (speed, segment, joint) for linear segments.
+
+    Returns an (m, n - 1, 4) float array; segments with no time (or time
+    going backwards) but a change of angle are inf.
+    """
+    speeds = np.asarray(speeds, dtype=float)
+    moved = np.abs(np.diff(angles, axis=0)).astype(float)
+    span_s = np.diff(times).astype(float)[None, :, None] / (1000 * speeds[:, None, None])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        velocity = np.where(span_s > 0, moved[None] / span_s, np.inf)
+    return np.where(moved[None] == 0, 0.0, velocity)
+
+
+def keyframe_lag(times, angles, limit_deg_s, speed=1.0):
+    """How late (ms) each joint reaches each keyframe pose, shape (n, 4).
+
+    The servo travels keyframe to keyframe at up to limit_deg_s; lateness
+    follows L_k = max(0, L_(k-1) + travel_k - span_k), evaluated for all
+    keyframes at once as a cumulative sum minus its running minimum.
+    """
+    if len(times) == 0:
+        return np.zeros((0, len(JOINTS)))
+    travel_ms = np.abs(np.diff(angles, axis=0)) * (1000 / limit_deg_s)
+    span_ms = np.maximum(np.diff(times), 0)[:, None] / speed
+    excess = np.cumsum(np.vstack((np.zeros((1, angles.shape[1])), travel_ms - span_ms)), axis=0)
+    return excess - np.minimum.accumulate(excess, axis=0)
+
+
+def animation_speeds(config):
+    """{anim_id: speeds} - 1.0 plus every speed a triggered step plays it at."""
+    speeds = {anim_id: [1.0] for anim_id in config.animations}
+    for step in config.triggered_sequence:
+        if float(step.speed) not in speeds[step.animation]:
+            speeds[step.animation].append(float(step.speed))
+    return speeds
+
+
+def check_animations(config, servo_speed=DEFAULT_SERVO_SPEED, anim_ids=None):
+    """Slew report rows for every animation and playback speed.
+
+    Each row has anim_id, speed, 'peak' deg/s per joint, 'lag_ms' (worst
+    lateness per joint) and 'over': (segment, joint, deg/s, t1, t2) for
+    segments above the servo limit, times in real ms.
+    """
+    limit = max_deg_per_s(servo_speed)
+    speeds = animation_speeds(config)
+    rows = []
+    for anim_id in (anim_ids or config.animations):
+        times, angles = played_keyframes(config.animations[anim_id])
+        anim_speeds = speeds[anim_id]
+        velocity = segment_velocities(times, angles, anim_speeds)
+        for i, speed in enumerate(anim_speeds):
+            lag = keyframe_lag(times, angles, limit, speed)
+            segments, joints = np.nonzero(velocity[i] > limit)
+            rows.append({
+                'anim_id': anim_id,
+                'speed': speed,
+                'peak': velocity[i].max(axis=0, initial=0).tolist(),
+                'lag_ms': lag.max(axis=0, initial=0).tolist(),
+                'over': [(int(k), JOINTS[j], float(velocity[i, k, j]),
+                          times[k] / speed, times[k + 1] / speed)
+                         for k, j in zip(segments, joints)],
+            })
+    return rows
+
+
+def sequence_lag(config, servo_speed=DEFAULT_SERVO_SPEED):
+    """Worst and final lateness (ms per joint) over the whole triggered sequence.
+
+    Steps are laid end to end at their real durations, each keyframe at
+    the first millisecond scaleElapsed() reaches it; the jump from one
+    step's last pose to the next step's first pose counts as travel.
+    """
+    animations = config.animations
+    steps = compile_triggered_sequence(config.triggered_sequence, animations)
+    times, poses, offset = [], [], 0
+    for step in steps:
+        anim_times, angles = played_keyframes(animations[step['animation']])
+        reached = -(-(anim_times << TIME_SCALE_SHIFT) // step['time_scale'])
+        real = np.minimum(reached, step['duration_ms'])
+        times.append(offset + real)
+        poses.append(angles)
+        offset += step['duration_ms']
+    lag = keyframe_lag(np.concatenate(times), np.concatenate(poses), max_deg_per_s(servo_speed))
+    return lag.max(axis=0).tolist(), lag[-1].tolist()
+
+
+def format_joint_values(values, width=6, precision=0):
+    return " ".join(f"{value:>{width}.{precision}f}" for value in values)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('anim_ids', nargs='*', help='animations to check (default: all)')
+    parser.add_argument('--servo-speed', type=float, default=DEFAULT_SERVO_SPEED,
+                        metavar='S_PER_60',
+                        help=f'servo speed in seconds per 60° (default {DEFAULT_SERVO_SPEED})')
+    parser.add_argument('--strict', action='store_true',
+                        help='exit with status 1 if any segment is over the limit')
+    parser.add_argument('--config', type=Path,
+                        default=Path(__file__).parent / 'animation-config.json')
+    args = parser.parse_args()
+
+    try:
+        config = load_config(args.config)
+        for anim_id in args.anim_ids:
+            if anim_id not in config.animations:
+                raise ValueError(f"unknown animation '{anim_id}'")
+        limit = max_deg_per_s(args.servo_speed)
+        rows = check_animations(config, args.servo_speed, args.anim_ids or None)
+        sequence = sequence_lag(config, args.servo_speed) if config.triggered_sequence else None
+    except (ValueError, OSError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    names = [SERVO_NAMES[joint] for joint in JOINTS]
+    print(f"Servo limit {limit:.0f} deg/s ({args.servo_speed:g} s/60°); "
+          f"joints: {', '.join(names)}")
+    print(f"  {'animation':<24} {'peak deg/s per joint':>27}  {'worst lag ms per joint':>27}")
+    for row in rows:
+        label = f"{row['anim_id']} @{row['speed']:g}x"
+        flag = f"  {len(row['over'])} over" if row['over'] else ""
+        print(f"  {label:<24} {format_joint_values(row['peak'])}  "
+              f"{format_joint_values(row['lag_ms'])}{flag}")
+    if sequence is not None:
+        worst, final = sequence
+        print(f"  triggered sequence lag: worst {format_joint_values(worst, 0)} ms, "
+              f"at the end {format_joint_values(final, 0)} ms")
+
+    over = [(row, segment) for row in rows for segment in row['over']]
+    if not over:
+        print(f"✓ All segments within {limit:.0f} deg/s")
+        sys.exit(0)
+    print(f"{'❌' if args.strict else '⚠️'} {len(over)} segment/joint pairs over "
+          f"{limit:.0f} deg/s:")
+    for row, (k, joint, velocity, t1, t2) in over:
+        speed = "jump" if np.isinf(velocity) else f"{velocity:.0f} deg/s"
+        print(f"    {row['anim_id']} @{row['speed']:g}x keyframes {k}->{k + 1} "
+              f"({t1:.0f}-{t2:.0f} ms): {SERVO_NAMES[joint]} {speed}")
+    sys.exit(1 if args.strict else 0)
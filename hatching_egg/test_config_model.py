@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Unit tests for config_model.py
+"""
+
+import copy
+import dataclasses
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from config_model import JOINTS, Keyframes, clear_config_cache, load_config, parse_config
+
+CONFIG_PATH = Path(__file__).parent / 'animation-config.json'
+
+
+class TestParseConfig(unittest.TestCase):
+    """Tests for the typed model of the real config and its validation."""
+
+    def setUp(self):
+        with open(CONFIG_PATH) as f:
+            self.data = json.load(f)
+
+    def test_matches_json_document(self):
+        """Every section of the model agrees with the raw JSON."""
+        model = parse_config(self.data)
+        self.assertEqual(model.default_animation, self.data['default_animation'])
+        for field, value in dataclasses.asdict(model.kinematics).items():
+            self.assertEqual(value, self.data['kinematics'][field])
+        right = self.data['hardware']['right_leg']
+        self.assertEqual(model.hardware.servo('right_leg', 'elbow').channel,
+                         right['elbow_channel'])
+        self.assertEqual(model.hardware.right_leg.shoulder.max_pulse,
+                         right['shoulder_max_pulse'])
+        self.assertEqual(set(model.animations), set(self.data['animations']))
+        for anim_id, anim in self.data['animations'].items():
+            parsed = model.animations[anim_id]
+            self.assertEqual(parsed.duration_ms, anim['duration_ms'])
+            self.assertEqual(parsed.loop, anim.get('loop', False))
+            fields = ('time_ms',) + JOINTS
+            self.assertEqual(parsed.keyframes.to_dicts(),
+                             [{field: kf[field] for field in fields} for kf in anim['keyframes']],
+                             anim_id)
+            self.assertEqual(list(parsed.keyframes.column(JOINTS[3])),
+                             [kf[JOINTS[3]] for kf in anim['keyframes']])
+        self.assertEqual([(step.animation, step.speed) for step in model.triggered_sequence],
+                         [(step['animation'], step['speed'])
+                          for step in self.data['triggered_sequence']['steps']])
+
+    def test_model_is_frozen_and_slotted(self):
+        """Sections have no per-instance __dict__ and reject assignment."""
+        model = parse_config(self.data)
+        keyframes = model.animations['resting'].keyframes
+        self.assertFalse(hasattr(keyframes, '__dict__'))
+        self.assertFalse(hasattr(model.hardware.left_leg.elbow, '__dict__'))
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            model.hardware.left_leg.elbow.channel = 5
+
+    def test_keyframes_from_rows(self):
+        """Iterating Keyframes yields rows that from_rows() turns back into the same columns."""
+        keyframes = parse_config(self.data).animations['resting'].keyframes
+        self.assertEqual(Keyframes.from_rows(keyframes), keyframes)
+        self.assertEqual(len(Keyframes.from_rows([])), 0)
+
+    def test_invalid_values_raise(self):
+        """Missing keys, non-integer or out-of-range values and unknown ids are named."""
+        cases = [
+            (lambda d: d['animations']['resting']['keyframes'][1].pop('left_elbow_deg'),
+             "animations.resting.keyframes[1]: missing 'left_elbow_deg'"),
+            (lambda d: d['animations']['resting']['keyframes'][0].update(left_elbow_deg=1.5),
+             "animations.resting.keyframes[0].left_elbow_deg: expected int"),
+            (lambda d: d['hardware'].update(trigger_pin=True),
+             "hardware.trigger_pin: expected int"),
+            (lambda d: d['animations']['resting']['keyframes'][0].update(time_ms=None),
+             "animations.resting.keyframes[0].time_ms: expected int"),
+            (lambda d: d['animations']['resting']['keyframes'][0].update(left_elbow_deg=40000),
+             "animations.resting.keyframes[0].left_elbow_deg: 40000 is out of range"),
+            (lambda d: d['animations']['resting'].update(keyframes=[]),
+             "animations.resting.keyframes: expected at least one keyframe"),
+            (lambda d: d['hardware']['left_leg'].pop('shoulder_channel'),
+             "hardware.left_leg: missing 'shoulder_channel'"),
+            (lambda d: d.update(default_animation='nope'),
+             "default_animation: unknown animation 'nope'"),
+            (lambda d: d['triggered_sequence']['steps'][0].update(animation='nope'),
+             "triggered_sequence.steps[0]: unknown animation 'nope'"),
+        ]
+        for mutate, message in cases:
+            data = copy.deepcopy(self.data)
+            mutate(data)
+            with self.assertRaises(ValueError, msg=message) as cm:
+                parse_config(data, 'test.json')
+            self.assertIn(f"test.json: {message}", str(cm.exception))
+
+
+class TestLoadConfig(unittest.TestCase):
+    """Tests for the (path, mtime, size, hash) parse cache."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = Path(self.temp_dir) / 'animation-config.json'
+        shutil.copy(CONFIG_PATH, self.path)
+
+    def tearDown(self):
+        clear_config_cache()
+        shutil.rmtree(self.temp_dir)
+
+    def test_cache_hit_returns_same_model(self):
+        """A second load of an unchanged file (by any path spelling) skips parsing."""
+        first = load_config(self.path)
+        self.assertIs(load_config(str(self.path)), first)
+        self.assertIs(load_config(Path(self.temp_dir) / '.' / self.path.name), first)
+
+    def test_edited_file_is_parsed_again(self):
+        """A rewrite changing size or mtime invalidates the cached model."""
+        first = load_config(self.path)
+        data = json.loads(self.path.read_text())
+        data['animations']['resting']['duration_ms'] += 1
+        self.path.write_text(json.dumps(data))
+        second = load_config(self.path)
+        self.assertIsNot(second, first)
+        self.assertEqual(second.animations['resting'].duration_ms,
+                         first.animations['resting'].duration_ms + 1)
+
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        self.assertIsNot(load_config(self.path), second)
+
+    def test_same_size_rewrite_with_same_mtime_is_parsed_again(self):
+        """The content hash catches an edit that keeps both size and mtime."""
+        first = load_config(self.path)
+        stat = os.stat(self.path)
+        text = self.path.read_text()
+        self.path.write_text(text.replace('"duration_ms": 3000', '"duration_ms": 4000', 1))
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertEqual(os.stat(self.path).st_size, stat.st_size)
+        self.assertIsNot(load_config(self.path), first)
+
+    def test_cached_model_cannot_be_changed_by_callers(self):
+        """The model is frozen and animations is read-only, so one caller cannot corrupt another."""
+        first = load_config(self.path)
+        with self.assertRaises(TypeError):
+            first.animations['resting'] = None
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            first.animations['resting'].duration_ms = 0
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Unit tests for config_stream.py
+
+Uses tiny chunk sizes so values, numbers and structural characters are
+split across reads.
+"""
+
+import io
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from config_stream import JsonStream, scan_config, iter_animation_keyframes
+
+
+def keyframe(t):
+    return {'time_ms': t, 'left_shoulder_deg': t % 90, 'left_elbow_deg': 12,
+            'right_shoulder_deg': 1234567, 'right_elbow_deg': -3}
+
+
+class TestJsonStream(unittest.TestCase):
+    """Tests for the JsonStream pull parser."""
+
+    def parse(self, text, chunk_size):
+        """Rebuild an object of arrays/values through keys() and elements()."""
+        stream = JsonStream(io.StringIO(text), chunk_size=chunk_size)
+        result = {}
+        for key in stream.keys():
+            if stream.peek() == '[':
+                result[key] = []
+                for _ in stream.elements():
+                    result[key].append(stream.value())
+            else:
+                result[key] = stream.value()
+        return result
+
+    def test_matches_json_load_at_every_chunk_size(self):
+        """Chunk boundaries anywhere (inside numbers, strings, literals) are handled."""
+        data = {'a': 1234567, 'b': [1.5, -20, True, None, "x, y]"], 'c': {'d': [1, 2]},
+                'empty': [], 'e': "ünïcode"}
+        text = json.dumps(data, indent=2)
+        for chunk_size in (1, 2, 3, 7, 64):
+            self.assertEqual(self.parse(text, chunk_size), data, f"chunk_size={chunk_size}")
+
+    def test_empty_object(self):
+        """An empty object yields no keys."""
+        self.assertEqual(list(JsonStream(io.StringIO(' { } ')).keys()), [])
+
+    def test_truncated_input_raises(self):
+        """A value cut off at end of file is a decode error."""
+        with self.assertRaises(ValueError):
+            self.parse('{"a": [1, 2', 4)
+        with self.assertRaises(ValueError):
+            self.parse('{"a": "unterminated', 4)
+
+    def test_missing_separator_raises(self):
+        """Structural errors are reported as ValueError."""
+        with self.assertRaises(ValueError):
+            self.parse('{"a": 1 "b": 2}', 3)
+
+
+class TestConfigPasses(unittest.TestCase):
+    """Tests for scan_config() and iter_animation_keyframes()."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = Path(self.temp_dir) / 'config.json'
+        self.config = {
+            'hardware': {'i2c_address': '0x40'},
+            'animations': {
+                'walk': {'name': 'Walk', 'keyframes': [keyframe(t) for t in range(0, 5000, 10)],
+                         'duration_ms': 5000, 'loop': True},
+                'empty': {'name': 'Empty', 'duration_ms': 0, 'loop': False, 'keyframes': []},
+            },
+            'default_animation': 'walk',
+        }
+        self.path.write_text(json.dumps(self.config, indent=2))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_scan_replaces_keyframes_with_count(self):
+        """Metadata keeps every field except keyframes, even after the keyframes."""
+        config = scan_config(self.path)
+        self.assertEqual(config['animations']['walk'],
+                         {'name': 'Walk', 'keyframe_count': 500, 'duration_ms': 5000,
+                          'loop': True})
+        self.assertEqual(config['animations']['empty']['keyframe_count'], 0)
+        self.assertEqual(config['default_animation'], 'walk')
+        self.assertEqual(config['hardware'], self.config['hardware'])
+
+    def test_keyframes_in_file_order(self):
+        """Every animation's keyframes come back unchanged."""
+        result = {anim_id: list(keyframes)
+                  for anim_id, keyframes in iter_animation_keyframes(self.path)}
+        self.assertEqual(result, {anim_id: anim['keyframes']
+                                  for anim_id, anim in self.config['animations'].items()})
+
+    def test_partially_consumed_animation_skipped(self):
+        """Unread keyframes are skipped before the next animation."""
+        ids = []
+        for anim_id, keyframes in iter_animation_keyframes(self.path):
+            ids.append(anim_id)
+            next(iter(keyframes), None)
+        self.assertEqual(ids, ['walk', 'empty'])
+
+
+if __name__ == '__main__':
+    unittest.main()
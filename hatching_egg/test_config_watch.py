@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Unit tests for config_watch.py
+
+Runs the watchers against a temporary file with writes made from a
+background thread, the way an editor saves animation-config.json.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from config_watch import InotifyWatcher, PollingWatcher, open_watcher, watch
+
+
+def inotify_available():
+    """True if an InotifyWatcher can be created here."""
+    try:
+        InotifyWatcher(__file__).close()
+        return True
+    except (OSError, AttributeError, TypeError):
+        return False
+
+
+class WatcherTestCase(unittest.TestCase):
+    """Temporary config file shared by the watcher tests."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = Path(self.temp_dir) / 'animation-config.json'
+        self.path.write_text('{}')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def replace_file(self, text):
+        """Save the way many editors do: write a temp file and rename it."""
+        temp = self.path.with_suffix('.tmp')
+        temp.write_text(text)
+        os.replace(temp, self.path)
+
+
+class TestPollingWatcher(WatcherTestCase):
+    """Tests for PollingWatcher."""
+
+    def test_no_change_times_out(self):
+        """wait() returns False when nothing changed."""
+        watcher = PollingWatcher(self.path, interval_s=0.01)
+        self.assertFalse(watcher.wait(0.05))
+
+    def test_detects_write(self):
+        """A size change is seen on the next poll."""
+        watcher = PollingWatcher(self.path, interval_s=0.01)
+        self.path.write_text('{"changed": true}')
+        self.assertTrue(watcher.wait(0.5))
+        self.assertFalse(watcher.wait(0.05))
+
+    def test_detects_deletion(self):
+        """A missing file is a change, not an error."""
+        watcher = PollingWatcher(self.path, interval_s=0.01)
+        self.path.unlink()
+        self.assertTrue(watcher.wait(0.5))
+
+
+@unittest.skipUnless(inotify_available(), "inotify not available")
+class TestInotifyWatcher(WatcherTestCase):
+    """Tests for InotifyWatcher."""
+
+    def test_detects_in_place_write(self):
+        """Writing the file directly is seen."""
+        watcher = InotifyWatcher(self.path)
+        try:
+            self.path.write_text('{"a": 1}')
+            self.assertTrue(watcher.wait(1.0))
+        finally:
+            watcher.close()
+
+    def test_detects_rename_over(self):
+        """Atomic replace (temp file + rename) is seen."""
+        watcher = InotifyWatcher(self.path)
+        try:
+            self.replace_file('{"b": 2}')
+            self.assertTrue(watcher.wait(1.0))
+        finally:
+            watcher.close()
+
+    def test_ignores_other_files(self):
+        """Writes to neighbouring files do not trigger."""
+        watcher = InotifyWatcher(self.path)
+        try:
+            (Path(self.temp_dir) / 'other.json').write_text('{}')
+            self.assertFalse(watcher.wait(0.1))
+        finally:
+            watcher.close()
+
+
+class TestWatch(WatcherTestCase):
+    """Tests for the debounced watch() loop."""
+
+    def run_watch(self, on_change, writes, debounce_s=0.1):
+        """Run watch() in a thread while performing writes, then stop it."""
+        stop = threading.Event()
+        watcher = open_watcher(self.path)
+        thread = threading.Thread(target=watch, args=(self.path, on_change),
+                                  kwargs={'debounce_s': debounce_s, 'watcher': watcher,
+                                          'stop': stop})
+        thread.start()
+        try:
+            writes()
+            time.sleep(debounce_s * 3 + 0.5)
+        finally:
+            stop.set()
+            thread.join(timeout=5)
+        self.assertFalse(thread.is_alive())
+
+    def test_burst_calls_once(self):
+        """Several quick writes produce one regeneration."""
+        calls = []
+
+        def writes():
+            for i in range(5):
+                self.replace_file(f'{{"step": {i}}}')
+                time.sleep(0.01)
+
+        self.run_watch(lambda: calls.append(self.path.read_text()), writes)
+        self.assertEqual(calls, ['{"step": 4}'])
+
+    def test_separate_saves_call_twice(self):
+        """Saves further apart than the debounce each regenerate."""
+        calls = []
+
+        def writes():
+            self.replace_file('{"first": 1}')
+            time.sleep(0.8)
+            self.replace_file('{"second": 2}')
+
+        self.run_watch(lambda: calls.append(self.path.read_text()), writes)
+        self.assertEqual(calls, ['{"first": 1}', '{"second": 2}'])
+
+
+if __name__ == '__main__':
+    unittest.main()
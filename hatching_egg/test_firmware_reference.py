@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Unit tests for firmware_reference.py
+
+Checks the Python mirrors of the firmware math against hand-computed C
+results and against each other (indexed vs linear segment search,
+fixed-point vs float interpolation).
+"""
+
+import json
+import random
+import unittest
+from pathlib import Path
+
+from firmware_reference import (
+    c_div,
+    arduino_map,
+    degrees_to_pulse,
+    find_segment,
+    build_segment_index,
+    find_segment_indexed,
+    f32,
+    interpolate_float,
+    interpolate_fixed,
+    segment_reciprocal,
+    sample_pose,
+    scale_elapsed,
+    RECIP_ONE,
+    TIME_SCALE_ONE,
+)
+
+
+def load_config():
+    """Load the real animation configuration."""
+    with open(Path(__file__).parent / 'animation-config.json', 'r') as f:
+        return json.load(f)
+
+
+class TestIntegerMath(unittest.TestCase):
+    """Tests for c_div(), arduino_map() and degrees_to_pulse()."""
+
+    def test_c_div_truncates_toward_zero(self):
+        """-7 / 2 is -3 in C (Python's // gives -4)."""
+        self.assertEqual(c_div(7, 2), 3)
+        self.assertEqual(c_div(-7, 2), -3)
+        self.assertEqual(c_div(7, -2), -3)
+        self.assertEqual(c_div(-7, -2), 3)
+
+    def test_arduino_map_inverted_range(self):
+        """map(1, 0, 90, 440, 300) = -140 / 90 + 440 = 439."""
+        self.assertEqual(arduino_map(1, 0, 90, 440, 300), 439)
+
+    def test_degrees_to_pulse_constrains(self):
+        """Angles outside 0-90 are clamped before mapping."""
+        self.assertEqual(degrees_to_pulse(-10, 150, 330), 150)
+        self.assertEqual(degrees_to_pulse(120, 150, 330), 330)
+
+    def test_scale_elapsed(self):
+        """Q16 speed: 1.5x of 1000 ms is 1500 ms; unity scale is untouched."""
+        self.assertEqual(scale_elapsed(1000, 98304), 1500)
+        self.assertEqual(scale_elapsed(123456, TIME_SCALE_ONE), 123456)
+        self.assertEqual(scale_elapsed(0xFFFFFFFF, TIME_SCALE_ONE), 0xFFFFFFFF)
+
+
+class TestSegmentSearch(unittest.TestCase):
+    """Tests for find_segment() and the segment time index."""
+
+    def test_linear_scan_finds_segment(self):
+        """Should return the pair surrounding the elapsed time."""
+        times = [0, 100, 250, 400]
+        self.assertEqual(find_segment(times, 0), (0, 1))
+        self.assertEqual(find_segment(times, 120), (1, 2))
+        self.assertEqual(find_segment(times, 399), (2, 3))
+
+    def test_linear_scan_fallback(self):
+        """Past the last keyframe the firmware falls back to (0, 1)."""
+        self.assertEqual(find_segment([0, 100, 250], 300), (0, 1))
+
+    def test_index_covers_duration(self):
+        """Slots should cover every elapsed time up to the duration."""
+        index = build_segment_index([0, 1500, 3000], 3000, 7)
+        self.assertEqual(len(index), (3000 >> 7) + 1)
+
+    def test_index_matches_linear_scan_on_config(self):
+        """Indexed lookup equals the linear scan for every ms of every animation."""
+        for anim_id, anim in load_config()['animations'].items():
+            times = [kf['time_ms'] for kf in anim['keyframes']]
+            for shift in (4, 7, 10):
+                index = build_segment_index(times, anim['duration_ms'], shift)
+                for elapsed in range(anim['duration_ms'] + 50):
+                    self.assertEqual(
+                        find_segment_indexed(times, index, shift, elapsed),
+                        find_segment(times, elapsed),
+                        f"{anim_id} shift={shift} elapsed={elapsed}")
+
+    def test_index_matches_linear_scan_dense(self):
+        """Hundreds of keyframes, including repeated times."""
+        rng = random.Random(42)
+        times = [0]
+        for _ in range(600):
+            times.append(times[-1] + rng.choice([0, 1, 5, 17, 40, 300]))
+        index = build_segment_index(times, times[-1], 6)
+        for elapsed in range(0, times[-1] + 100, 3):
+            self.assertEqual(find_segment_indexed(times, index, 6, elapsed),
+                             find_segment(times, elapsed))
+
+    def test_index_bounds_scan_length(self):
+        """Scan from the slot start should be short even with many keyframes."""
+        times = list(range(0, 100000, 100))  # 1000 keyframes, one per 100 ms
+        index = build_segment_index(times, times[-1], 7)
+        for elapsed in range(0, times[-1], 37):
+            kf1, _ = find_segment(times, elapsed)
+            start = index[min(elapsed >> 7, len(index) - 1)]
+            self.assertLessEqual(kf1 - start, 2)
+
+    def test_single_keyframe(self):
+        """Animations with one keyframe index to segment 0."""
+        self.assertEqual(set(build_segment_index([0], 1000, 7)), {0})
+
+
+class TestFixedPointInterpolation(unittest.TestCase):
+    """Tests for the integer interpolation against the float firmware path."""
+
+    def test_f32_rounds_to_single_precision(self):
+        """0.1 is not representable; single precision differs from double."""
+        self.assertNotEqual(f32(0.1), 0.1)
+        self.assertEqual(f32(0.5), 0.5)
+
+    def test_float_path_truncates(self):
+        """(int) truncates toward zero for negative deltas too."""
+        self.assertEqual(interpolate_float(10, 0, 0, 3, 1), 7)   # 10 + (int)(-3.33)
+        self.assertEqual(interpolate_float(0, 10, 0, 3, 1), 3)   # 0 + (int)(3.33)
+
+    def test_float_path_clamps(self):
+        """Elapsed before or after the segment holds the end pose."""
+        self.assertEqual(interpolate_float(0, 40, 100, 200, 300), 40)
+        self.assertEqual(interpolate_float(0, 40, 100, 200, 50), 40)  # unsigned wrap
+
+    def test_reciprocal_rounds_up(self):
+        """ceil(2^24 / span); zero-length segments get 0."""
+        self.assertEqual(segment_reciprocal(1), RECIP_ONE)
+        self.assertEqual(segment_reciprocal(3), 5592406)
+        self.assertEqual(segment_reciprocal(0), 0)
+
+    def test_fixed_matches_segment_ends(self):
+        """Start and end of a segment are exact."""
+        recip = segment_reciprocal(1234)
+        self.assertEqual(interpolate_fixed(20, 50, recip, 0, 1234, 0), 20)
+        self.assertEqual(interpolate_fixed(20, 50, recip, 0, 1234, 1234), 70)
+
+    def test_fixed_within_one_degree_of_float_on_config(self):
+        """Integer path stays within ±1° of the float path for every ms of the config."""
+        for anim_id, anim in load_config()['animations'].items():
+            keyframes = anim['keyframes']
+            times = [kf['time_ms'] for kf in keyframes]
+            if len(keyframes) < 2:
+                continue
+            for elapsed in range(anim['duration_ms']):
+                kf1, kf2 = find_segment(times, elapsed)
+                t1, t2 = times[kf1], times[kf2]
+                recip = segment_reciprocal(t2 - t1)
+                for joint in ('left_shoulder_deg', 'left_elbow_deg',
+                              'right_shoulder_deg', 'right_elbow_deg'):
+                    a1, a2 = keyframes[kf1][joint], keyframes[kf2][joint]
+                    fixed = interpolate_fixed(a1, a2 - a1, recip, t1, t2, elapsed)
+                    expected = interpolate_float(a1, a2, t1, t2, elapsed)
+                    self.assertLessEqual(abs(fixed - expected), 1,
+                                         f"{anim_id} {joint} elapsed={elapsed}")
+
+    def test_fixed_within_one_degree_across_spans(self):
+        """Holds for short and 65 s segments and the full int8 delta range."""
+        for span in (1, 2, 7, 150, 1600, 4000, 65535):
+            recip = segment_reciprocal(span)
+            step = max(1, span // 97)
+            for delta in range(-128, 128, 5):
+                for offset in range(0, span + 1, step):
+                    self.assertLessEqual(
+                        abs(interpolate_fixed(0, delta, recip, 0, span, offset)
+                            - interpolate_float(0, delta, 0, span, offset)), 1,
+                        f"span={span} delta={delta} offset={offset}")
+
+
+class TestSamplePose(unittest.TestCase):
+    """Tests for sample_pose()."""
+
+    JOINTS = ('left_shoulder_deg', 'left_elbow_deg', 'right_shoulder_deg', 'right_elbow_deg')
+
+    def test_matches_per_joint_interpolation(self):
+        """Pose is interpolate_float() for every joint of the active segment."""
+        keyframes = load_config()['animations']['stabbing']['keyframes']
+        pose = sample_pose(keyframes, 275, self.JOINTS)
+        kf1, kf2 = keyframes[1], keyframes[2]
+        self.assertEqual(pose, tuple(
+            interpolate_float(kf1[j], kf2[j], kf1['time_ms'], kf2['time_ms'], 275)
+            for j in self.JOINTS))
+
+    def test_single_keyframe_holds(self):
+        """One keyframe holds its pose forever."""
+        keyframes = load_config()['animations']['max']['keyframes']
+        self.assertEqual(sample_pose(keyframes, 500, self.JOINTS), (90, 90, 90, 90))
+
+
+if __name__ == '__main__':
+    unittest.main()
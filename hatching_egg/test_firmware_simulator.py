@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Unit tests for firmware_simulator.py
+
+The event-driven simulator is checked against tick_loop(), a literal
+pass-by-pass port of hatching_egg.ino's setup() and loop().
+"""
+
+import random
+import unittest
+from pathlib import Path
+
+from config_model import load_config
+from firmware_simulator import (
+    IDLE_ANIMATIONS, MODE_IDLE, MODE_TRIGGERED, periodic_presses, simulate, trigger_edges
+)
+from generate_arduino_config import compile_triggered_sequence
+
+CONFIG_PATH = Path(__file__).parent / 'animation-config.json'
+
+
+def tick_loop(config, presses, until_ms, loop_period_ms=1):
+    """Run loop() once per period from millis() = 0, returning the event log."""
+    animations = config.animations
+    steps = compile_triggered_sequence(config.triggered_sequence, animations)
+    events = []
+    state = {}
+
+    def start(now, mode, index):
+        if mode == MODE_IDLE:
+            anim_id = IDLE_ANIMATIONS[index]
+            duration_ms = animations[anim_id].duration_ms
+        else:
+            anim_id, duration_ms = steps[index]['animation'], steps[index]['duration_ms']
+        state.update(mode=mode, index=index, start=now, duration=duration_ms)
+        events.append((now, 'start', (anim_id, mode, index)))
+
+    start(0, MODE_IDLE, 0)  # setup()
+    last_high = True
+    press = 0
+    for now in range(0, until_ms, loop_period_ms):
+        while press < len(presses) and presses[press][1] <= now:
+            press += 1
+        high = not (press < len(presses) and presses[press][0] <= now)
+        if last_high and not high:
+            events.append((now, 'trigger', None))
+            start(now, MODE_TRIGGERED, 0)
+        last_high = high
+
+        # updateAnimation()
+        if now - state['start'] >= state['duration']:
+            events.append((now, 'complete', None))
+            mode, index = state['mode'], state['index']
+            if mode == MODE_IDLE:
+                start(now, MODE_IDLE, 1 - index)
+            elif index + 1 < len(steps):
+                start(now, MODE_TRIGGERED, index + 1)
+            else:
+                start(now, MODE_IDLE, 0)
+    return events
+
+
+def random_presses(rng, until_ms):
+    presses, t = [], 0
+    while True:
+        t += rng.choice([rng.randint(0, 5), rng.randint(1, 3000), rng.randint(1, 60000)])
+        hold = rng.choice([rng.randint(1, 4), rng.randint(1, 500)])
+        if t + hold >= until_ms:
+            return presses
+        presses.append((t, t + hold))
+        t += hold
+
+
+class TestTriggerEdges(unittest.TestCase):
+    """Tests for turning press intervals into detected edges."""
+
+    def test_press_detected_on_next_pass(self):
+        """Passes every 4 ms see a press at 5 ms on the 8 ms pass."""
+        self.assertEqual(trigger_edges([(5, 100)], 4), ([8], 0, 0))
+
+    def test_short_press_between_passes_is_missed(self):
+        """A press released before the next pass never reads LOW."""
+        self.assertEqual(trigger_edges([(5, 7), (20, 30)], 4), ([20], 1, 0))
+
+    def test_bounce_without_high_pass_is_merged(self):
+        """A release and re-press between two passes is one edge."""
+        self.assertEqual(trigger_edges([(2, 9), (10, 20)], 4), ([4], 0, 1))
+
+    def test_overlapping_presses_raise(self):
+        """Unsorted or overlapping intervals are rejected."""
+        with self.assertRaises(ValueError):
+            trigger_edges([(10, 20), (15, 30)])
+        with self.assertRaises(ValueError):
+            trigger_edges([(10, 10)])
+
+
+class TestSimulate(unittest.TestCase):
+    """Tests for the event-driven state machine."""
+
+    def setUp(self):
+        self.config = load_config(CONFIG_PATH)
+        self.steps = compile_triggered_sequence(self.config.triggered_sequence,
+                                                self.config.animations)
+
+    def test_matches_tick_by_tick_loop(self):
+        """Random presses, including bounces and missed taps, over several periods."""
+        rng = random.Random(16)
+        for loop_period_ms in (1, 2, 3, 7):
+            until_ms = 600_000
+            presses = random_presses(rng, until_ms)
+            result = simulate(self.config, presses, until_ms, loop_period_ms, record=True)
+            expected = tick_loop(self.config, presses, until_ms, loop_period_ms)
+            self.assertEqual(result['events'], expected, f"loop period {loop_period_ms} ms")
+
+    def test_skipping_idle_cycles_keeps_counters(self):
+        """record=False skips idle cycles without changing any count or the final state."""
+        presses = periodic_presses(97_000, 20_000_000, hold_ms=50)
+        recorded = simulate(self.config, presses, 20_000_000, record=True)
+        skipped = simulate(self.config, presses, 20_000_000)
+        del recorded['events'], skipped['events']
+        self.assertEqual(skipped, recorded)
+
+    def test_sequence_runs_for_total_duration(self):
+        """One press plays every step, then idles again after the summed durations."""
+        result = simulate(self.config, [(1000, 1200)], 1000 + 120_000, record=True)
+        self.assertEqual(result['sequences_completed'], 1)
+        starts = [(t, detail) for t, kind, detail in result['events'] if kind == 'start']
+        triggered = [t for t, (_, mode, _) in starts if mode == MODE_TRIGGERED]
+        self.assertEqual(len(triggered), len(self.steps))
+        back_to_idle = next(t for t, (_, mode, _) in starts if mode == MODE_IDLE and t > 1000)
+        self.assertEqual(back_to_idle - 1000, sum(step['duration_ms'] for step in self.steps))
+
+    def test_retrigger_restarts_sequence(self):
+        """A press during the sequence counts as an interruption and starts over."""
+        result = simulate(self.config, [(1000, 1100), (5000, 5100)], 5500)
+        self.assertEqual(result['triggers'], 2)
+        self.assertEqual(result['sequences_interrupted'], 1)
+        self.assertEqual(result['state']['mode'], MODE_TRIGGERED)
+        self.assertEqual(result['state']['step'], 0)
+        self.assertEqual(result['state']['started_ms'], 5000)
+
+    def test_trigger_wins_tie_with_completion(self):
+        """A press on the pass where resting would complete restarts the sequence."""
+        resting_ms = self.config.animations['resting'].duration_ms
+        result = simulate(self.config, [(resting_ms, resting_ms + 100)], resting_ms + 1,
+                          record=True)
+        self.assertEqual(result['events'], [
+            (0, 'start', ('resting', MODE_IDLE, 0)),
+            (resting_ms, 'trigger', None),
+            (resting_ms, 'start', (self.steps[0]['animation'], MODE_TRIGGERED, 0)),
+        ])
+
+    def test_idle_only_operation(self):
+        """With no presses the firmware alternates resting and slow_struggle forever."""
+        animations = self.config.animations
+        cycle_ms = sum(animations[anim_id].duration_ms for anim_id in IDLE_ANIMATIONS)
+        result = simulate(self.config, until_ms=1000 * cycle_ms + 1)
+        self.assertEqual(result['idle_cycles'], 1000)
+        self.assertEqual(result['plays'], {'resting': 1001, 'slow_struggle': 1000})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -11,16 +11,96 @@ Tests all four main functions:
 Coverage target: 80%+
 """
 
+import argparse
+import copy
+import random
+import re
+import shutil
 import unittest
 import json
+import os
 import tempfile
+from dataclasses import replace
 from pathlib import Path
 from generate_arduino_config import (
     generate_header_lines,
+    generate_pwm_tables,
     generate_animation_structures,
     generate_animation_data,
-    generate_arduino_header
+    generate_arduino_header,
+    stream_arduino_header,
+    keyframe_size,
+    generate_segment_index,
+    segment_index_report,
+    generate_fixed_point_segments,
+    generate_raster_tables,
+    choose_raster_animations,
+    raster_report,
+    keyframe_flash_report,
+    format_flash_report,
+    build_pose_pool,
+    pose_ref_type,
+    pose_pool_report,
+    simplify_keyframes,
+    simplify_animations,
+    simplification_report,
+    compile_triggered_sequence,
+    generate_triggered_sequence,
+    keyframe_columns,
+    keyframe_row,
+    keyframe_rows,
+    format_keyframe_columns,
+    np,
+    avr_sizeof,
+    flash_usage,
+    check_flash_budget,
+    parse_byte_count,
+    AVR_TYPE_SIZES,
+    servo_channel_groups,
+    channel_register,
+    burst_write_bytes,
+    generate_channel_groups,
+    format_channel_groups,
+    SERVOS,
 )
+from config_model import (
+    Animation,
+    Keyframes,
+    KinematicsConfig,
+    TriggeredStep,
+    load_config,
+    parse_animation,
+    parse_hardware,
+)
+from firmware_reference import scale_elapsed
+
+HARDWARE = {
+    'i2c_address': '0x40',
+    'servo_frequency': 50,
+    'left_leg': {
+        'shoulder_channel': 14,
+        'elbow_channel': 15,
+        'shoulder_min_pulse': 440,
+        'shoulder_max_pulse': 300,
+        'elbow_min_pulse': 530,
+        'elbow_max_pulse': 360
+    },
+    'right_leg': {
+        'shoulder_channel': 1,
+        'elbow_channel': 0,
+        'shoulder_min_pulse': 150,
+        'shoulder_max_pulse': 280,
+        'elbow_min_pulse': 150,
+        'elbow_max_pulse': 330
+    },
+    'trigger_pin': 9
+}
+
+
+def model(animations):
+    """Typed {anim_id: Animation} from animations in the animation-config.json schema."""
+    return {anim_id: parse_animation(anim, f"animations.{anim_id}")
+            for anim_id, anim in animations.items()}
 
 
 class TestGenerateHeaderLines(unittest.TestCase):
@@ -28,27 +108,7 @@ class TestGenerateHeaderLines(unittest.TestCase):
 
     def setUp(self):
         """Set up test data for hardware and kinematics configuration."""
-        self.hw = {
-            'i2c_address': '0x40',
-            'servo_frequency': 50,
-            'left_leg': {
-                'shoulder_channel': 14,
-                'elbow_channel': 15,
-                'shoulder_min_pulse': 440,
-                'shoulder_max_pulse': 300,
-                'elbow_min_pulse': 530,
-                'elbow_max_pulse': 360
-            },
-            'right_leg': {
-                'shoulder_channel': 1,
-                'elbow_channel': 0,
-                'shoulder_min_pulse': 150,
-                'shoulder_max_pulse': 280,
-                'elbow_min_pulse': 150,
-                'elbow_max_pulse': 330
-            },
-            'trigger_pin': 9
-        }
+        self.hw = copy.deepcopy(HARDWARE)
         self.kin = {
             'upper_segment_length': 80,
             'lower_segment_length': 100,
@@ -58,37 +118,40 @@ class TestGenerateHeaderLines(unittest.TestCase):
             'elbow_max_angle': 90
         }
 
+    def header_lines(self):
+        return generate_header_lines(parse_hardware(self.hw), KinematicsConfig(**self.kin))
+
     def test_generates_header_guard(self):
         """Should include header guard defines."""
-        lines = generate_header_lines(self.hw, self.kin)
+        lines = self.header_lines()
         self.assertIn('#ifndef ANIMATION_CONFIG_H', lines)
         self.assertIn('#define ANIMATION_CONFIG_H', lines)
 
     def test_generates_auto_generated_comment(self):
         """Should include auto-generated warning comment."""
-        lines = generate_header_lines(self.hw, self.kin)
+        lines = self.header_lines()
         self.assertIn('// AUTO-GENERATED - DO NOT EDIT', lines)
         self.assertIn('// Generated from animation-config.json', lines)
 
     def test_generates_i2c_address(self):
         """Should generate I2C address define."""
-        lines = generate_header_lines(self.hw, self.kin)
+        lines = self.header_lines()
         self.assertIn('#define I2C_ADDRESS 0x40', lines)
 
     def test_generates_servo_frequency(self):
         """Should generate servo frequency define."""
-        lines = generate_header_lines(self.hw, self.kin)
+        lines = self.header_lines()
         self.assertIn('#define SERVO_FREQ 50', lines)
 
     def test_generates_left_leg_channels(self):
         """Should generate left leg servo channel defines."""
-        lines = generate_header_lines(self.hw, self.kin)
+        lines = self.header_lines()
         self.assertIn('#define LEFT_SHOULDER_CHANNEL 14', lines)
         self.assertIn('#define LEFT_ELBOW_CHANNEL 15', lines)
 
     def test_generates_left_leg_pulses(self):
         """Should generate left leg pulse width defines."""
-        lines = generate_header_lines(self.hw, self.kin)
+        lines = self.header_lines()
         self.assertIn('#define LEFT_SHOULDER_MIN_PULSE 440', lines)
         self.assertIn('#define LEFT_SHOULDER_MAX_PULSE 300', lines)
         self.assertIn('#define LEFT_ELBOW_MIN_PULSE 530', lines)
@@ -96,13 +159,13 @@ class TestGenerateHeaderLines(unittest.TestCase):
 
     def test_generates_right_leg_channels(self):
         """Should generate right leg servo channel defines."""
-        lines = generate_header_lines(self.hw, self.kin)
+        lines = self.header_lines()
         self.assertIn('#define RIGHT_SHOULDER_CHANNEL 1', lines)
         self.assertIn('#define RIGHT_ELBOW_CHANNEL 0', lines)
 
     def test_generates_right_leg_pulses(self):
         """Should generate right leg pulse width defines."""
-        lines = generate_header_lines(self.hw, self.kin)
+        lines = self.header_lines()
         self.assertIn('#define RIGHT_SHOULDER_MIN_PULSE 150', lines)
         self.assertIn('#define RIGHT_SHOULDER_MAX_PULSE 280', lines)
         self.assertIn('#define RIGHT_ELBOW_MIN_PULSE 150', lines)
@@ -110,18 +173,18 @@ class TestGenerateHeaderLines(unittest.TestCase):
 
     def test_generates_trigger_pin(self):
         """Should generate trigger pin define."""
-        lines = generate_header_lines(self.hw, self.kin)
+        lines = self.header_lines()
         self.assertIn('#define TRIGGER_PIN 9', lines)
 
     def test_generates_kinematics_lengths(self):
         """Should generate segment length defines."""
-        lines = generate_header_lines(self.hw, self.kin)
+        lines = self.header_lines()
         self.assertIn('#define UPPER_SEGMENT_LENGTH 80', lines)
         self.assertIn('#define LOWER_SEGMENT_LENGTH 100', lines)
 
     def test_generates_kinematics_angles(self):
         """Should generate angle limit defines."""
-        lines = generate_header_lines(self.hw, self.kin)
+        lines = self.header_lines()
         self.assertIn('#define SHOULDER_MIN_ANGLE 0', lines)
         self.assertIn('#define SHOULDER_MAX_ANGLE 90', lines)
         self.assertIn('#define ELBOW_MIN_ANGLE 0', lines)
@@ -129,7 +192,7 @@ class TestGenerateHeaderLines(unittest.TestCase):
 
     def test_returns_list_of_strings(self):
         """Should return a list of strings."""
-        lines = generate_header_lines(self.hw, self.kin)
+        lines = self.header_lines()
         self.assertIsInstance(lines, list)
         self.assertTrue(all(isinstance(line, str) for line in lines))
 
@@ -137,11 +200,98 @@ class TestGenerateHeaderLines(unittest.TestCase):
         """Should handle different numeric values correctly."""
         self.hw['servo_frequency'] = 60
         self.kin['upper_segment_length'] = 120
-        lines = generate_header_lines(self.hw, self.kin)
+        lines = self.header_lines()
         self.assertIn('#define SERVO_FREQ 60', lines)
         self.assertIn('#define UPPER_SEGMENT_LENGTH 120', lines)
 
 
+class TestGeneratePwmTables(unittest.TestCase):
+    """Tests for generate_pwm_tables() function."""
+
+    def setUp(self):
+        """Set up calibrated pulse ranges."""
+        self.hw = parse_hardware(HARDWARE)
+
+    def test_generates_table_per_servo(self):
+        """Should emit one PROGMEM table per servo."""
+        content = '\n'.join(generate_pwm_tables(self.hw))
+        self.assertIn('#define PWM_TABLE_SIZE 91', content)
+        for prefix in ('LEFT_SHOULDER', 'LEFT_ELBOW', 'RIGHT_SHOULDER', 'RIGHT_ELBOW'):
+            self.assertIn(f'const uint16_t {prefix}_PWM[PWM_TABLE_SIZE] PROGMEM = {{', content)
+
+    def test_table_endpoints(self):
+        """0° and 90° should map to the calibrated min/max pulses."""
+        lines = generate_pwm_tables(self.hw)
+        start = lines.index('const uint16_t RIGHT_ELBOW_PWM[PWM_TABLE_SIZE] PROGMEM = {')
+        self.assertTrue(lines[start + 1].startswith('  150, 152,'))
+        self.assertEqual(lines[start + 10], '  330,')
+
+
+class TestChannelGroups(unittest.TestCase):
+    """Tests for PCA9685 burst-write grouping of servo channels."""
+
+    def setUp(self):
+        """Load the real hardware map (CH0/CH1 right leg, CH14/CH15 left leg)."""
+        config_path = Path(__file__).parent / 'animation-config.json'
+        self.hw = load_config(config_path).hardware
+
+    def with_channels(self, **channels):
+        hw = self.hw
+        for key, channel in channels.items():
+            leg, joint = key.rsplit('_', 1)
+            servo = replace(hw.servo(leg, joint), channel=channel)
+            hw = replace(hw, **{leg: replace(getattr(hw, leg), **{joint: servo})})
+        return hw
+
+    def test_config_groups_adjacent_legs(self):
+        """Each leg's two channels are adjacent, so the config needs two bursts."""
+        groups = servo_channel_groups(self.hw)
+        self.assertEqual(groups, [['RIGHT_ELBOW', 'RIGHT_SHOULDER'],
+                                  ['LEFT_SHOULDER', 'LEFT_ELBOW']])
+        channel = {prefix: self.hw.servo(leg, joint).channel for prefix, leg, joint in SERVOS}
+        for group in groups:
+            first = channel[group[0]]
+            self.assertEqual([channel[prefix] for prefix in group],
+                             list(range(first, first + len(group))))
+
+    def test_savings_per_frame(self):
+        """Four 6-byte setPWM writes (24B) become two 10-byte bursts (20B)."""
+        self.assertEqual(burst_write_bytes(servo_channel_groups(self.hw)), (24, 20))
+        self.assertIn('20B vs 24B per full frame (4B, 17% saved; 2 writes instead of 4)',
+                      format_channel_groups(self.hw))
+
+    def test_non_adjacent_channels_stay_separate(self):
+        """Gaps split groups; a chain of four consecutive channels is one burst."""
+        spread = self.with_channels(left_leg_shoulder=3, left_leg_elbow=5,
+                                    right_leg_shoulder=7, right_leg_elbow=9)
+        self.assertEqual(len(servo_channel_groups(spread)), 4)
+        self.assertEqual(burst_write_bytes(servo_channel_groups(spread)), (24, 24))
+        chain = self.with_channels(left_leg_shoulder=4, left_leg_elbow=5,
+                                   right_leg_shoulder=6, right_leg_elbow=7)
+        self.assertEqual(servo_channel_groups(chain),
+                         [['LEFT_SHOULDER', 'LEFT_ELBOW', 'RIGHT_SHOULDER', 'RIGHT_ELBOW']])
+        self.assertEqual(len(servo_channel_groups(chain, max_channels=3)), 2)
+
+    def test_registers_and_slots(self):
+        """Group registers are LED0_ON_L + 4 * channel; slots follow channel order."""
+        self.assertEqual(channel_register(0), 0x06)
+        self.assertEqual(channel_register(14), 0x3E)
+        content = '\n'.join(generate_channel_groups(self.hw))
+        self.assertIn('#define SERVO_GROUP_COUNT 2', content)
+        self.assertIn('#define SERVO_GROUP_0_REGISTER 0x06', content)
+        self.assertIn('#define SERVO_GROUP_1_CHANNEL 14', content)
+        self.assertIn('#define SERVO_GROUP_1_REGISTER 0x3E', content)
+        self.assertIn('#define RIGHT_SHOULDER_GROUP_SLOT 1', content)
+        self.assertIn('#define LEFT_ELBOW_GROUP 1', content)
+
+    def test_invalid_channels_raise(self):
+        """Shared or out-of-range channels are rejected."""
+        with self.assertRaises(ValueError):
+            servo_channel_groups(self.with_channels(left_leg_elbow=1))
+        with self.assertRaises(ValueError):
+            servo_channel_groups(self.with_channels(left_leg_elbow=16))
+
+
 class TestGenerateAnimationStructures(unittest.TestCase):
     """Tests for generate_animation_structures() function."""
 
@@ -225,21 +375,21 @@ class TestGenerateAnimationData(unittest.TestCase):
 
     def test_generates_animation_name_strings(self):
         """Should generate PROGMEM name strings for each animation."""
-        lines = generate_animation_data(self.animations)
+        lines = generate_animation_data(model(self.animations))
         content = '\n'.join(lines)
         self.assertIn('const char ZERO_NAME[] PROGMEM = "Zero Position";', content)
         self.assertIn('const char TEST_NAME[] PROGMEM = "Test Animation";', content)
 
     def test_generates_keyframe_arrays(self):
         """Should generate keyframe arrays for each animation."""
-        lines = generate_animation_data(self.animations)
+        lines = generate_animation_data(model(self.animations))
         content = '\n'.join(lines)
         self.assertIn('const Keyframe ZERO_KEYFRAMES[] PROGMEM = {', content)
         self.assertIn('const Keyframe TEST_KEYFRAMES[] PROGMEM = {', content)
 
     def test_generates_keyframe_data(self):
         """Should generate keyframe data with correct values."""
-        lines = generate_animation_data(self.animations)
+        lines = generate_animation_data(model(self.animations))
         content = '\n'.join(lines)
         # Check zero animation keyframe
         self.assertIn('{0, 0, 0, 0, 0}', content)
@@ -249,34 +399,34 @@ class TestGenerateAnimationData(unittest.TestCase):
 
     def test_generates_animation_array(self):
         """Should generate ANIMATIONS array."""
-        lines = generate_animation_data(self.animations)
+        lines = generate_animation_data(model(self.animations))
         content = '\n'.join(lines)
         self.assertIn('const Animation ANIMATIONS[] PROGMEM = {', content)
 
     def test_generates_animation_entries(self):
         """Should generate entries in animation array."""
-        lines = generate_animation_data(self.animations)
+        lines = generate_animation_data(model(self.animations))
         content = '\n'.join(lines)
         self.assertIn('ZERO_NAME', content)
         self.assertIn('TEST_NAME', content)
 
     def test_loop_flag_true(self):
         """Should generate 'true' for looping animations."""
-        lines = generate_animation_data(self.animations)
+        lines = generate_animation_data(model(self.animations))
         content = '\n'.join(lines)
         # zero animation has loop=true
         self.assertIn('{ZERO_NAME, 1000, true, 1, ZERO_KEYFRAMES}', content)
 
     def test_loop_flag_false(self):
         """Should generate 'false' for non-looping animations."""
-        lines = generate_animation_data(self.animations)
+        lines = generate_animation_data(model(self.animations))
         content = '\n'.join(lines)
         # test animation has loop=false
         self.assertIn('{TEST_NAME, 2000, false, 2, TEST_KEYFRAMES}', content)
 
     def test_keyframe_count_correct(self):
         """Should include correct keyframe count."""
-        lines = generate_animation_data(self.animations)
+        lines = generate_animation_data(model(self.animations))
         content = '\n'.join(lines)
         # zero has 1 keyframe
         self.assertIn('true, 1, ZERO_KEYFRAMES', content)
@@ -304,13 +454,13 @@ class TestGenerateAnimationData(unittest.TestCase):
                 ]
             }
         }
-        lines = generate_animation_data(multi_keyframe_anim)
+        lines = generate_animation_data(model(multi_keyframe_anim))
         content = '\n'.join(lines)
         self.assertIn('true, 10, MULTI_KEYFRAMES', content)
 
     def test_uppercase_animation_ids(self):
         """Should convert animation IDs to uppercase for constants."""
-        lines = generate_animation_data(self.animations)
+        lines = generate_animation_data(model(self.animations))
         content = '\n'.join(lines)
         self.assertIn('ZERO_NAME', content)
         self.assertIn('ZERO_KEYFRAMES', content)
@@ -319,7 +469,7 @@ class TestGenerateAnimationData(unittest.TestCase):
 
     def test_returns_list_of_strings(self):
         """Should return a list of strings."""
-        lines = generate_animation_data(self.animations)
+        lines = generate_animation_data(model(self.animations))
         self.assertIsInstance(lines, list)
         self.assertTrue(all(isinstance(line, str) for line in lines))
 
@@ -494,26 +644,661 @@ class TestGenerateArduinoHeader(unittest.TestCase):
         with self.assertRaises(FileNotFoundError):
             generate_arduino_header(self.config_path, nested_output)
 
+    def test_packed_output(self):
+        """Should emit the packed Keyframe struct when packed=True."""
+        generate_arduino_header(self.config_path, self.output_path, packed=True)
+        content = self.output_path.read_text()
+        self.assertIn('uint16_t time_ms;', content)
+        self.assertIn('{0, 10, 20, 30, 40},', content)
+
     def test_output_has_newline_at_end(self):
         """Should end output file with newline."""
         generate_arduino_header(self.config_path, self.output_path)
         content = self.output_path.read_text()
         self.assertTrue(content.endswith('\n'))
 
+    def test_stream_output_identical(self):
+        """The streaming path writes the same bytes for both encodings."""
+        streamed = Path(self.temp_dir) / 'streamed.h'
+        for packed in (False, True):
+            generate_arduino_header(self.config_path, self.output_path, packed=packed)
+            stream_arduino_header(self.config_path, streamed, packed=packed)
+            self.assertEqual(streamed.read_bytes(), self.output_path.read_bytes())
+
+    def test_stream_real_config_identical(self):
+        """Byte-identical on the shipped config (with its triggered sequence)."""
+        config_path = Path(__file__).parent / 'animation-config.json'
+        streamed = Path(self.temp_dir) / 'streamed.h'
+        generate_arduino_header(config_path, self.output_path)
+        stream_arduino_header(config_path, streamed)
+        self.assertEqual(streamed.read_bytes(), self.output_path.read_bytes())
+
+    def test_loop_defaults_to_false(self):
+        """An animation without 'loop' does not loop, on both paths."""
+        del self.config_data['animations']['zero']['loop']
+        with open(self.config_path, 'w') as f:
+            json.dump(self.config_data, f)
+        streamed = Path(self.temp_dir) / 'streamed.h'
+        generate_arduino_header(self.config_path, self.output_path)
+        stream_arduino_header(self.config_path, streamed)
+        self.assertIn('{ZERO_NAME, 1000, false, 1, ZERO_KEYFRAMES}', self.output_path.read_text())
+        self.assertEqual(streamed.read_bytes(), self.output_path.read_bytes())
 
-class TestEdgeCases(unittest.TestCase):
-    """Tests for edge cases and error conditions."""
+    def test_stream_validates_packed_rows(self):
+        """Packed range errors are raised while streaming and leave no temp files."""
+        self.config_data['animations']['zero']['keyframes'][0]['left_elbow_deg'] = 300
+        with open(self.config_path, 'w') as f:
+            json.dump(self.config_data, f)
+        with self.assertRaises(ValueError):
+            stream_arduino_header(self.config_path, self.output_path, packed=True)
+        self.assertEqual(sorted(p.name for p in Path(self.temp_dir).iterdir()),
+                         ['test_config.json'])
+
+    def test_stream_validates_like_load_config(self):
+        """Missing or empty keyframes and bad keyframe values name the field."""
+        cases = [
+            (lambda anim: anim.pop('keyframes'), "animations.zero: missing 'keyframes'"),
+            (lambda anim: anim.update(keyframes=[]),
+             "animations.zero.keyframes: expected at least one keyframe"),
+            (lambda anim: anim['keyframes'][0].pop('right_elbow_deg'),
+             "animations.zero.keyframes[0]: missing 'right_elbow_deg'"),
+            (lambda anim: anim['keyframes'][0].update(time_ms=1.5),
+             "animations.zero.keyframes[0].time_ms: expected int"),
+        ]
+        for mutate, message in cases:
+            data = json.loads(json.dumps(self.config_data))
+            mutate(data['animations']['zero'])
+            with open(self.config_path, 'w') as f:
+                json.dump(data, f)
+            with self.assertRaises(ValueError, msg=message) as cm:
+                stream_arduino_header(self.config_path, self.output_path)
+            self.assertIn(message, str(cm.exception))
+
+    def test_writes_every_target(self):
+        """A list of outputs gets identical headers from one render."""
+        second = Path(self.temp_dir) / 'second.h'
+        generate_arduino_header(self.config_path, [self.output_path, second])
+        self.assertEqual(self.output_path.read_bytes(), second.read_bytes())
+
+    def test_unchanged_header_not_rewritten(self):
+        """Matching content leaves the file (and its mtime) alone."""
+        generate_arduino_header(self.config_path, self.output_path)
+        os.utime(self.output_path, (1000000000, 1000000000))
+        generate_arduino_header(self.config_path, self.output_path)
+        self.assertEqual(self.output_path.stat().st_mtime, 1000000000)
 
-    def test_empty_keyframes_list(self):
-        """Should handle animations with empty keyframes list."""
-        animations = {
-            'empty': {
-                'name': 'Empty',
+    def test_changed_header_rewritten(self):
+        """Different content replaces the file."""
+        self.output_path.write_text('stale')
+        generate_arduino_header(self.config_path, self.output_path)
+        self.assertIn('#define ANIMATION_CONFIG_H', self.output_path.read_text())
+
+
+class TestPackedEncoding(unittest.TestCase):
+    """Tests for the --packed keyframe encoding."""
+
+    def setUp(self):
+        """Set up a small two-keyframe animation."""
+        self.animations = {
+            'test': {
+                'name': 'Test Animation',
+                'duration_ms': 2000,
+                'loop': False,
+                'keyframes': [
+                    {'time_ms': 0, 'left_shoulder_deg': 10, 'left_elbow_deg': 20,
+                     'right_shoulder_deg': 30, 'right_elbow_deg': 40},
+                    {'time_ms': 1000, 'left_shoulder_deg': 50, 'left_elbow_deg': 60,
+                     'right_shoulder_deg': 70, 'right_elbow_deg': 80},
+                ]
+            }
+        }
+
+    def test_keyframe_sizes(self):
+        """Wide keyframes are 12 bytes on AVR, packed keyframes 6."""
+        self.assertEqual(keyframe_size(), 12)
+        self.assertEqual(keyframe_size(packed=True), 6)
+
+    def test_packed_struct(self):
+        """Should emit uint16_t time and uint8_t angles."""
+        content = '\n'.join(generate_animation_structures(packed=True))
+        self.assertIn('uint16_t time_ms;', content)
+        self.assertIn('uint8_t left_shoulder_deg;', content)
+        self.assertIn('uint8_t right_elbow_deg;', content)
+        self.assertNotIn('unsigned long time_ms;', content)
+
+    def test_accessors_match_encoding(self):
+        """PROGMEM accessors should read the field widths that were emitted."""
+        wide = '\n'.join(generate_animation_structures())
+        packed = '\n'.join(generate_animation_structures(packed=True))
+        self.assertIn('pgm_read_dword(&(kf).time_ms)', wide)
+        self.assertIn('pgm_read_word(&(kf).joint)', wide)
+        self.assertIn('pgm_read_word(&(kf).time_ms)', packed)
+        self.assertIn('pgm_read_byte(&(kf).joint)', packed)
+
+    def test_packed_rows_unchanged(self):
+        """Packed encoding should emit the same initializer rows."""
+        wide = generate_animation_data(model(self.animations))
+        packed = generate_animation_data(model(self.animations), packed=True)
+        self.assertEqual(wide, packed)
+
+    def test_rejects_time_overflow(self):
+        """Times above 65535 ms do not fit uint16_t."""
+        self.animations['test']['keyframes'][1]['time_ms'] = 70000
+        with self.assertRaises(ValueError) as ctx:
+            generate_animation_data(model(self.animations), packed=True)
+        self.assertIn('time_ms 70000', str(ctx.exception))
+
+    def test_rejects_negative_angle(self):
+        """Negative angles do not fit uint8_t."""
+        self.animations['test']['keyframes'][0]['left_elbow_deg'] = -5
+        with self.assertRaises(ValueError) as ctx:
+            generate_animation_data(model(self.animations), packed=True)
+        self.assertIn('left_elbow_deg -5', str(ctx.exception))
+
+    def test_flash_report(self):
+        """Report should count bytes for both encodings per animation."""
+        report = keyframe_flash_report(model(self.animations))
+        self.assertEqual(report, [('test', 2, 24, 12)])
+        lines = format_flash_report(report)
+        self.assertIn('saves 12B', lines[-1])
+
+
+@unittest.skipUnless(np is not None, "NumPy not installed")
+class TestBulkKeyframeRows(unittest.TestCase):
+    """Tests for the NumPy columnar keyframe formatter."""
+
+    FIELDS = ['time_ms', 'left_shoulder_deg', 'left_elbow_deg',
+              'right_shoulder_deg', 'right_elbow_deg']
+
+    def random_keyframes(self, rng, count, largest):
+        return [tuple(rng.randint(-largest, largest) for _ in self.FIELDS)
+                for _ in range(count)]
+
+    def test_matches_per_row_formatting(self):
+        """Bulk rows equal keyframe_row() for any digit counts and signs."""
+        rng = random.Random(12)
+        for largest in (0, 9, 90, 65535, 10 ** 9, 2 ** 62):
+            keyframes = self.random_keyframes(rng, 300, largest)
+            self.assertEqual(format_keyframe_columns(keyframe_columns(keyframes)),
+                             [keyframe_row(kf) for kf in keyframes], f"largest={largest}")
+
+    def test_non_integer_values_use_per_row_path(self):
+        """Floats cannot be columns; keyframe_rows() falls back to keyframe_row()."""
+        keyframes = self.random_keyframes(random.Random(3), 300, 90)
+        keyframes[7] = keyframes[7][:2] + (12.5,) + keyframes[7][3:]
+        self.assertIsNone(keyframe_columns(keyframes))
+        self.assertEqual(keyframe_rows(keyframes, keyframe_columns(keyframes))[7],
+                         keyframe_row(keyframes[7]))
+
+    def test_packed_output_unchanged(self):
+        """Packed output (the columnar path) equals the default encoding's rows."""
+        keyframes = [{field: (i * 7 + j) % 90 for j, field in enumerate(self.FIELDS)}
+                     for i in range(1000)]
+        for i, kf in enumerate(keyframes):
+            kf['time_ms'] = i * 10
+        animations = {'big': {'name': 'Big', 'duration_ms': 10000, 'loop': True,
+                              'keyframes': keyframes}}
+        self.assertEqual(generate_animation_data(model(animations), packed=True),
+                         generate_animation_data(model(animations)))
+
+
+class TestPosePool(unittest.TestCase):
+    """Tests for the --pooled shared pose encoding."""
+
+    def setUp(self):
+        """Set up two animations sharing a mirrored pose."""
+        def kf(t, ls, le, rs, re):
+            return {'time_ms': t, 'left_shoulder_deg': ls, 'left_elbow_deg': le,
+                    'right_shoulder_deg': rs, 'right_elbow_deg': re}
+        self.animations = {
+            'first': {'name': 'First', 'duration_ms': 1000, 'loop': True,
+                      'keyframes': [kf(0, 5, 10, 5, 10), kf(500, 20, 30, 40, 50),
+                                    kf(1000, 5, 10, 5, 10)]},
+            'second': {'name': 'Second', 'duration_ms': 1000, 'loop': True,
+                       'keyframes': [kf(0, 5, 10, 5, 10), kf(1000, 60, 70, 60, 70)]},
+        }
+
+    def test_pool_interns_and_mirrors(self):
+        """Repeated poses share one entry; mirrored poses store two angles."""
+        pool, refs, owners = build_pose_pool(model(self.animations))
+        self.assertEqual(pool, [5, 10, 20, 30, 40, 50, 60, 70])
+        self.assertEqual(refs, {(5, 10, 5, 10): 1, (20, 30, 40, 50): 4, (60, 70, 60, 70): 13})
+        self.assertEqual(owners[(60, 70, 60, 70)], 'second')
+
+    def test_reference_type_grows_with_pool(self):
+        """References are uint8_t until offsets no longer fit."""
+        self.assertEqual(pose_ref_type({(0, 0, 0, 0): 255}), 'uint8_t')
+        self.assertEqual(pose_ref_type({(0, 0, 0, 0): 256}), 'uint16_t')
+
+    def test_pooled_struct_and_accessor(self):
+        """Keyframes hold a pose reference read through poseDeg()."""
+        content = '\n'.join(generate_animation_structures(packed=True, pose_ref_type='uint8_t'))
+        self.assertIn('uint8_t pose;', content)
+        self.assertNotIn('left_shoulder_deg;', content)
+        self.assertIn('poseDeg(pgm_read_byte(&(kf).pose), POSE_JOINT_##joint)', content)
+        self.assertIn('#define POSE_JOINT_right_elbow_deg 3', content)
+
+    def test_pooled_rows(self):
+        """Rows carry the time and pose reference, with the angles as a comment."""
+        lines = generate_animation_data(model(self.animations), pooled=True)
+        self.assertIn('const uint8_t POSE_POOL[] PROGMEM = {', lines)
+        self.assertIn('  5, 10, 20, 30, 40, 50, 60, 70,', lines)
+        self.assertIn('  {500, 4},  // 20, 30, 40, 50', lines)
+        self.assertIn('  {1000, 13},  // 60, 70, 60, 70', lines)
+
+    def test_rejects_angles_outside_uint8(self):
+        """Pool entries are uint8_t."""
+        self.animations['second']['keyframes'][1]['left_elbow_deg'] = 300
+        with self.assertRaises(ValueError):
+            build_pose_pool(model(self.animations))
+
+    def test_report_charges_pool_to_first_user(self):
+        """Pool bytes are counted once, against the animation that introduced the pose."""
+        report = pose_pool_report(model(self.animations))
+        self.assertEqual(report, [('first', 3, 36, 3 * 5 + 6), ('second', 2, 24, 2 * 5 + 2)])
+        self.assertEqual(sum(row[3] for row in report),
+                         5 * 5 + len(build_pose_pool(model(self.animations))[0]))
+
+
+class TestSimplification(unittest.TestCase):
+    """Tests for the --simplify keyframe reduction."""
+
+    @staticmethod
+    def kf(t, ls, le=0, rs=0, re=0):
+        return (t, ls, le, rs, re)
+
+    def test_collinear_keyframes_dropped(self):
+        """A dense straight ramp reduces to its end points."""
+        keyframes = [self.kf(t, t // 10) for t in range(0, 901, 10)]
+        self.assertEqual(simplify_keyframes(keyframes, 0.5), [keyframes[0], keyframes[-1]])
+
+    def test_corner_kept_on_any_joint(self):
+        """A corner on one joint keeps the keyframe even if the others are straight."""
+        keyframes = [self.kf(0, 0, 0), self.kf(500, 50, 40), self.kf(1000, 100, 0)]
+        self.assertEqual(len(simplify_keyframes(keyframes, 5)), 3)
+        self.assertEqual(len(simplify_keyframes(keyframes, 40)), 2)
+
+    def test_jumps_preserved(self):
+        """Keyframes sharing a time with a segment end are never dropped."""
+        keyframes = [self.kf(0, 0), self.kf(500, 10), self.kf(500, 80), self.kf(1000, 80)]
+        self.assertEqual(simplify_keyframes(keyframes, 90), keyframes)
+
+    def test_error_bounded_on_dense_motion(self):
+        """Firmware-level error stays within tolerance plus 1° of truncation."""
+        rng = random.Random(7)
+        keyframes, deg = [], [45, 45, 45, 45]
+        for t in range(0, 4000, 20):
+            deg = [max(0, min(90, d + rng.randint(-2, 2))) for d in deg]
+            keyframes.append(self.kf(t, *deg))
+        animations = {'dense': Animation('Dense', 3980, True, Keyframes.from_rows(keyframes))}
+        for tolerance in (1, 3, 6):
+            simplified = simplify_animations(animations, tolerance)
+            [(_, before, after, error)] = simplification_report(animations, simplified)
+            self.assertLess(after, before)
+            self.assertLessEqual(error, tolerance + 1)
+
+    def test_original_untouched(self):
+        """Simplification returns new animations."""
+        keyframes = [self.kf(t, 0) for t in range(0, 301, 100)]
+        animations = {'flat': Animation('Flat', 300, True, Keyframes.from_rows(keyframes))}
+        simplified = simplify_animations(animations, 1)
+        self.assertEqual(len(simplified['flat'].keyframes), 2)
+        self.assertEqual(len(animations['flat'].keyframes), 4)
+
+
+def header_progmem_bytes(text):
+    """Flash bytes of the PROGMEM tables in a generated header, counted from its text.
+
+    Independent of flash_usage(): struct sizes come from the emitted struct
+    bodies and element counts from the initializers.
+    """
+    text = re.sub(r'//[^\n]*', '', text)
+    sizes = dict(AVR_TYPE_SIZES)
+    for name, body in re.findall(r'struct (\w+) \{(.*?)\};', text, re.S):
+        sizes[name] = sum(avr_sizeof(field.rsplit(' ', 1)[0].strip())
+                          for field in body.split(';') if field.strip())
+    for ctype, name in re.findall(r'typedef (\w+) (\w+);', text):
+        sizes[name] = sizes[ctype]
+
+    total = 0
+    declaration = re.compile(r'const (\w+)(\*?)(?: const)? \w+\[[^\]]*\] PROGMEM = ')
+    for match in declaration.finditer(text):
+        start = match.end()
+        if text[start] == '"':
+            total += len(text[start + 1:text.index('"', start + 1)]) + 1
+            continue
+        depth, elements, item = 0, 0, False
+        for char in text[start:]:
+            if char == '{':
+                depth += 1
+                if depth == 2:
+                    item = True
+            elif char == '}':
+                depth -= 1
+                if depth == 0:
+                    break
+            elif depth == 1 and char == ',':
+                elements += item
+                item = False
+            elif depth == 1 and not char.isspace():
+                item = True
+        elements += item
+        total += elements * (AVR_TYPE_SIZES['pointer'] if match.group(2) else sizes[match.group(1)])
+    return total
+
+
+class TestFlashBudget(unittest.TestCase):
+    """Tests for flash_usage() and --flash-budget."""
+
+    def setUp(self):
+        self.config_path = Path(__file__).parent / 'animation-config.json'
+        self.config = load_config(self.config_path)
+        self.temp_dir = tempfile.mkdtemp()
+        self.output = Path(self.temp_dir) / 'animation_config.h'
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_usage_matches_emitted_tables(self):
+        """The ledger equals the tables counted in the header for every option set."""
+        option_sets = [
+            {},
+            {'packed': True},
+            {'pooled': True, 'packed': True},
+            {'pooled': True},
+            {'segment_slot_shift': 7, 'fixed_point': True},
+            {'packed': True, 'raster_tick_ms': 20, 'raster_budget': 4096},
+        ]
+        for options in option_sets:
+            generate_arduino_header(self.config_path, self.output, **options)
+            usage = flash_usage(self.config.animations, self.config.triggered_sequence,
+                                **options)
+            self.assertEqual(sum(size for _, _, size in usage),
+                             header_progmem_bytes(self.output.read_text()), options)
+
+    def test_every_table_is_progmem(self):
+        """No array lands in RAM (.data), so the header's RAM cost is zero."""
+        generate_arduino_header(self.config_path, self.output, packed=True,
+                                segment_slot_shift=7, fixed_point=True, raster_tick_ms=20)
+        arrays = [line for line in self.output.read_text().splitlines()
+                  if re.match(r'const .*\[.*\].* = ', line)]
+        self.assertTrue(arrays)
+        self.assertEqual([line for line in arrays if 'PROGMEM' not in line], [])
+
+    def test_per_animation_rows(self):
+        """Keyframe bytes follow the struct layout and names include the terminator."""
+        usage = {(anim_id, table): size
+                 for anim_id, table, size in flash_usage(self.config.animations)}
+        stabbing = self.config.animations['stabbing']
+        self.assertEqual(usage[('stabbing', 'keyframes')], len(stabbing.keyframes) * 12)
+        self.assertEqual(usage[('stabbing', 'name')], len(stabbing.name) + 1)
+        self.assertEqual(usage[(None, 'ANIMATIONS')], len(self.config.animations) * 11)
+
+    def test_over_budget_fails_before_writing(self):
+        """Exceeding the budget raises and leaves no header behind."""
+        with self.assertRaises(ValueError) as ctx:
+            generate_arduino_header(self.config_path, self.output, flash_budget=1000)
+        self.assertIn('over the 1000B flash budget', str(ctx.exception))
+        self.assertIn('PWM tables 728B', str(ctx.exception))
+        self.assertFalse(self.output.exists())
+
+    def test_within_budget(self):
+        """A budget that fits generates normally; the check accepts exact fits."""
+        usage = flash_usage(self.config.animations, self.config.triggered_sequence)
+        check_flash_budget(usage, sum(size for _, _, size in usage))
+        generate_arduino_header(self.config_path, self.output, flash_budget=28 * 1024)
+        self.assertTrue(self.output.exists())
+
+    def test_parse_byte_count(self):
+        """Plain bytes and K / KB suffixes (1024) are accepted."""
+        self.assertEqual(parse_byte_count('28672'), 28672)
+        self.assertEqual(parse_byte_count('28K'), 28672)
+        self.assertEqual(parse_byte_count('28kb'), 28672)
+        for bad in ('abc', '0', '-5K'):
+            with self.assertRaises(argparse.ArgumentTypeError):
+                parse_byte_count(bad)
+
+
+class TestSegmentIndex(unittest.TestCase):
+    """Tests for generate_segment_index() and segment_index_report()."""
+
+    def setUp(self):
+        """Set up an animation with evenly spaced keyframes."""
+        self.animations = {
+            'walk': {
+                'name': 'Walk',
                 'duration_ms': 1000,
                 'loop': True,
-                'keyframes': []
+                'keyframes': [
+                    {'time_ms': t, 'left_shoulder_deg': 0, 'left_elbow_deg': 0,
+                     'right_shoulder_deg': 0, 'right_elbow_deg': 0}
+                    for t in range(0, 1001, 100)
+                ]
             }
         }
+
+    def test_disabled_scans_from_zero(self):
+        """Without a slot shift SEGMENT_START should be 0."""
+        lines = generate_segment_index(model(self.animations))
+        self.assertIn('#define SEGMENT_START(anim, elapsed) 0', lines)
+
+    def test_generates_index_tables(self):
+        """Should emit per-animation index, pointer table and slot counts."""
+        content = '\n'.join(generate_segment_index(model(self.animations), 7))
+        self.assertIn('#define SEGMENT_SLOT_SHIFT 7', content)
+        self.assertIn('typedef uint8_t SegmentSlot;', content)
+        self.assertIn('const SegmentSlot WALK_SEGMENT_INDEX[] PROGMEM = {0, 1, 2, 3, 5, 6, 7, 8};',
+                      content)
+        self.assertIn('  WALK_SEGMENT_INDEX,', content)
+        self.assertIn('#define SEGMENT_START(anim, elapsed) segmentStart(anim, elapsed)', content)
+
+    def test_wide_slot_type_for_many_keyframes(self):
+        """More than 256 segments needs 16-bit slot entries."""
+        kf = self.animations['walk']['keyframes'][0]
+        self.animations['walk']['keyframes'] = [dict(kf, time_ms=t) for t in range(300)]
+        content = '\n'.join(generate_segment_index(model(self.animations), 4))
+        self.assertIn('typedef uint16_t SegmentSlot;', content)
+        self.assertIn('pgm_read_word(&index[slot])', content)
+
+    def test_rejects_unsorted_times(self):
+        """Decreasing keyframe times cannot be indexed."""
+        self.animations['walk']['keyframes'][3]['time_ms'] = 50
+        with self.assertRaises(ValueError):
+            generate_segment_index(model(self.animations), 7)
+
+    def test_report(self):
+        """Report should give index size and bounded scan length."""
+        self.assertEqual(segment_index_report(model(self.animations), 7), [('walk', 11, 8, 3)])
+
+
+class TestFixedPointSegments(unittest.TestCase):
+    """Tests for generate_fixed_point_segments() function."""
+
+    def setUp(self):
+        """Set up one two-segment and one single-keyframe animation."""
+        def kf(t, ls, le, rs, re):
+            return {'time_ms': t, 'left_shoulder_deg': ls, 'left_elbow_deg': le,
+                    'right_shoulder_deg': rs, 'right_elbow_deg': re}
+        self.animations = {
+            'poke': {'name': 'Poke', 'duration_ms': 600, 'loop': True,
+                     'keyframes': [kf(0, 10, 20, 30, 40), kf(200, 50, 20, 0, 45),
+                                   kf(600, 10, 20, 30, 40)]},
+            'hold': {'name': 'Hold', 'duration_ms': 1000, 'loop': True,
+                     'keyframes': [kf(0, 0, 0, 0, 0)]},
+        }
+
+    def test_disabled_by_default(self):
+        """No tables unless fixed_point=True."""
+        self.assertEqual(generate_fixed_point_segments(model(self.animations)), [])
+
+    def test_generates_segment_struct(self):
+        """Should emit the Segment struct and helpers."""
+        content = '\n'.join(generate_fixed_point_segments(model(self.animations), True))
+        self.assertIn('#define SEGMENT_RECIP_SHIFT 24', content)
+        self.assertIn('uint32_t recip;', content)
+        self.assertIn('int8_t left_shoulder_delta;', content)
+        self.assertIn('inline int fixedStep(int delta, unsigned long fraction) {', content)
+
+    def test_generates_segment_rows(self):
+        """Rows hold ceil(2^24 / span) and the per-joint deltas."""
+        lines = generate_fixed_point_segments(model(self.animations), True)
+        start = lines.index('const Segment POKE_SEGMENTS[] PROGMEM = {')
+        self.assertEqual(lines[start + 1], '  {83887UL, 40, 0, -30, 5},')
+        self.assertEqual(lines[start + 2], '  {41944UL, -40, 0, 30, -5},')
+
+    def test_single_keyframe_gets_zero_segment(self):
+        """Segment 0 must exist even without a second keyframe."""
+        lines = generate_fixed_point_segments(model(self.animations), True)
+        start = lines.index('const Segment HOLD_SEGMENTS[] PROGMEM = {')
+        self.assertEqual(lines[start + 1], '  {0UL, 0, 0, 0, 0},')
+        self.assertIn('  HOLD_SEGMENTS,', lines)
+
+    def test_rejects_large_delta(self):
+        """Deltas must fit in int8_t."""
+        self.animations['poke']['keyframes'][1]['left_elbow_deg'] = 200
+        with self.assertRaises(ValueError):
+            generate_fixed_point_segments(model(self.animations), True)
+
+    def test_rejects_long_segment(self):
+        """Segments longer than 65535 ms would overflow the fraction."""
+        self.animations['poke']['keyframes'][2]['time_ms'] = 70000
+        with self.assertRaises(ValueError):
+            generate_fixed_point_segments(model(self.animations), True)
+
+
+class TestRasterTables(unittest.TestCase):
+    """Tests for raster (pre-sampled) animation tables."""
+
+    def setUp(self):
+        """Set up a ramp and a static pose."""
+        def kf(t, deg):
+            return {'time_ms': t, 'left_shoulder_deg': deg, 'left_elbow_deg': deg,
+                    'right_shoulder_deg': deg, 'right_elbow_deg': 0}
+        self.animations = {
+            'ramp': {'name': 'Ramp', 'duration_ms': 100, 'loop': True,
+                     'keyframes': [kf(0, 0), kf(100, 50)]},
+            'still': {'name': 'Still', 'duration_ms': 40, 'loop': True,
+                      'keyframes': [kf(0, 7)]},
+        }
+
+    def test_disabled_by_default(self):
+        """No tables unless a tick is given."""
+        self.assertEqual(generate_raster_tables(model(self.animations)), [])
+
+    def test_samples_with_firmware_interpolation(self):
+        """Frames are the interpolated pose at k * tick."""
+        lines = generate_raster_tables(model(self.animations), 20)
+        start = lines.index('const uint8_t RAMP_FRAMES[] PROGMEM = {')
+        self.assertEqual(lines[start + 1],
+                         '  0, 0, 0, 0,  10, 10, 10, 0,  20, 20, 20, 0,  30, 30, 30, 0,')
+        self.assertEqual(lines[start + 2], '  40, 40, 40, 0,')
+        self.assertIn('#define RASTER_TICK_MS 20', lines)
+
+    def test_frame_counts(self):
+        """Frame count is ceil(duration / tick)."""
+        content = '\n'.join(generate_raster_tables(model(self.animations), 30))
+        self.assertIn('const uint16_t RASTER_FRAME_COUNTS[] PROGMEM = {\n  4,\n  2,\n};', content)
+
+    def test_budget_rasterizes_cheapest_first(self):
+        """Within the budget the cheaper animation is rasterized first."""
+        chosen = choose_raster_animations(model(self.animations), 20, budget_bytes=10)
+        self.assertEqual(chosen, {'ramp': None, 'still': 8})
+        lines = generate_raster_tables(model(self.animations), 20, budget_bytes=10)
+        self.assertIn('  NULL,', lines)
+        self.assertIn('  STILL_FRAMES,', lines)
+        self.assertNotIn('const uint8_t RAMP_FRAMES[] PROGMEM = {', lines)
+
+    def test_unlimited_budget(self):
+        """Without a budget everything is rasterized."""
+        chosen = choose_raster_animations(model(self.animations), 20)
+        self.assertEqual(chosen, {'ramp': 20, 'still': 8})
+
+    def test_report(self):
+        """Report gives keyframe bytes, raster bytes and the choice."""
+        self.assertEqual(raster_report(model(self.animations), 20, budget_bytes=10),
+                         [('ramp', 24, 20, False), ('still', 12, 8, True)])
+
+    def test_rejects_negative_angles(self):
+        """Raster frames are uint8_t."""
+        self.animations['still']['keyframes'][0]['left_elbow_deg'] = -1
+        with self.assertRaises(ValueError):
+            generate_raster_tables(model(self.animations), 20)
+
+
+class TestTriggeredSequence(unittest.TestCase):
+    """Tests for the compiled triggered sequence."""
+
+    def setUp(self):
+        """Set up two animations and a sequence at several speeds."""
+        kf = {'time_ms': 0, 'left_shoulder_deg': 0, 'left_elbow_deg': 0,
+              'right_shoulder_deg': 0, 'right_elbow_deg': 0}
+        self.animations = {
+            'grasping': {'name': 'Grasping', 'duration_ms': 3500, 'loop': False, 'keyframes': [kf]},
+            'stabbing': {'name': 'Stabbing', 'duration_ms': 4000, 'loop': False, 'keyframes': [kf]},
+        }
+        self.sequence = [
+            TriggeredStep('grasping', 1.0),
+            TriggeredStep('stabbing', 1.5),
+            TriggeredStep('grasping', 0.3),
+        ]
+
+    def test_durations_prescaled(self):
+        """Real durations are floor(duration / speed) using the decimal speed."""
+        steps = compile_triggered_sequence(self.sequence, model(self.animations))
+        self.assertEqual([s['duration_ms'] for s in steps], [3500, 2666, 11666])
+        self.assertEqual([s['index'] for s in steps], [0, 1, 0])
+        self.assertEqual([s['speed_percent'] for s in steps], [100, 150, 30])
+
+    def test_time_scale_is_q16(self):
+        """Speeds become Q16 multipliers."""
+        steps = compile_triggered_sequence(self.sequence, model(self.animations))
+        self.assertEqual([s['time_scale'] for s in steps], [65536, 98304, 19661])
+
+    def test_scaled_elapsed_stays_within_animation(self):
+        """Every real ms of a step maps to animation time inside the animation."""
+        for step in compile_triggered_sequence(self.sequence, model(self.animations)):
+            duration = self.animations[step['animation']]['duration_ms']
+            last = scale_elapsed(step['duration_ms'] - 1, step['time_scale'])
+            self.assertLess(last, duration)
+
+    def test_unknown_animation_rejected(self):
+        """Steps must name an animation in the config."""
+        self.sequence.append(TriggeredStep('flying', 1.0))
+        with self.assertRaises(ValueError):
+            compile_triggered_sequence(self.sequence, model(self.animations))
+
+    def test_overflow_rejected(self):
+        """Scaled elapsed time must fit in an unsigned long."""
+        self.animations['stabbing']['duration_ms'] = 100000
+        with self.assertRaises(ValueError):
+            compile_triggered_sequence(self.sequence, model(self.animations))
+
+    def test_generated_table(self):
+        """Table rows, length and exact total are emitted."""
+        lines = generate_triggered_sequence(self.sequence, model(self.animations))
+        self.assertIn('#define TRIGGERED_SEQUENCE_LENGTH 3', lines)
+        self.assertIn('  {1, 150, 2666UL, 98304UL},  // stabbing 1.5x', lines)
+        self.assertIn('#define TRIGGERED_SEQUENCE_TOTAL_MS 17832UL', lines)
+
+    def test_no_sequence(self):
+        """Configs without a triggered sequence emit nothing."""
+        self.assertEqual(generate_triggered_sequence((), model(self.animations)), [])
+
+    def test_real_config_total(self):
+        """The shipped sequence runs for exactly 41326 ms."""
+        config = load_config(Path(__file__).parent / 'animation-config.json')
+        steps = compile_triggered_sequence(config.triggered_sequence, config.animations)
+        self.assertEqual(len(steps), 14)
+        self.assertEqual(sum(s['duration_ms'] for s in steps), 41326)
+
+
+class TestEdgeCases(unittest.TestCase):
+    """Tests for edge cases and error conditions."""
+
+    def test_empty_keyframes_list(self):
+        """Should handle animations with empty keyframes list."""
+        # load_config() rejects an empty list, but the renderers cope with one
+        animations = {'empty': Animation('Empty', 1000, True, Keyframes.from_rows([]))}
         lines = generate_animation_data(animations)
         content = '\n'.join(lines)
         self.assertIn('true, 0, EMPTY_KEYFRAMES', content)
@@ -536,7 +1321,7 @@ class TestEdgeCases(unittest.TestCase):
                 ]
             }
         }
-        lines = generate_animation_data(animations)
+        lines = generate_animation_data(model(animations))
         content = '\n'.join(lines)
         self.assertIn('{0, 180, 270, 360, 450}', content)
 
@@ -558,7 +1343,7 @@ class TestEdgeCases(unittest.TestCase):
                 ]
             }
         }
-        lines = generate_animation_data(animations)
+        lines = generate_animation_data(model(animations))
         content = '\n'.join(lines)
         self.assertIn('{0, -10, -20, -30, -40}', content)
 
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Unit tests for i2c_traffic.py
+
+Write counts are checked against a scalar replay of updateAnimation() and
+moveLegs() built on firmware_reference.py.
+"""
+
+import unittest
+from pathlib import Path
+
+from config_model import TriggeredStep, load_config
+from firmware_reference import sample_pose, scale_elapsed
+from generate_arduino_config import JOINTS, compile_triggered_sequence
+
+try:
+    import numpy as np
+    import i2c_traffic
+except ImportError:  # NumPy not installed
+    i2c_traffic = None
+
+CONFIG_PATH = Path(__file__).parent / 'animation-config.json'
+
+
+def move_legs_writes(animations, steps, loop_period_ms):
+    """Per-channel setPWM() counts from a pass-by-pass replay of the steps."""
+    last = [-1] * len(JOINTS)
+    writes = [0] * len(JOINTS)
+    for step in steps:
+        keyframes = animations[step['animation']].keyframes.to_dicts()
+        for real in range(0, step['duration_ms'], loop_period_ms):
+            pose = sample_pose(keyframes, scale_elapsed(real, step['time_scale']), JOINTS)
+            for j, angle in enumerate(pose):
+                if angle != last[j]:
+                    writes[j] += 1
+                    last[j] = angle
+    return writes
+
+
+@unittest.skipUnless(i2c_traffic is not None, "NumPy not installed")
+class TestI2cTraffic(unittest.TestCase):
+    """Tests for setPWM() counting and bus utilization."""
+
+    def setUp(self):
+        self.config = load_config(CONFIG_PATH)
+        self.animations = self.config.animations
+
+    def test_animation_writes_match_scalar_replay(self):
+        """Each animation at each speed and two loop rates counts like moveLegs()."""
+        for rate_hz, period_ms in ((1000, 1), (250, 4)):
+            result = i2c_traffic.animation_traffic(self.config, rate_hz=rate_hz)
+            steps = compile_triggered_sequence(
+                [TriggeredStep(anim_id, speed) for anim_id, speed in result], self.animations)
+            for step in steps:
+                stats = result[(step['animation'], step['speed'])]
+                self.assertEqual(stats['writes'],
+                                 move_legs_writes(self.animations, [step], period_ms),
+                                 f"{step['animation']} @{step['speed']}x, {rate_hz} Hz")
+
+    def test_sequence_carries_last_angles(self):
+        """Steps share lastLeftShoulder etc., so the sequence counts as one replay."""
+        steps = compile_triggered_sequence(self.config.triggered_sequence, self.animations)
+        stats = i2c_traffic.sequence_traffic(self.config)
+        self.assertEqual(stats['writes'], move_legs_writes(self.animations, steps, 1))
+        self.assertEqual(stats['duration_ms'], sum(step['duration_ms'] for step in steps))
+
+    def test_faster_playback_writes_more_per_second(self):
+        """The same angle changes squeezed into less time raise the rate."""
+        result = i2c_traffic.animation_traffic(self.config, speeds=(1.0, 2.5),
+                                               anim_ids=['breaking_through'])
+        slow = sum(result[('breaking_through', 1.0)]['per_second'])
+        fast = sum(result[('breaking_through', 2.5)]['per_second'])
+        self.assertGreater(fast, 2 * slow)
+
+    def test_window_peak(self):
+        """Writes at 0, 5, 19 and 20 ms: a 20 ms window holds at most three."""
+        times = np.array([0, 5, 19, 20, 40])
+        counts = np.array([1, 1, 1, 1, 0])
+        self.assertEqual(i2c_traffic.window_peak(times, counts, 20), 3)
+        self.assertEqual(i2c_traffic.window_peak(times, counts, 21), 4)
+        self.assertEqual(i2c_traffic.window_peak(times[:0], counts[:0], 20), 0)
+
+    def test_utilization_and_capacity(self):
+        """56 clocks at 100 kHz is 560 µs; 10 writes per 20 ms window is 28% busy."""
+        self.assertAlmostEqual(i2c_traffic.transaction_us(100_000), 560)
+        self.assertAlmostEqual(i2c_traffic.transaction_us(400_000), 140)
+        stats = {'duration_ms': 1000, 'writes': [25, 25, 0, 0], 'window_ms': 20,
+                 'peak_window_total': 10, 'peak_window': [5, 5, 0, 0]}
+        average, peak = i2c_traffic.utilization(stats, 100_000)
+        self.assertAlmostEqual(average, 0.028)
+        self.assertAlmostEqual(peak, 0.28)
+        self.assertEqual(i2c_traffic.servo_capacity(stats, 100_000), 7)
+        self.assertEqual(i2c_traffic.servo_capacity(stats, 400_000),
+                         i2c_traffic.PCA9685_CHANNELS)
+
+    def test_first_pass_writes_every_channel(self):
+        """After reset the -1 last values make every joint write once."""
+        angles = np.array([[0, 0, 0, 0], [0, 1, 0, 0], [0, 1, 0, 0]])
+        written = i2c_traffic.written_channels(angles)
+        self.assertEqual(written.sum(axis=0).tolist(), [1, 2, 1, 1])
+        carried = i2c_traffic.written_channels(angles, last=np.array([0, 0, 0, 5]))
+        self.assertEqual(carried.sum(axis=0).tolist(), [0, 1, 0, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
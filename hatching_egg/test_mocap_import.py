@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Unit tests for mocap_import.py
+
+Recordings are written to a temporary directory; small chunk sizes check
+that chunking does not change the result.
+"""
+
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from config_model import KinematicsConfig
+
+try:
+    import mocap_import
+except ImportError:  # NumPy not installed
+    mocap_import = None
+
+KINEMATICS = KinematicsConfig(upper_segment_length=80, lower_segment_length=100,
+                              shoulder_min_angle=0, shoulder_max_angle=90,
+                              elbow_min_angle=10, elbow_max_angle=80)
+
+
+@unittest.skipUnless(mocap_import is not None, "NumPy not installed")
+class TestMocapImport(unittest.TestCase):
+    """Tests for clamping, resampling and decimation of CSV recordings."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.csv = Path(self.temp_dir) / 'recording.csv'
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def write_csv(self, rows, header=None):
+        lines = [header] if header else []
+        lines.extend(",".join(str(value) for value in row) for row in rows)
+        self.csv.write_text("\n".join(lines) + "\n")
+
+    def test_linear_ramp_decimates_to_endpoints(self):
+        """A 1 kHz straight-line move needs only its first and last keyframes."""
+        self.write_csv([(t, t * 0.05, 20, 45, 60) for t in range(1001)])
+        keyframes, stats = mocap_import.import_recording(self.csv, KINEMATICS, rate_hz=50)
+        self.assertEqual(stats['samples'], 1001)
+        self.assertEqual(stats['frames'], 51)
+        self.assertEqual(keyframes, [
+            {'time_ms': 0, 'left_shoulder_deg': 0, 'left_elbow_deg': 20,
+             'right_shoulder_deg': 45, 'right_elbow_deg': 60},
+            {'time_ms': 1000, 'left_shoulder_deg': 50, 'left_elbow_deg': 20,
+             'right_shoulder_deg': 45, 'right_elbow_deg': 60},
+        ])
+
+    def test_clamps_to_kinematics_limits(self):
+        """Angles outside each joint's min/max are clamped and counted."""
+        self.write_csv([(0, -20, 5, 100, 95), (100, -20, 5, 100, 95)])
+        keyframes, stats = mocap_import.import_recording(self.csv, KINEMATICS)
+        self.assertEqual(stats['clamped'], 8)
+        self.assertEqual([keyframes[0][joint] for joint in mocap_import.JOINTS],
+                         [0, 10, 90, 80])
+
+    def test_chunk_size_does_not_change_result(self):
+        """Interpolation across chunk boundaries matches a single chunk."""
+        self.write_csv([(t * 3, (t * 7) % 90, 40 + t % 11, 45, (t * 13) % 70 + 10)
+                        for t in range(2000)])
+        whole = mocap_import.import_recording(self.csv, KINEMATICS, max_error_deg=2)
+        for chunk_rows in (1, 7, 100):
+            self.assertEqual(mocap_import.import_recording(
+                self.csv, KINEMATICS, max_error_deg=2, chunk_rows=chunk_rows), whole)
+
+    def test_header_selects_columns_by_name(self):
+        """Named columns may appear in any order, with or without _deg."""
+        self.write_csv([(30, 40, 50, 0, 20), (30, 40, 50, 500, 20)],
+                       header="right_elbow,left_elbow_deg,left_shoulder,time,right_shoulder")
+        keyframes, _ = mocap_import.import_recording(self.csv, KINEMATICS)
+        self.assertEqual(keyframes[-1], {'time_ms': 500, 'left_shoulder_deg': 50,
+                                         'left_elbow_deg': 40, 'right_shoulder_deg': 20,
+                                         'right_elbow_deg': 30})
+
+    def test_seconds_and_offset_start(self):
+        """Times in seconds are converted and shifted to start at 0."""
+        self.write_csv([(12.0, 0, 20, 0, 20), (12.5, 50, 20, 0, 20)])
+        keyframes, _ = mocap_import.import_recording(self.csv, KINEMATICS, time_unit='s')
+        self.assertEqual([kf['time_ms'] for kf in keyframes], [0, 500])
+
+    def test_time_going_backwards_raises(self):
+        """Out-of-order samples are rejected."""
+        self.write_csv([(0, 0, 20, 0, 20), (100, 0, 20, 0, 20), (50, 0, 20, 0, 20)])
+        with self.assertRaises(ValueError):
+            mocap_import.import_recording(self.csv, KINEMATICS)
+
+    def test_bad_row_reports_lines(self):
+        """Unparseable values name the chunk's line range."""
+        self.write_csv([(0, 0, 20, 0, 20), (10, 'x', 20, 0, 20)])
+        with self.assertRaises(ValueError) as ctx:
+            mocap_import.import_recording(self.csv, KINEMATICS)
+        self.assertIn('lines 1-2', str(ctx.exception))
+
+    def test_empty_recording_raises(self):
+        """A header with no samples produces no animation."""
+        self.write_csv([], header="time_ms,left_shoulder,left_elbow,right_shoulder,right_elbow")
+        with self.assertRaisesRegex(ValueError, 'contains no samples'):
+            mocap_import.import_recording(self.csv, KINEMATICS)
+        self.csv.write_text("")
+        with self.assertRaisesRegex(ValueError, 'contains no samples'):
+            mocap_import.import_recording(self.csv, KINEMATICS)
+
+    def test_zero_duration_recording_raises(self):
+        """One sample, or samples within one frame, would give a 0 ms animation."""
+        for rows in ([(0, 10, 20, 30, 40)],
+                     [(5, 10, 20, 30, 40), (5, 12, 22, 32, 42)],
+                     [(0, 10, 20, 30, 40), (15, 12, 22, 32, 42)]):
+            self.write_csv(rows)
+            with self.assertRaisesRegex(ValueError, 'shorter than one 50 Hz frame'):
+                mocap_import.import_recording(self.csv, KINEMATICS)
+
+
+@unittest.skipUnless(mocap_import is not None, "NumPy not installed")
+class TestAddAnimation(unittest.TestCase):
+    """Tests for appending an imported animation to a config file."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.config = Path(self.temp_dir) / 'animation-config.json'
+        original = Path(__file__).parent / 'animation-config.json'
+        self.text = original.read_text(encoding='utf-8')
+        self.config.write_text(self.text, encoding='utf-8')
+        keyframes = [{'time_ms': 0, 'left_shoulder_deg': 1, 'left_elbow_deg': 2,
+                      'right_shoulder_deg': 3, 'right_elbow_deg': 4}]
+        self.animation = mocap_import.build_animation('Puppet', keyframes)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_appends_and_keeps_existing_text(self):
+        """The new animation is last and every existing line is untouched."""
+        mocap_import.add_animation(self.config, 'puppet', self.animation)
+        updated = self.config.read_text(encoding='utf-8')
+        config = json.loads(updated)
+        self.assertEqual(list(config['animations'])[-1], 'puppet')
+        self.assertEqual(config['animations']['puppet'], self.animation)
+        # Before the entry: the original text plus one comma; after it: the rest
+        prefix = updated[:updated.index('\n    "puppet": {')]
+        self.assertEqual(prefix[-1], ',')
+        self.assertTrue(self.text.startswith(prefix[:-1]))
+        self.assertTrue(updated.endswith(self.text[len(prefix) - 1:].lstrip()))
+
+    def test_duplicate_id_raises(self):
+        """Existing animations are never overwritten."""
+        with self.assertRaises(ValueError):
+            mocap_import.add_animation(self.config, 'zero', self.animation)
+        self.assertEqual(self.config.read_text(encoding='utf-8'), self.text)
+
+
+if __name__ == '__main__':
+    unittest.main()
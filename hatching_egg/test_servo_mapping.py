@@ -10,6 +10,10 @@ import unittest
 import json
 from pathlib import Path
 
+from config_model import load_config
+from firmware_reference import arduino_map
+from generate_arduino_config import SERVOS, PWM_TABLE_SIZE, generate_pwm_tables
+
 
 class TestServoPulseMapping(unittest.TestCase):
     """Test servo degree to PWM value mapping with per-servo ranges"""
@@ -265,6 +269,13 @@ class TestServoPulseMapping(unittest.TestCase):
                 f"Animation '{anim_name}' name is {name_length} chars, exceeds buffer size {MAX_NAME_LENGTH}. "
                 f"Name: '{name}'. This will cause buffer overflow and crash the Arduino!")
 
+    def test_triggered_sequence_references_animations(self):
+        """Test that every triggered step names a real animation with a positive speed"""
+        for i, step in enumerate(self.config['triggered_sequence']['steps']):
+            self.assertIn(step['animation'], self.config['animations'],
+                f"Triggered step {i} uses unknown animation '{step['animation']}'")
+            self.assertGreater(step['speed'], 0, f"Triggered step {i} speed must be positive")
+
 
 class TestServoChannels(unittest.TestCase):
     """Test servo channel assignments"""
@@ -296,6 +307,62 @@ class TestServoChannels(unittest.TestCase):
                         "Left elbow should be channel 15")
 
 
+class TestPwmLookupTables(unittest.TestCase):
+    """Verify generated degree → PWM tables against the reference mappings"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Load configuration and parse the emitted tables"""
+        config_path = Path(__file__).parent / 'animation-config.json'
+        cls.hardware = load_config(config_path).hardware
+        cls.tables = cls.parse_tables(generate_pwm_tables(cls.hardware))
+
+    @staticmethod
+    def parse_tables(lines):
+        """Parse `const uint16_t NAME_PWM[...] PROGMEM = {...};` blocks"""
+        tables = {}
+        current = None
+        for line in lines:
+            if line.startswith('const uint16_t '):
+                current = line.split()[2].split('_PWM[')[0]
+                tables[current] = []
+            elif line == '};':
+                current = None
+            elif current:
+                tables[current].extend(int(v) for v in line.replace(',', ' ').split())
+        return tables
+
+    def pulse_range(self, leg, joint):
+        servo = self.hardware.servo(leg, joint)
+        return servo.min_pulse, servo.max_pulse
+
+    def test_one_table_per_servo(self):
+        """Every servo gets a 91-entry table"""
+        self.assertEqual(set(self.tables), {prefix for prefix, _, _ in SERVOS})
+        for prefix, table in self.tables.items():
+            self.assertEqual(len(table), PWM_TABLE_SIZE, prefix)
+
+    def test_tables_match_map_value(self):
+        """Every entry equals mapValue(deg, 0, 90, min, max) from servo_mapping.h"""
+        for prefix, leg, joint in SERVOS:
+            min_pulse, max_pulse = self.pulse_range(leg, joint)
+            for deg, pulse in enumerate(self.tables[prefix]):
+                with self.subTest(servo=prefix, degrees=deg):
+                    self.assertEqual(pulse, arduino_map(deg, 0, 90, min_pulse, max_pulse))
+
+    def test_inverted_ranges_truncate_toward_zero(self):
+        """Left shoulder 1° is 440 - 140/90 -> 439 in C, not floor() -> 438"""
+        self.assertEqual(self.tables['LEFT_SHOULDER'][1], 439)
+
+    def test_tables_within_calibrated_range(self):
+        """No entry leaves the servo's calibrated PWM range"""
+        for prefix, leg, joint in SERVOS:
+            low, high = sorted(self.pulse_range(leg, joint))
+            for pulse in self.tables[prefix]:
+                self.assertGreaterEqual(pulse, low, prefix)
+                self.assertLessEqual(pulse, high, prefix)
+
+
 def run_tests():
     """Run all tests and report results"""
     loader = unittest.TestLoader()
@@ -303,6 +370,7 @@ def run_tests():
 
     suite.addTests(loader.loadTestsFromTestCase(TestServoPulseMapping))
     suite.addTests(loader.loadTestsFromTestCase(TestServoChannels))
+    suite.addTests(loader.loadTestsFromTestCase(TestPwmLookupTables))
 
     runner = unittest.TextTestRunner(verbosity=2)
     result = runner.run(suite)
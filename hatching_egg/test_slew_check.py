@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Unit tests for slew_check.py
+
+Vectorized velocities and lateness are compared with straightforward
+per-segment loops.
+"""
+
+import random
+import unittest
+from pathlib import Path
+
+from config_model import load_config, parse_animation
+from generate_arduino_config import JOINTS
+
+try:
+    import numpy as np
+    import slew_check
+except ImportError:  # NumPy not installed
+    slew_check = None
+
+CONFIG_PATH = Path(__file__).parent / 'animation-config.json'
+
+
+def keyframe(time_ms, *angles):
+    return dict(time_ms=time_ms, **dict(zip(JOINTS, angles)))
+
+
+def animation(duration_ms, keyframes):
+    return parse_animation({'name': 'Test', 'duration_ms': duration_ms, 'keyframes': keyframes},
+                           'test')
+
+
+@unittest.skipUnless(slew_check is not None, "NumPy not installed")
+class TestSlewCheck(unittest.TestCase):
+    """Tests for segment velocities, flagged segments and playback lag."""
+
+    def setUp(self):
+        self.config = load_config(CONFIG_PATH)
+
+    def test_segment_velocity(self):
+        """90° in 180 ms is 500 deg/s at 1x and 1250 deg/s at 2.5x; jumps are inf."""
+        times = np.array([0, 180, 180, 500])
+        angles = np.array([[0, 0, 0, 0], [90, 45, 0, 0], [0, 45, 0, 0], [0, 45, 0, 0]])
+        velocity = slew_check.segment_velocities(times, angles, [1.0, 2.5])
+        self.assertEqual(velocity[0, 0].tolist(), [500, 250, 0, 0])
+        self.assertEqual(velocity[1, 0].tolist(), [1250, 625, 0, 0])
+        self.assertEqual(velocity[0, 1].tolist(), [np.inf, 0, 0, 0])
+        self.assertEqual(velocity[:, 2].tolist(), [[0] * 4, [0] * 4])
+
+    def test_lag_matches_recursion(self):
+        """The cumulative form equals the step-by-step catch-up recursion."""
+        rng = random.Random(19)
+        times = np.cumsum([0] + [rng.choice([0, rng.randint(1, 400)]) for _ in range(60)])
+        angles = np.array([[rng.randint(0, 90) for _ in JOINTS] for _ in times])
+        for speed in (1.0, 2.5):
+            lag = slew_check.keyframe_lag(times, angles, 500, speed)
+            expected = [[0.0] * len(JOINTS)]
+            for k in range(1, len(times)):
+                span = (times[k] - times[k - 1]) / speed
+                expected.append([
+                    max(0.0, expected[-1][j] + abs(angles[k, j] - angles[k - 1, j]) * 2 - span)
+                    for j in range(len(JOINTS))])
+            np.testing.assert_allclose(lag, expected, atol=1e-9)
+
+    def test_played_keyframes(self):
+        """Keyframes after the segment crossing duration_ms are dropped; angles clamp."""
+        anim = animation(250, [
+            keyframe(0, -10, 0, 0, 0), keyframe(200, 120, 0, 0, 0),
+            keyframe(300, 0, 0, 0, 0), keyframe(400, 90, 0, 0, 0)])
+        times, angles = slew_check.played_keyframes(anim)
+        self.assertEqual(times.tolist(), [0, 200, 300])
+        self.assertEqual(angles[:, 0].tolist(), [0, 90, 0])
+
+    def test_config_flags_only_fastest_steps(self):
+        """At 0.12 s/60° only breaking_through and stabbing at 2.5x exceed 500 deg/s."""
+        rows = slew_check.check_animations(self.config, 0.12)
+        flagged = {(row['anim_id'], row['speed']) for row in rows if row['over']}
+        self.assertEqual(flagged, {('breaking_through', 2.5), ('stabbing', 2.5)})
+        for row in rows:
+            late = any(lag > 0 for lag in row['lag_ms'])
+            self.assertEqual(late, bool(row['over']), (row['anim_id'], row['speed']))
+
+    def test_speeds_from_sequence(self):
+        """Each animation is checked at 1.0x plus every speed the sequence plays it at."""
+        speeds = slew_check.animation_speeds(self.config)
+        self.assertEqual(speeds['resting'], [1.0])
+        self.assertEqual(sorted(speeds['breaking_through']), [0.3, 1.0, 1.5, 2.0, 2.5])
+
+    def test_sequence_lag(self):
+        """A fast enough servo only lags on the jumps between steps."""
+        worst, _ = slew_check.sequence_lag(self.config, servo_speed=0.12)
+        self.assertTrue(all(lag > 0 for lag in worst))
+        fast_worst, _ = slew_check.sequence_lag(self.config, servo_speed=0.001)
+        self.assertTrue(all(lag < 2 for lag in fast_worst))
+        with self.assertRaises(ValueError):
+            slew_check.sequence_lag(self.config, servo_speed=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Unit tests for trajectory.py
+
+Every vectorized result is compared with the scalar reference in
+firmware_reference.py, which mirrors the firmware's C semantics.
+"""
+
+import random
+import unittest
+from pathlib import Path
+
+from config_model import Animation, Keyframes, load_config
+from firmware_reference import degrees_to_pulse, sample_pose
+from generate_arduino_config import JOINTS, SERVOS
+
+try:
+    import numpy as np
+    import trajectory
+except ImportError:  # NumPy not installed
+    trajectory = None
+
+CONFIG_PATH = Path(__file__).parent / 'animation-config.json'
+
+
+def random_animation(rng, unsorted=False):
+    times = sorted(rng.randint(0, 3000) for _ in range(rng.randint(0, 8)))
+    if unsorted:
+        rng.shuffle(times)
+    # Built directly: parse_animation() would reject the empty animations
+    return Animation('Random', rng.randint(0, 3500), True, Keyframes.from_rows(
+        [(t, *(rng.randint(-10, 100) for _ in JOINTS)) for t in times]))
+
+
+def animation(*rows):
+    return Animation('Test', 1000, True, Keyframes.from_rows(rows))
+
+
+@unittest.skipUnless(trajectory is not None, "NumPy not installed")
+class TestSampleAnimations(unittest.TestCase):
+    """Tests for the batched angle engine."""
+
+    def assert_matches_reference(self, animations, elapsed):
+        angles = trajectory.sample_animations(animations, elapsed)
+        for anim_id, anim_elapsed in elapsed.items():
+            expected = [list(sample_pose(animations[anim_id].keyframes.to_dicts(), int(e), JOINTS))
+                        for e in anim_elapsed]
+            self.assertEqual(angles[anim_id].tolist(), expected, anim_id)
+
+    def test_random_library_matches_reference(self):
+        """Jumps, unsorted keyframes, single/empty animations and times past the end."""
+        rng = random.Random(15)
+        animations = {f'anim{k}': random_animation(rng, unsorted=k % 5 == 0) for k in range(200)}
+        elapsed = {anim_id: np.array(sorted(rng.randint(0, 4000) for _ in range(100)))
+                   for anim_id in animations}
+        self.assert_matches_reference(animations, elapsed)
+
+    def test_truncates_toward_zero(self):
+        """(int) truncation: 10 + (int)(-3.33) = 7 and 0 + (int)(3.33) = 3."""
+        animations = {'down': animation((0, 10, 10, 10, 10), (3, 0, 0, 0, 0))}
+        angles = trajectory.sample_animations(animations, {'down': np.array([1])})
+        self.assertEqual(angles['down'].tolist(), [[7, 7, 7, 7]])
+
+    def test_before_first_keyframe_wraps(self):
+        """elapsed < t1 wraps as unsigned long, so t clamps to 1."""
+        animations = {'late': animation((100, 0, 0, 0, 0), (200, 40, 40, 40, 40))}
+        angles = trajectory.sample_animations(animations, {'late': np.array([50, 150])})
+        self.assertEqual(angles['late'].tolist(), [[40] * 4, [20] * 4])
+
+
+@unittest.skipUnless(trajectory is not None, "NumPy not installed")
+class TestTrajectories(unittest.TestCase):
+    """Tests for sampling the real config to angles and PWM pulses."""
+
+    def setUp(self):
+        self.config = load_config(CONFIG_PATH)
+
+    def test_sample_times(self):
+        """Samples cover 0 <= elapsed < duration at the requested rate."""
+        self.assertEqual(trajectory.sample_times(100, 50).tolist(), [0, 20, 40, 60, 80])
+        self.assertEqual(trajectory.sample_times(1000, 3).tolist(), [0, 333, 666])
+        self.assertEqual(len(trajectory.sample_times(0, 50)), 0)
+        with self.assertRaises(ValueError):
+            trajectory.sample_times(100, 0)
+
+    def test_library_matches_firmware_reference(self):
+        """Every animation at 1 kHz: angles and pulses equal the scalar reference."""
+        hardware = self.config.hardware
+        result = trajectory.trajectories(self.config, rate_hz=1000)
+        self.assertEqual(list(result), list(self.config.animations))
+        for anim_id, anim in self.config.animations.items():
+            poses = [sample_pose(anim.keyframes.to_dicts(), int(e), JOINTS)
+                     for e in result[anim_id]['elapsed_ms']]
+            pulses = [[degrees_to_pulse(pose[j], hardware.servo(leg, joint).min_pulse,
+                                        hardware.servo(leg, joint).max_pulse)
+                       for j, (_, leg, joint) in enumerate(SERVOS)]
+                      for pose in poses]
+            self.assertEqual(result[anim_id]['angles'].tolist(), [list(p) for p in poses])
+            self.assertEqual(result[anim_id]['pulses'].tolist(), pulses)
+
+    def test_pulses_clamp_angles(self):
+        """Angles outside 0-90° use the end entries of each servo table."""
+        pulses = trajectory.servo_pulses(np.array([[-5, 120, 45, 90]]), self.config.hardware)
+        left, right = self.config.hardware.left_leg, self.config.hardware.right_leg
+        self.assertEqual(pulses[0, 0], left.shoulder.min_pulse)
+        self.assertEqual(pulses[0, 1], left.elbow.max_pulse)
+        self.assertEqual(pulses[0, 3], right.elbow.max_pulse)
+
+    def test_selected_animations(self):
+        """anim_ids limits and orders the result."""
+        result = trajectory.load_trajectories(CONFIG_PATH, 50, ['stabbing', 'zero'])
+        self.assertEqual(list(result), ['stabbing', 'zero'])
+        self.assertEqual(len(result['zero']['elapsed_ms']),
+                         self.config.animations['zero'].duration_ms // 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
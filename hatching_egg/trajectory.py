@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Vectorized firmware playback: servo angles and PWM pulses as NumPy arrays.
+
+Reproduces what the Beetle outputs for animation-config.json without
+flashing it:
+
+- updateAnimation()'s keyframe search (first segment with
+  t1 <= elapsed < t2, falling back to keyframes 0/1) and its float path
+  ls1 + (int)((ls2 - ls1) * t) in IEEE single precision, including the
+  unsigned wrap of elapsed - t1;
+- setServo()'s constrain to 0-90° and per-servo PWM table (Arduino map()).
+
+Results are bit-identical to firmware_reference.sample_pose() and
+degrees_to_pulse(), which the tests check. Many animations are sampled
+together in one pass: keyframes are concatenated and every sample's
+segment is found with a single searchsorted().
+"""
+
+import numpy as np
+
+from config_model import load_config
+from firmware_reference import ANGLE_MAX, ANGLE_MIN, ULONG_MASK
+from generate_arduino_config import JOINTS, SERVOS, model_columns, servo_pulse_tables
+
+DEFAULT_RATE_HZ = 50  # one sample per 20 ms servo frame
+
+
+def sample_times(duration_ms, rate_hz=DEFAULT_RATE_HZ):
+    """Animation times (ms, int64) seen when sampling every 1000 / rate_hz ms.
+
+    Covers 0 <= elapsed < duration_ms, the range updateAnimation() plays
+    before handleAnimationComplete().
+    """
+    if rate_hz <= 0:
+        raise ValueError(f"sample rate must be positive, got {rate_hz}")
+    count = int(np.ceil(duration_ms * rate_hz / 1000))
+    elapsed = np.floor(np.arange(count) * (1000 / rate_hz)).astype(np.int64)
+    return elapsed[elapsed < duration_ms]
+
+
+def keyframe_arrays(anim):
+    """(times, angles) of an Animation: int64 (n,) and (n, 4) in JOINTS order."""
+    columns = model_columns(anim.keyframes)
+    return columns[:, 0], columns[:, 1:]
+
+
+def first_segments(times, elapsed):
+    """Per sample, the kf1 updateAnimation()'s forward scan settles on.
+
+    Non-decreasing times use searchsorted: the last keyframe at or before
+    elapsed is the only segment that can contain it. Other orders compare
+    every sample with every segment, like the firmware loop.
+    """
+    if np.all(times[1:] >= times[:-1]):
+        kf1 = np.searchsorted(times, elapsed, side='right') - 1
+        return np.where((kf1 >= 0) & (kf1 < len(times) - 1), kf1, 0)
+    inside = (times[:-1] <= elapsed[:, None]) & (elapsed[:, None] < times[1:])
+    return np.where(inside.any(axis=1), inside.argmax(axis=1), 0)
+
+
+def interpolate(times, angles, kf1, elapsed):
+    """updateAnimation()'s float interpolation for samples in segments kf1."""
+    kf2 = kf1 + 1
+    offset = ((elapsed - times[kf1]) & ULONG_MASK).astype(np.float32)
+    span = ((times[kf2] - times[kf1]) & ULONG_MASK).astype(np.float32)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.clip(offset / span, np.float32(0), np.float32(1))
+    # Zero-length segments are undefined on the AVR; treated as t = 1 like the reference
+    t = np.where(span == 0, np.float32(1), t)
+    delta = (angles[kf2] - angles[kf1]).astype(np.float32)
+    return angles[kf1] + np.trunc(delta * t[:, None]).astype(np.int64)
+
+
+def sample_animations(animations, elapsed):
+    """Joint angles updateAnimation() writes for several animations at once.
+
+    `elapsed` maps anim_id to an array of animation times (ms). Returns
+    {anim_id: (n, 4) int64 angles in JOINTS order}. Animations with sorted
+    keyframe times are batched into one searchsorted() over a combined
+    key (animation offset + time); the rest are sampled one at a time.
+    """
+    result = {}
+    batched = []
+    for anim_id, anim_elapsed in elapsed.items():
+        anim_elapsed = np.asarray(anim_elapsed, dtype=np.int64)
+        times, angles = keyframe_arrays(animations[anim_id])
+        if len(times) < 2:
+            # A single keyframe holds its pose (the firmware would read past the array)
+            pose = angles[0] if len(times) else np.zeros(len(JOINTS), dtype=np.int64)
+            result[anim_id] = np.tile(pose, (len(anim_elapsed), 1))
+        elif np.all(times[1:] >= times[:-1]):
+            batched.append((anim_id, times, angles, anim_elapsed))
+        else:
+            kf1 = first_segments(times, anim_elapsed)
+            result[anim_id] = interpolate(times, angles, kf1, anim_elapsed)
+
+    if batched:
+        stride = 1 + max(max(int(times[-1]), int(e.max(initial=0))) for _, times, _, e in batched)
+        starts = np.cumsum([0] + [len(times) for _, times, _, _ in batched])
+        times = np.concatenate([times for _, times, _, _ in batched])
+        angles = np.concatenate([angles for _, _, angles, _ in batched])
+        keys = np.concatenate([k * stride + t for k, (_, t, _, _) in enumerate(batched)])
+        owner = np.concatenate([np.full(len(e), k) for k, (*_, e) in enumerate(batched)])
+        samples = np.concatenate([e for *_, e in batched])
+
+        start, end = starts[owner], starts[owner + 1]
+        kf1 = np.searchsorted(keys, owner * stride + samples, side='right') - 1
+        kf1 = np.where((kf1 >= start) & (kf1 < end - 1), kf1, start)
+        poses = interpolate(times, angles, kf1, samples)
+        for anim_id, piece in zip((b[0] for b in batched),
+                                  np.split(poses, np.cumsum([len(b[3]) for b in batched])[:-1])):
+            result[anim_id] = piece
+    return {anim_id: result[anim_id] for anim_id in elapsed}
+
+
+def servo_pulses(angles, hardware):
+    """PWM pulse per sample and servo from setServo()'s constrained table lookup."""
+    tables = servo_pulse_tables(hardware)
+    degrees = np.clip(angles, ANGLE_MIN, ANGLE_MAX)
+    return np.column_stack([
+        np.asarray(tables[prefix], dtype=np.int64)[degrees[:, j]]
+        for j, (prefix, _, _) in enumerate(SERVOS)
+    ]).reshape(len(angles), len(SERVOS))
+
+
+def trajectories(config, rate_hz=DEFAULT_RATE_HZ, anim_ids=None):
+    """Angle and PWM trajectories for animations in a config_model AnimationConfig.
+
+    Returns {anim_id: {'elapsed_ms', 'angles', 'pulses'}} with one row per
+    sample; all animations (or anim_ids) are sampled in one batch.
+    """
+    animations = config.animations
+    anim_ids = list(animations) if anim_ids is None else list(anim_ids)
+    elapsed = {anim_id: sample_times(animations[anim_id].duration_ms, rate_hz)
+               for anim_id in anim_ids}
+    angles = sample_animations(animations, elapsed)
+    return {
+        anim_id: {
+            'elapsed_ms': elapsed[anim_id],
+            'angles': angles[anim_id],
+            'pulses': servo_pulses(angles[anim_id], config.hardware),
+        }
+        for anim_id in anim_ids
+    }
+
+
+def load_trajectories(config_path, rate_hz=DEFAULT_RATE_HZ, anim_ids=None):
+    """trajectories() for an animation-config.json file."""
+    return trajectories(load_config(config_path), rate_hz, anim_ids)
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Registry of which USB serial board runs which prop.
+
+/dev/ttyACM0 is whichever board enumerated first, so a fixed port breaks
+as soon as two Beetles are plugged in. scan() lists the USB serial ports
+with their VID:PID, serial number and USB location, read from sysfs (no
+pyserial or udev rules needed), and a Registry file maps prop names to
+boards:
+
+    python3 device_registry.py                              # list boards and props
+    python3 device_registry.py assign twitching_body /dev/ttyACM0
+    python3 serial_test.py --port twitching_body            # any script taking --port
+
+A board is matched by VID:PID and serial number, so it keeps its name
+on any USB port. The Leonardo core reports an empty or shared serial
+number (the pluggable USB module names), so when two boards or two
+props share one, the USB location (hub port, e.g. "1-1.2") it was
+assigned on decides; keep such boards on the same hub ports.
+"""
+
+import argparse
+import json
+import os
+import sys
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+SYS_CLASS_TTY = Path('/sys/class/tty')
+PORT_PATTERNS = ('ttyACM*', 'ttyUSB*')
+DEFAULT_REGISTRY = (Path(os.environ.get('XDG_CONFIG_HOME') or Path.home() / '.config')
+                    / 'halloween' / 'serial-devices.json')
+
+KNOWN_BOARDS = {
+    ('2341', '8036'): 'Arduino Leonardo / DFRobot Beetle',
+    ('2341', '0036'): 'Leonardo bootloader',
+    ('2a03', '8036'): 'Arduino Leonardo',
+    ('2341', '0043'): 'Arduino Uno',
+    ('1a86', '7523'): 'CH340 USB serial',
+}
+
+
+@dataclass(frozen=True)
+class UsbSerialDevice:
+    port: str  # /dev/ttyACM0
+    vid: str  # lowercase hex, as in sysfs
+    pid: str
+    serial: str
+    location: str  # USB bus/port path, e.g. "1-1.2"
+    product: str = ''
+
+    @property
+    def description(self):
+        return KNOWN_BOARDS.get((self.vid, self.pid), self.product or 'USB serial')
+
+
+def _read_attribute(directory, name):
+    try:
+        return (directory / name).read_text().strip()
+    except OSError:
+        return ''
+
+
+def scan(sys_class_tty=SYS_CLASS_TTY, dev='/dev'):
+    """USB serial ports currently plugged in, sorted by port name."""
+    devices = []
+    entries = sorted(entry for pattern in PORT_PATTERNS for entry in sys_class_tty.glob(pattern))
+    for entry in entries:
+        interface = entry / 'device'
+        if not interface.exists():
+            continue
+        # ttyACM's device is the USB interface; ttyUSB's sits one level lower
+        usb = next((parent for parent in interface.resolve().parents
+                    if (parent / 'idVendor').exists()), None)
+        if usb is None:
+            continue
+        devices.append(UsbSerialDevice(
+            port=os.path.join(dev, entry.name),
+            vid=_read_attribute(usb, 'idVendor').lower(),
+            pid=_read_attribute(usb, 'idProduct').lower(),
+            serial=_read_attribute(usb, 'serial'),
+            location=usb.name,
+            product=_read_attribute(usb, 'product'),
+        ))
+    return devices
+
+
+class Registry:
+    """Prop name -> board identity, persisted as JSON at path."""
+
+    def __init__(self, path=DEFAULT_REGISTRY):
+        self.path = Path(path)
+        try:
+            document = json.loads(self.path.read_text())
+        except FileNotFoundError:
+            document = {'props': {}}
+        except ValueError as e:
+            raise ValueError(f"{self.path} is not valid JSON ({e}); fix or delete it") from None
+        if not isinstance(document, dict) or not isinstance(document.get('props'), dict):
+            raise ValueError(f"{self.path} has no 'props' object; fix or delete it")
+        self.props = document['props']
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_suffix('.tmp')
+        temporary.write_text(json.dumps({'props': self.props}, indent=2, sort_keys=True) + '\n')
+        os.replace(temporary, self.path)
+
+    def assign(self, prop, device):
+        identity = asdict(device)
+        del identity['port'], identity['product']
+        self.props[prop] = identity
+        self.save()
+
+    def forget(self, prop):
+        if self.props.pop(prop, None) is None:
+            raise LookupError(f"no prop named '{prop}'")
+        self.save()
+
+    def resolve(self, prop, devices=None):
+        """The plugged-in UsbSerialDevice assigned to prop.
+
+        Raises LookupError if prop is not registered or its board is not
+        plugged in.
+        """
+        if prop not in self.props:
+            known = ', '.join(sorted(self.props)) or 'none'
+            raise LookupError(f"no prop named '{prop}' (registered: {known}); assign one with "
+                              f"'python3 device_registry.py assign {prop} /dev/ttyACMn'")
+        wanted = self.props[prop]
+        identity = (wanted['vid'], wanted['pid'], wanted['serial'])
+        devices = scan() if devices is None else devices
+        candidates = [device for device in devices
+                      if (device.vid, device.pid, device.serial) == identity]
+        shared = any((other['vid'], other['pid'], other['serial']) == identity
+                     for name, other in self.props.items() if name != prop)
+        if shared or len(candidates) > 1:
+            candidates = [device for device in candidates
+                          if device.location == wanted['location']]
+        if len(candidates) != 1:
+            raise LookupError(f"board for '{prop}' ({wanted['vid']}:{wanted['pid']} "
+                              f"serial '{wanted['serial']}' at USB {wanted['location']}) "
+                              f"is not plugged in")
+        return candidates[0]
+
+    def resolve_all(self, devices=None):
+        """{prop: port, or None if its board is not plugged in}."""
+        devices = scan() if devices is None else devices
+        ports = {}
+        for prop in sorted(self.props):
+            try:
+                ports[prop] = self.resolve(prop, devices).port
+            except LookupError:
+                ports[prop] = None
+        return ports
+
+
+def resolve_port(target, registry=None):
+    """A device path as given, or the port of a registered prop name."""
+    if os.sep in target:
+        return target
+    return (registry or Registry()).resolve(target).port
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Discover USB serial boards and name them by prop')
+    parser.add_argument('--registry', default=DEFAULT_REGISTRY,
+                        help=f'registry file (default {DEFAULT_REGISTRY})')
+    commands = parser.add_subparsers(dest='command')
+    assign = commands.add_parser('assign', help='record the board on PORT as PROP')
+    assign.add_argument('prop')
+    assign.add_argument('port')
+    forget = commands.add_parser('forget', help='remove PROP from the registry')
+    forget.add_argument('prop')
+    args = parser.parse_args()
+
+    try:
+        registry = Registry(args.registry)
+        devices = scan()
+        if args.command == 'assign':
+            device = next((device for device in devices
+                           if os.path.realpath(device.port) == os.path.realpath(args.port)), None)
+            if device is None:
+                raise LookupError(f"{args.port} is not a USB serial board")
+            registry.assign(args.prop, device)
+            print(f"{args.prop} -> {device.port} ({device.vid}:{device.pid} "
+                  f"serial '{device.serial}' at USB {device.location})")
+        elif args.command == 'forget':
+            registry.forget(args.prop)
+            print(f"Forgot {args.prop}")
+        else:
+            ports = registry.resolve_all(devices)
+            if not devices:
+                print("No USB serial boards found")
+            for device in devices:
+                props = ', '.join(prop for prop, port in ports.items() if port == device.port)
+                print(f"{device.port:<14} {device.vid}:{device.pid}  serial '{device.serial}'  "
+                      f"USB {device.location:<8} {device.description:<36} {props or '-'}")
+            for prop, port in ports.items():
+                if port is None:
+                    print(f"{'(unplugged)':<14} {prop}")
+    except (LookupError, OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
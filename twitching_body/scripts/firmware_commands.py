@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Serial command tables for the prop firmware.
+
+Each Firmware lists the commands its loop() accepts and,
+for each one, a regex that marks the end of the reply plus a timeout
+sized from the sketch's own delays. Scripts then wait exactly as long as
+the board takes (see SerialClient.expect()) instead of sleeping.
+
+- SERVO_TEST (twitching_body/arduino/servo_test, 9600 baud) ends every
+  reply, and its startup banner, with an unterminated "Cmd: " prompt.
+- ANIMATION_TESTER (hatching_egg/arduino/animation_tester, 115200 baud)
+  has no prompt; each command's last line is matched instead.
+- MOTION_TRIGGER (window_spider_trigger/arduino/motion_trigger, 9600
+  baud) takes whole-word commands terminated by a newline.
+- TWITCHING_SERVOS (twitching_body/arduino/twitching_servos, 9600 baud)
+  takes no commands; only its startup output is awaited.
+"""
+
+from dataclasses import dataclass
+
+from serial_async import ExpectTimeout
+
+SERVO_TEST_PROMPT = r'^Cmd: $'
+
+
+@dataclass(frozen=True)
+class Command:
+    key: str
+    description: str
+    reply: str  # regex matching the last line of the reply
+    timeout_s: float
+    prompt: bool = False  # reply ends with an unterminated prompt
+
+
+@dataclass(frozen=True)
+class Firmware:
+    name: str
+    sketch: str
+    baud: int
+    ready: str  # regex matching the end of the startup output
+    ready_timeout_s: float
+    ready_prompt: bool
+    commands: dict
+    smoke: tuple = ()  # quick, harmless commands for serial_test.py
+    benchmark: tuple = ()  # default commands for serial_test.py --benchmark
+    line_ending: str = ''  # sent after each command
+
+    def command(self, key):
+        if key not in self.commands:
+            raise ValueError(f"{self.name} has no command '{key}' "
+                             f"(known: {' '.join(self.commands)})")
+        return self.commands[key]
+
+
+def command_table(*commands):
+    return {command.key: command for command in commands}
+
+
+def prompted(key, description, timeout_s):
+    return Command(key, description, SERVO_TEST_PROMPT, timeout_s, prompt=True)
+
+
+SERVO_TEST = Firmware(
+    name='servo_test',
+    sketch='twitching_body/arduino/servo_test',
+    baud=9600,
+    ready=SERVO_TEST_PROMPT,
+    ready_timeout_s=5,  # 500 ms settle, LED blinks, I2C scan, centering
+    ready_prompt=True,
+    commands=command_table(
+        prompted('i', 'I2C scan', 2),
+        prompted('0', 'Test HEAD (0-180-0 sweep)', 8),
+        prompted('1', 'Test LEFT ARM (0-180-0 sweep)', 8),
+        prompted('2', 'Test RIGHT ARM (0-180-0 sweep)', 8),
+        prompted('a', 'Test ALL servos', 6),
+        prompted('m', 'Manual calibration (11 pulses, 1 s each)', 15),
+        prompted('r', 'Raw PWM test (9 values, 1 s each)', 15),
+        prompted('c', 'Center all (90°)', 2),
+        prompted('d', 'Disable all servos', 2),
+        prompted('p', 'Show positions', 2),
+        prompted('<', 'Select previous servo', 2),
+        prompted('>', 'Select next servo', 2),
+        prompted('+', 'Adjust selected servo +10°', 2),
+        prompted('-', 'Adjust selected servo -10°', 2),
+        prompted('.', 'Adjust selected servo +1°', 2),
+        prompted(',', 'Adjust selected servo -1°', 2),
+        prompted('s', 'Status', 2),
+        prompted('h', 'Help', 2),
+    ),
+    smoke=('i', 's', 'h'),
+    benchmark=('s', 'h'),
+)
+
+ANIMATION_TESTER = Firmware(
+    name='animation_tester',
+    sketch='hatching_egg/arduino/animation_tester',
+    baud=115200,
+    ready=r'^Ready! ',
+    ready_timeout_s=5,  # waits up to 3 s for the host to open the port
+    ready_prompt=False,
+    commands=command_table(
+        *(Command(str(i), f'Select animation {i}', r'^(Starting: |Invalid animation index)', 1)
+          for i in range(7)),
+        Command('l', 'List all animations', r'^Current: \d+', 1),
+        Command('s', 'Stop current animation', r'^Stopping animation', 1),
+        Command('r', 'Restart current animation', r'^Starting: ', 1),
+        Command('h', 'Show help', r'^=+$', 1),
+    ),
+    smoke=('l', 'h'),
+    benchmark=tuple('0123456') + ('l', 'r'),
+)
+
+MOTION_TRIGGER = Firmware(
+    name='motion_trigger',
+    sketch='window_spider_trigger/arduino/motion_trigger',
+    baud=9600,
+    ready=r'^READY$',
+    ready_timeout_s=3,  # 1.2 s of LED blinks first
+    ready_prompt=False,
+    commands=command_table(
+        Command('STATUS', 'Switch state and cooldown', r'^Cooldown: ', 1),
+        Command('RESET', 'Reset cooldown timer', r'^Cooldown reset$', 1),
+        Command('TEST', 'Manual trigger', r'^Manual test trigger$', 1),
+    ),
+    smoke=('STATUS',),
+    benchmark=('STATUS',),
+    line_ending='\n',
+)
+
+TWITCHING_SERVOS = Firmware(
+    name='twitching_servos',
+    sketch='twitching_body/arduino/twitching_servos',
+    baud=9600,
+    ready=r'^Starting behavior cycle',
+    ready_timeout_s=4,  # 2.1 s of delays and blinks
+    ready_prompt=False,
+    commands={},
+)
+
+FIRMWARES = {firmware.name: firmware
+             for firmware in (SERVO_TEST, ANIMATION_TESTER, MOTION_TRIGGER, TWITCHING_SERVOS)}
+
+
+async def wait_ready(client, firmware):
+    """Wait for the end of the startup output: (ready, lines received).
+
+    A board that was already running when the port opened prints nothing,
+    so timing out here returns ready=False rather than raising.
+    """
+    try:
+        reply = await client.expect(firmware.ready, firmware.ready_timeout_s,
+                                    firmware.ready_prompt)
+        return True, reply.lines
+    except ExpectTimeout as e:
+        return False, e.lines
+
+
+async def run_command(client, firmware, key):
+    """Send one command and return its Reply as soon as the reply is complete.
+
+    Raises ValueError for a key the firmware does not know and
+    ExpectTimeout if the reply does not finish within the command timeout.
+    """
+    command = firmware.command(key)
+    return await client.transact(key + firmware.line_ending, command.reply, command.timeout_s,
+                                 command.prompt)
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Event-driven asyncio serial client for the prop firmware.
+
+The port is opened non-blocking and registered with the event loop
+(loop.add_reader), so the process sleeps until the board sends something
+instead of polling in_waiting. Each wakeup reads everything available in
+READ_CHUNK-byte reads, and LineSplitter turns the bytes into lines
+incrementally, so a line split across reads is joined and a burst of
+lines costs one wakeup.
+
+    async with SerialClient('/dev/ttyACM0') as client:
+        await client.write(b's')
+        async for line in client.lines(duration=2):
+            print(line)
+
+        reply = await client.transact(b's', r'^Pulse: ', timeout=2)
+        print(reply.lines, f"{reply.elapsed_s * 1000:.0f} ms")
+
+expect() returns as soon as a line - or, with prompt=True, an idle
+unterminated prompt such as servo_test's "Cmd: " - matches a regex, so
+scripts wait as long as the firmware takes instead of sleeping for a
+fixed time.
+
+Only the standard library is used (termios configures 8N1 raw mode), so
+this runs on the Raspberry Pi without pyserial. POSIX only.
+"""
+
+import asyncio
+import errno
+import os
+import re
+import termios
+import time
+import dataclasses
+from dataclasses import dataclass
+
+DEFAULT_BAUD = 9600
+READ_CHUNK = 4096
+PROMPT_SETTLE_S = 0.02  # an unterminated tail this quiet is a prompt, not a partial line
+BAUD_RATES = {
+    1200: termios.B1200, 2400: termios.B2400, 4800: termios.B4800, 9600: termios.B9600,
+    19200: termios.B19200, 38400: termios.B38400, 57600: termios.B57600,
+    115200: termios.B115200,
+}
+
+
+class SerialClosed(EOFError):
+    """The port was closed or the device went away (e.g. unplugged)."""
+
+
+class ExpectTimeout(TimeoutError):
+    """expect() saw no match in time; lines holds what arrived instead."""
+
+    def __init__(self, pattern, timeout, lines):
+        super().__init__(f"no match for {pattern.pattern!r} within {timeout:g} s "
+                         f"({len(lines)} lines received)")
+        self.pattern = pattern
+        self.lines = lines
+
+
+@dataclass(frozen=True)
+class Reply:
+    lines: list
+    match: re.Match
+    elapsed_s: float
+    first_byte_ns: int = None  # transact(): write -> first byte read back
+
+
+def configure_raw(fd, baud=DEFAULT_BAUD, keep_dtr=False):
+    """Put a tty into raw 8N1 mode at baud with no flow control.
+
+    keep_dtr clears HUPCL, so closing the port leaves DTR/RTS asserted
+    instead of dropping them (which resets boards with DTR auto-reset, and
+    makes a Leonardo's Serial discard output until the next open).
+    """
+    if baud not in BAUD_RATES:
+        raise ValueError(f"unsupported baud rate {baud} (use one of {sorted(BAUD_RATES)})")
+    iflag, oflag, cflag, lflag, _, _, cc = termios.tcgetattr(fd)
+    iflag &= ~(termios.IGNBRK | termios.BRKINT | termios.PARMRK | termios.ISTRIP
+               | termios.INLCR | termios.IGNCR | termios.ICRNL | termios.IXON
+               | termios.IXOFF | termios.IXANY)
+    oflag &= ~termios.OPOST
+    lflag &= ~(termios.ECHO | termios.ECHONL | termios.ICANON | termios.ISIG | termios.IEXTEN)
+    cflag &= ~(termios.CSIZE | termios.PARENB | termios.CSTOPB)
+    cflag |= termios.CS8 | termios.CREAD | termios.CLOCAL
+    if keep_dtr:
+        cflag &= ~termios.HUPCL
+    if hasattr(termios, 'CRTSCTS'):
+        cflag &= ~termios.CRTSCTS
+    cc[termios.VMIN] = 0
+    cc[termios.VTIME] = 0
+    speed = BAUD_RATES[baud]
+    termios.tcsetattr(fd, termios.TCSANOW, [iflag, oflag, cflag, lflag, speed, speed, cc])
+
+
+class LineSplitter:
+    """Incremental byte -> line splitter.
+
+    feed() returns the lines completed by a chunk, without their '\\n' or
+    '\\r\\n' (Serial.println() sends '\\r\\n'); an unterminated tail is kept
+    for the next chunk.
+    """
+
+    def __init__(self, encoding='utf-8'):
+        self.encoding = encoding
+        self._buf = bytearray()
+
+    def feed(self, data):
+        self._buf += data
+        end = self._buf.rfind(b'\n')
+        if end < 0:
+            return []
+        complete = bytes(self._buf[:end])
+        del self._buf[:end + 1]
+        return [line.rstrip(b'\r').decode(self.encoding, errors='ignore')
+                for line in complete.split(b'\n')]
+
+    def peek(self):
+        """The unterminated tail decoded, without consuming it."""
+        return self._buf.rstrip(b'\r').decode(self.encoding, errors='ignore')
+
+    def flush(self):
+        """The unterminated tail as a line ('' if none), clearing it."""
+        tail = self.peek()
+        self._buf.clear()
+        return tail
+
+
+class SerialClient:
+    """Line-oriented asyncio client for a serial device (or any tty / pty)."""
+
+    def __init__(self, port, baud=DEFAULT_BAUD, keep_dtr=False):
+        self.port = port
+        self.baud = baud
+        self.keep_dtr = keep_dtr
+        self.fd = None
+        self._loop = None
+        self._splitter = LineSplitter()
+        self._lines = asyncio.Queue()
+        self._received = asyncio.Event()
+        self._closed = False
+        self.bytes_read = 0
+        self.wakeups = 0
+        self.last_received = None  # perf_counter() of the latest read
+        self.first_read_ns = None  # perf_counter_ns() of the first read since the last write
+
+    async def open(self):
+        self._loop = asyncio.get_running_loop()
+        self.fd = await self._open_fd()
+        self._loop.add_reader(self.fd, self._on_readable)
+        return self
+
+    async def _open_fd(self):
+        """Open the port; returns a non-blocking fd (overridden by BrokerClient)."""
+        fd = os.open(self.port, os.O_RDWR | os.O_NOCTTY | os.O_NONBLOCK)
+        try:
+            if os.isatty(fd):
+                configure_raw(fd, self.baud, self.keep_dtr)
+        except (OSError, termios.error, ValueError):
+            os.close(fd)
+            raise
+        return fd
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+    def _on_readable(self):
+        """Reader callback: drain the fd in bulk chunks and queue complete lines."""
+        self.wakeups += 1
+        while True:
+            try:
+                data = os.read(self.fd, READ_CHUNK)
+            except BlockingIOError:
+                return
+            except OSError as e:
+                # EIO: device unplugged or pty peer closed
+                if e.errno != errno.EIO:
+                    raise
+                data = b''
+            if not data:
+                self._hang_up()
+                return
+            self._feed(data)
+            if len(data) < READ_CHUNK:
+                return
+
+    def _feed(self, data):
+        self.bytes_read += len(data)
+        if self.first_read_ns is None:
+            self.first_read_ns = time.perf_counter_ns()
+        self.last_received = time.perf_counter()
+        self._received.set()
+        for line in self._splitter.feed(data):
+            self._lines.put_nowait(line)
+
+    def _hang_up(self):
+        tail = self._splitter.flush()
+        if tail:
+            self._lines.put_nowait(tail)
+        self._lines.put_nowait(None)  # wakes readers; they raise SerialClosed
+        self._received.set()
+        self._detach()
+
+    def _detach(self):
+        if self.fd is not None and not self._closed:
+            self._loop.remove_reader(self.fd)
+        self._closed = True
+
+    def close(self):
+        """Stop reading and close the port. Safe to call more than once."""
+        if self.fd is None:
+            return
+        self._detach()
+        os.close(self.fd)
+        self.fd = None
+
+    async def write(self, data):
+        """Write all of data, waiting for the fd to become writable as needed."""
+        if isinstance(data, str):
+            data = data.encode()
+        self.first_read_ns = None
+        view = memoryview(data)
+        while view:
+            if self.fd is None or self._closed:
+                raise SerialClosed(f"{self.port} is closed")
+            try:
+                view = view[os.write(self.fd, view):]
+            except BlockingIOError:
+                writable = self._loop.create_future()
+                self._loop.add_writer(self.fd, writable.set_result, None)
+                try:
+                    await writable
+                finally:
+                    self._loop.remove_writer(self.fd)
+
+    async def readline(self, timeout=None):
+        """Next complete line.
+
+        Raises TimeoutError if none arrives within timeout seconds and
+        SerialClosed once the device has gone away and every line is read.
+        """
+        if self._lines.empty() and self._closed:
+            raise SerialClosed(f"{self.port} is closed")
+        try:
+            line = await asyncio.wait_for(self._lines.get(), timeout)
+        except asyncio.TimeoutError:  # not the builtin TimeoutError before Python 3.11
+            raise TimeoutError(f"no line from {self.port} within {timeout:g} s") from None
+        if line is None:
+            self._lines.put_nowait(None)  # keep later readers from blocking
+            raise SerialClosed(f"{self.port} is closed")
+        return line
+
+    def pending_lines(self):
+        """Lines already received and not yet read, without waiting."""
+        lines = []
+        while not self._lines.empty():
+            line = self._lines.get_nowait()
+            if line is None:
+                self._lines.put_nowait(None)
+                break
+            lines.append(line)
+        return lines
+
+    def discard(self):
+        """Drop every received line and any unterminated tail."""
+        self.pending_lines()
+        self._splitter.flush()
+
+    async def expect(self, pattern, timeout=None, prompt=False, settle_s=PROMPT_SETTLE_S):
+        """Read lines until one matches the regex pattern.
+
+        With prompt=True the pattern is matched against the unterminated
+        tail instead, once no byte has followed it for settle_s, so a
+        prompt echoed inside a reply (as a whole line) does not count.
+        Returns a Reply whose lines are
+        everything read, up to and including the match; later lines stay
+        queued. Raises ExpectTimeout (a TimeoutError) with the lines read
+        so far, or SerialClosed if the device goes away first.
+        """
+        pattern = re.compile(pattern)
+        lines = []
+        start = time.perf_counter()
+
+        async def scan():
+            while True:
+                while not self._lines.empty():
+                    line = self._lines.get_nowait()
+                    if line is None:
+                        self._lines.put_nowait(None)
+                        raise SerialClosed(f"{self.port} is closed")
+                    lines.append(line)
+                    match = None if prompt else pattern.search(line)
+                    if match:
+                        return Reply(lines, match, time.perf_counter() - start)
+                if self._closed:
+                    raise SerialClosed(f"{self.port} is closed")
+                self._received.clear()
+                match = pattern.search(self._splitter.peek()) if prompt else None
+                if match:
+                    try:
+                        await asyncio.wait_for(self._received.wait(), settle_s)
+                        continue  # more bytes followed: not a prompt yet
+                    except asyncio.TimeoutError:
+                        lines.append(self._splitter.flush())
+                        return Reply(lines, match, max(0.0, self.last_received - start))
+                await self._received.wait()
+
+        try:
+            return await asyncio.wait_for(scan(), timeout)
+        except asyncio.TimeoutError:
+            raise ExpectTimeout(pattern, timeout, lines) from None
+
+    async def transact(self, data, pattern, timeout=None, prompt=False):
+        """Discard stale input, write data and expect() its reply.
+
+        elapsed_s runs from the write to the matching line (not counting
+        the prompt settle time); first_byte_ns from just before the write
+        to the reader callback that received the first byte of the reply.
+        """
+        self.discard()
+        sent_ns = time.perf_counter_ns()
+        await self.write(data)
+        reply = await self.expect(pattern, timeout, prompt)
+        return dataclasses.replace(reply, first_byte_ns=self.first_read_ns - sent_ns)
+
+    async def lines(self, duration=None, idle_timeout=None):
+        """Async iterator over received lines.
+
+        Stops after duration seconds in total, after idle_timeout seconds
+        with no new line, or when the device goes away - whichever comes
+        first. With neither limit it runs until the device goes away.
+        """
+        deadline = None if duration is None else self._loop.time() + duration
+        while True:
+            timeout = idle_timeout
+            if deadline is not None:
+                remaining = deadline - self._loop.time()
+                if remaining <= 0:
+                    return
+                timeout = remaining if timeout is None else min(timeout, remaining)
+            try:
+                yield await self.readline(timeout)
+            except (TimeoutError, SerialClosed):
+                return
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Round-trip latency benchmark for firmware serial commands.
+
+Each command is sent N times. For every round trip the write and the
+first byte of the reply are timestamped with time.perf_counter_ns()
+(see SerialClient.transact()), and the full reply is awaited before the
+next command, so every sample starts from an idle link. Per command it reports:
+
+- p50/p95/p99 of the first-byte latency: how long loop() took to notice
+  the command, including any Serial.print() chatter (updateAnimation(),
+  handleAnimationComplete()) queued ahead of it;
+- jitter: mean absolute difference between consecutive samples (the
+  RFC 3550 interarrival-jitter idea, without its smoothing);
+- p50 of the time until the reply is complete.
+
+Run it before and after a firmware change to compare. The USB CDC
+endpoint and the host's scheduler are in every sample, so compare
+numbers taken on the same host.
+"""
+
+import statistics
+
+from firmware_commands import run_command
+
+DEFAULT_ROUNDS = 50
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(sorted_values, p):
+    """Linear-interpolated percentile of already sorted values."""
+    if not sorted_values:
+        raise ValueError("no samples")
+    rank = (len(sorted_values) - 1) * p / 100
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def jitter(values):
+    """Mean absolute difference between consecutive samples (0 for fewer than two)."""
+    if len(values) < 2:
+        return 0
+    return statistics.fmean(abs(b - a) for a, b in zip(values, values[1:]))
+
+
+def latency_stats(first_byte_ns, complete_ns):
+    """Summary of one command's samples, in nanoseconds."""
+    ordered = sorted(first_byte_ns)
+    stats = {f'p{p}': percentile(ordered, p) for p in PERCENTILES}
+    stats.update(
+        samples=len(first_byte_ns),
+        min=ordered[0],
+        max=ordered[-1],
+        jitter=jitter(first_byte_ns),
+        complete_p50=percentile(sorted(complete_ns), 50),
+    )
+    return stats
+
+
+async def benchmark(client, firmware, keys, rounds=DEFAULT_ROUNDS, on_sample=None):
+    """Run each command `rounds` times; returns {key: latency_stats()}.
+
+    Commands are interleaved (s, h, s, h, ...) so slow drift on the host
+    affects all of them alike. on_sample(key, reply) is called after each
+    round trip, e.g. for progress output.
+    """
+    for key in keys:
+        firmware.command(key)  # unknown keys fail before anything is sent
+    samples = {key: ([], []) for key in keys}
+    for _ in range(rounds):
+        for key in keys:
+            reply = await run_command(client, firmware, key)
+            first_byte, complete = samples[key]
+            first_byte.append(reply.first_byte_ns)
+            complete.append(round(reply.elapsed_s * 1e9))
+            if on_sample:
+                on_sample(key, reply)
+    return {key: latency_stats(*samples[key]) for key in keys}
+
+
+def format_stats_header():
+    return (f"{'cmd':<4} {'n':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+            f"{'max ms':>8} {'jitter ms':>9} {'reply p50 ms':>12}")
+
+
+def format_stats_row(key, description, stats):
+    ms = {name: value / 1e6 for name, value in stats.items() if name != 'samples'}
+    return (f"{key!r:<4} {stats['samples']:>5} {ms['p50']:>8.2f} {ms['p95']:>8.2f} "
+            f"{ms['p99']:>8.2f} {ms['max']:>8.2f} {ms['jitter']:>9.2f} "
+            f"{ms['complete_p50']:>12.2f}  {description}")
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Long-lived serial broker: holds the prop boards' ports open so scripts
+can attach without reopening them.
+
+Every open of a Leonardo's port raises DTR, and every close drops it.
+The firmware's Serial discards output while DTR is low, and boards with
+DTR auto-reset reboot. So each script run used to lose whatever the
+board printed between runs, and then wait out a startup banner that
+never came. The broker opens each board once, with HUPCL cleared (see
+configure_raw(keep_dtr=True)), and keeps it open. Scripts connect over a
+Unix socket and get a byte stream identical to the port:
+
+    python3 serial_broker.py &                              # or: pixi run serial-broker
+    python3 serial_test.py --broker --port twitching_body   # prop name or /dev path
+
+Protocol: the client sends "ATTACH <prop or port> <baud>\\n"; the broker
+answers "OK <port> <replay bytes> <new|held>\\n" and then the board's
+startup transcript (what it printed after the broker opened it, up to
+its first 1 s pause, so wait_ready() still sees the banner; empty for a
+board that stayed silent that first second), then live output. "held" means the port was already open, so nothing more is
+pending from startup. Bytes the client sends go to the board. Errors are
+"ERR <message>\\n". Several clients may attach to one board; all of them
+see its output.
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import sys
+
+from device_registry import DEFAULT_REGISTRY, Registry, resolve_port
+from serial_async import DEFAULT_BAUD, SerialClient, SerialClosed, configure_raw
+
+DEFAULT_SOCKET = os.path.join(os.environ.get('XDG_RUNTIME_DIR') or '/tmp',
+                              f'halloween-serial-{os.getuid()}.sock')
+TRANSCRIPT_IDLE_S = 1.0  # the startup transcript ends at the first pause this long
+TRANSCRIPT_BYTES = 16384
+RESET_BAUD = 1200  # opening a Leonardo at 1200 baud reboots it into the bootloader
+HANDSHAKE_TIMEOUT_S = 5
+
+
+class BrokerError(ConnectionError):
+    """The broker refused the attach (unknown prop, board unplugged, ...)."""
+
+
+class BrokerClient(SerialClient):
+    """SerialClient attached through serial_broker.py instead of opening the port.
+
+    `replayed` is the size of the startup transcript sent on attach and
+    `held` whether the broker already had the port open. A held port with
+    nothing replayed printed no banner, so there is none to wait for.
+    """
+
+    def __init__(self, socket_path, target, baud=DEFAULT_BAUD):
+        super().__init__(target, baud)
+        self.socket_path = socket_path
+        self.device = None
+        self.replayed = 0
+        self.held = False
+
+    async def _open_fd(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.setblocking(False)
+        try:
+            await self._loop.sock_connect(sock, self.socket_path)
+            await self._loop.sock_sendall(sock, f"ATTACH {self.port} {self.baud}\n".encode())
+            header = b''
+            while b'\n' not in header:
+                data = await asyncio.wait_for(self._loop.sock_recv(sock, 4096),
+                                              HANDSHAKE_TIMEOUT_S)
+                if not data:
+                    raise BrokerError(f"broker at {self.socket_path} closed the connection")
+                header += data
+        except BaseException:
+            sock.close()
+            raise
+        header, rest = header.split(b'\n', 1)
+        status, _, detail = header.decode(errors='replace').partition(' ')
+        if status != 'OK':
+            sock.close()
+            raise BrokerError(detail)
+        self.device, replayed, opened = detail.rsplit(' ', 2)
+        self.replayed = int(replayed)
+        self.held = opened == 'held'
+        if rest:
+            self._feed(rest)
+        return sock.detach()
+
+
+class BrokerPort(SerialClient):
+    """A board held open by the broker; fans its raw output out to clients."""
+
+    def __init__(self, port, baud, on_lost):
+        super().__init__(port, baud, keep_dtr=True)
+        self.clients = set()
+        self.transcript = bytearray()
+        self._recording = True
+        self._transcript_timer = None
+        self._on_lost = on_lost
+
+    async def open(self):
+        await super().open()
+        # Timed from the open, so a running board that prints nothing does
+        # not record its later replies as a startup banner
+        self._restart_transcript_timer()
+        return self
+
+    def _restart_transcript_timer(self):
+        if self._transcript_timer:
+            self._transcript_timer.cancel()
+        self._transcript_timer = self._loop.call_later(TRANSCRIPT_IDLE_S, self._end_transcript)
+
+    def _feed(self, data):
+        self.bytes_read += len(data)
+        if self._recording:
+            self.transcript += data[:TRANSCRIPT_BYTES - len(self.transcript)]
+            self._restart_transcript_timer()
+        for writer in self.clients:
+            writer.write(data)
+
+    def _end_transcript(self):
+        self._recording = False
+
+    def _hang_up(self):
+        self._detach()
+        for writer in self.clients:
+            writer.close()
+        self.clients.clear()
+        self._on_lost(self)
+
+    def set_baud(self, baud):
+        if baud != self.baud:
+            configure_raw(self.fd, baud, keep_dtr=True)
+            self.baud = baud
+
+    def attach(self, writer, held):
+        header = f"OK {self.port} {len(self.transcript)} {'held' if held else 'new'}\n"
+        writer.write(header.encode() + self.transcript)
+        self.clients.add(writer)
+
+
+class SerialBroker:
+    def __init__(self, socket_path=DEFAULT_SOCKET, registry=None):
+        self.socket_path = socket_path
+        self.registry = registry or Registry()
+        self.ports = {}  # device path -> BrokerPort
+        self._opening = {}  # device path -> asyncio.Lock held while it is opened
+
+    async def open_port(self, target, baud=DEFAULT_BAUD):
+        """(BrokerPort, held) for a prop name or device path, opening it if needed.
+
+        held is True if the port was already open.
+        """
+        if baud == RESET_BAUD:
+            raise ValueError(f"{RESET_BAUD} baud would reset a Leonardo into its bootloader")
+        device = os.path.realpath(resolve_port(target, self.registry))
+        # Concurrent attaches to one board wait for a single open
+        async with self._opening.setdefault(device, asyncio.Lock()):
+            port = self.ports.get(device)
+            held = port is not None
+            if not held:
+                port = await BrokerPort(device, baud, self._lost).open()
+                self.ports[device] = port
+                print(f"Opened {device} at {baud} baud (for {target})", flush=True)
+        port.set_baud(baud)
+        return port, held
+
+    def _lost(self, port):
+        print(f"Lost {port.port} (unplugged?)", flush=True)
+        self.ports.pop(port.port, None)
+        port.close()
+
+    async def _handle_client(self, reader, writer):
+        port = None
+        try:
+            request = await asyncio.wait_for(reader.readline(), HANDSHAKE_TIMEOUT_S)
+            command, *args = request.decode(errors='replace').split()
+            if command != 'ATTACH' or not 1 <= len(args) <= 2:
+                raise ValueError(f"expected 'ATTACH <prop or port> [baud]', got {request!r}")
+            port, held = await self.open_port(args[0],
+                                              int(args[1]) if len(args) > 1 else DEFAULT_BAUD)
+            port.attach(writer, held)
+            while data := await reader.read(4096):
+                await port.write(data)
+        except (asyncio.TimeoutError, LookupError, OSError, ValueError) as e:
+            # asyncio.TimeoutError (not an OSError before Python 3.11) has no message
+            reason = str(e) or f"no ATTACH line within {HANDSHAKE_TIMEOUT_S} s"
+            writer.write(f"ERR {reason}\n".encode())
+        except SerialClosed:
+            pass  # unplugged mid-write; _lost() already closed the client
+        finally:
+            if port is not None:
+                port.clients.discard(writer)
+            writer.close()
+
+    async def serve(self):
+        """Accept clients until cancelled."""
+        if os.path.exists(self.socket_path):
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                if probe.connect_ex(self.socket_path) == 0:
+                    raise OSError(f"a broker is already listening on {self.socket_path}")
+            os.unlink(self.socket_path)  # left over from a broker that was killed
+        server = await asyncio.start_unix_server(self._handle_client, self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for port in list(self.ports.values()):
+                port.close()
+            self.ports.clear()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+
+def parse_target(text):
+    """'twitching_body' or 'animation_tester@115200' -> (target, baud)."""
+    target, _, baud = text.partition('@')
+    return target, int(baud) if baud else DEFAULT_BAUD
+
+
+async def run_broker(socket_path, registry, open_targets):
+    broker = SerialBroker(socket_path, registry)
+    for text in open_targets:
+        await broker.open_port(*parse_target(text))
+    print(f"Serial broker listening on {socket_path}", flush=True)
+    await broker.serve()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Hold prop serial ports open for scripts')
+    parser.add_argument('--socket', default=DEFAULT_SOCKET,
+                        help=f'Unix socket path (default {DEFAULT_SOCKET})')
+    parser.add_argument('--registry', default=DEFAULT_REGISTRY,
+                        help=f'prop registry (default {DEFAULT_REGISTRY})')
+    parser.add_argument('--open', action='append', default=[], metavar='TARGET[@BAUD]',
+                        help='open a prop or port at startup to capture its banner '
+                             '(repeatable, e.g. hatching_egg@115200)')
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(run_broker(args.socket, Registry(args.registry), args.open))
+    except KeyboardInterrupt:
+        pass
+    except (LookupError, OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
@@ -2,69 +2,107 @@
 """
 Serial test script for servo test code
 Reads output and sends test commands
+
+Each step returns as soon as the firmware's reply is complete (see
+firmware_commands.py), so a run takes as long as the board does.
+--benchmark N instead measures round-trip latency (serial_benchmark.py).
+--port takes a device path or a prop name from device_registry.py, and
+--broker attaches through serial_broker.py instead of opening the port.
 """
 
-import serial
-import time
+import argparse
+import asyncio
 import sys
 
+from device_registry import resolve_port
+from firmware_commands import FIRMWARES, SERVO_TEST, run_command, wait_ready
+from serial_async import ExpectTimeout, SerialClient, SerialClosed
+from serial_broker import DEFAULT_SOCKET, BrokerClient
+from serial_benchmark import benchmark, format_stats_header, format_stats_row
+
 PORT = '/dev/ttyACM0'
-BAUD = 9600
-TIMEOUT = 2
 
-def read_and_print_line(ser):
-    """Read and print a single line if available."""
-    if ser.in_waiting:
-        line = ser.readline().decode('utf-8', errors='ignore').strip()
-        if line:
-            print(line)
-        return True
-    return False
+def print_lines(lines):
+    """Print non-empty lines of serial output."""
+    for line in lines:
+        if line.strip():
+            print(line.strip())
 
-def read_serial_lines(ser, duration=None):
-    """Read and print available serial output."""
-    if duration:
-        start_time = time.time()
-        while time.time() - start_time < duration:
-            read_and_print_line(ser)
-    else:
-        # Read all available lines
-        while ser.in_waiting:
-            line = ser.readline().decode('utf-8', errors='ignore').strip()
-            if line:
-                print(line)
+async def send_command_and_read(client, firmware, command):
+    """Send a command and print the reply once it is complete."""
+    print(f"\n=== Sending '{command}' command ({firmware.command(command).description}) ===")
+    reply = await run_command(client, firmware, command)
+    print_lines(reply.lines)
+    print(f"({reply.elapsed_s * 1000:.0f} ms)")
 
-def send_command_and_read(ser, command, description, delay=1):
-    """Send a command and read the response."""
-    print(f"\n=== {description} ===")
-    ser.write(command.encode())
-    time.sleep(delay)
-    read_serial_lines(ser)
+async def run_benchmark(client, firmware, keys, rounds):
+    print(f"\n=== Benchmark: {rounds} round trips per command ===")
+    results = await benchmark(client, firmware, keys, rounds)
+    print("First-byte latency (write -> first reply byte):")
+    print(format_stats_header())
+    for key, stats in results.items():
+        print(format_stats_row(key, firmware.command(key).description, stats))
 
-def test_serial():
-    print("Opening serial port...")
-    try:
-        ser = serial.Serial(PORT, BAUD, timeout=TIMEOUT)
-        time.sleep(2)  # Wait for Arduino reset
+def parse_commands(text, firmware):
+    """'sh' -> ['s', 'h']; newline-terminated commands are comma separated."""
+    if text is None:
+        return None
+    return text.split(',') if firmware.line_ending else list(text)
 
-        print("\n=== Reading startup output ===")
-        read_serial_lines(ser, duration=5)
+async def test_serial(port=PORT, firmware=SERVO_TEST, rounds=0, keys=None, broker=None):
+    try:
+        if broker:
+            print(f"Attaching to {port} through {broker}...")
+            client = BrokerClient(broker, port, firmware.baud)
+        else:
+            print("Opening serial port...")
+            client = SerialClient(resolve_port(port), firmware.baud)
+        async with client:
+            print("\n=== Reading startup output ===")
+            if broker and client.held and not client.replayed:
+                ready, lines = False, []  # nothing printed since the broker opened it
+            else:
+                ready, lines = await wait_ready(client, firmware)
+            print_lines(lines)
+            if not ready:
+                print("(no startup output - board was already running)")
 
-        send_command_and_read(ser, 'i', "Sending 'i' command (I2C scan)", delay=2)
-        send_command_and_read(ser, 's', "Sending 's' command (status)")
-        send_command_and_read(ser, 'h', "Sending 'h' command (help)")
+            if rounds:
+                await run_benchmark(client, firmware, keys or firmware.benchmark, rounds)
+            else:
+                for command in keys or firmware.smoke:
+                    await send_command_and_read(client, firmware, command)
 
-        ser.close()
         print("\n=== Test complete ===")
         return True
 
-    except serial.SerialException as e:
+    except ExpectTimeout as e:
+        print_lines(e.lines)
         print(f"Error: {e}")
         return False
-    except KeyboardInterrupt:
-        print("\nInterrupted")
+    except (LookupError, OSError, SerialClosed, ValueError) as e:
+        print(f"Error: {e}")
         return False
 
 if __name__ == '__main__':
-    success = test_serial()
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--port', default=PORT,
+                        help=f'serial device or registered prop name (default {PORT})')
+    parser.add_argument('--broker', nargs='?', const=DEFAULT_SOCKET, metavar='SOCKET',
+                        help=f'attach through serial_broker.py (default socket {DEFAULT_SOCKET})')
+    parser.add_argument('--firmware', choices=FIRMWARES, default=SERVO_TEST.name,
+                        help='sketch running on the board (default servo_test)')
+    parser.add_argument('--benchmark', type=int, default=0, metavar='N',
+                        help='send each command N times and report latency percentiles')
+    parser.add_argument('--commands', help="commands to send, e.g. 'sh' or 'STATUS,TEST' "
+                                           "(default per firmware)")
+    args = parser.parse_args()
+
+    firmware = FIRMWARES[args.firmware]
+    try:
+        success = asyncio.run(test_serial(args.port, firmware, args.benchmark,
+                                          parse_commands(args.commands, firmware), args.broker))
+    except KeyboardInterrupt:
+        print("\nInterrupted")
+        success = False
     sys.exit(0 if success else 1)
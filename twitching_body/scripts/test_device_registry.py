@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Unit tests for device_registry.py against a fake sysfs tree
+"""
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from device_registry import Registry, UsbSerialDevice, resolve_port, scan
+
+
+def board(port, serial='', location='1-1.2', vid='2341', pid='8036'):
+    return UsbSerialDevice(port, vid, pid, serial, location)
+
+
+class TestScan(unittest.TestCase):
+    """scan() reads VID:PID, serial and location from /sys/class/tty."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.tty = self.root / 'class' / 'tty'
+        self.tty.mkdir(parents=True)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def add_port(self, name, usb_path, interface_depth=1, **attributes):
+        usb = self.root / 'devices' / usb_path
+        interface = usb
+        for level in range(interface_depth):
+            interface = interface / f'{usb.name}:1.{level}'
+        interface.mkdir(parents=True)
+        for attribute, value in attributes.items():
+            (usb / attribute).write_text(f'{value}\n')
+        (self.tty / name).mkdir()
+        (self.tty / name / 'device').symlink_to(interface)
+
+    def test_acm_and_usb_serial_ports(self):
+        self.add_port('ttyACM1', 'usb1/1-1/1-1.3', idVendor='2341', idProduct='8036',
+                      product='Arduino Leonardo')
+        self.add_port('ttyUSB0', 'usb1/1-2', interface_depth=2, idVendor='1A86',
+                      idProduct='7523', serial='A50285BI')
+        (self.tty / 'tty0').mkdir()  # virtual console: no device link
+        devices = scan(self.tty)
+        self.assertEqual([device.port for device in devices], ['/dev/ttyACM1', '/dev/ttyUSB0'])
+        leonardo, ch340 = devices
+        self.assertEqual((leonardo.vid, leonardo.pid, leonardo.serial, leonardo.location),
+                         ('2341', '8036', '', '1-1.3'))
+        self.assertEqual(leonardo.description, 'Arduino Leonardo / DFRobot Beetle')
+        self.assertEqual((ch340.vid, ch340.serial, ch340.location), ('1a86', 'A50285BI', '1-2'))
+
+
+class TestRegistry(unittest.TestCase):
+    """Assignments persist and follow the board, not the port name."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / 'halloween' / 'serial-devices.json'
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_unique_serial_follows_the_board(self):
+        registry = Registry(self.path)
+        registry.assign('hatching_egg', board('/dev/ttyACM0', serial='8503230', location='1-1.2'))
+        moved = [board('/dev/ttyACM0', location='1-1.2'),
+                 board('/dev/ttyACM1', serial='8503230', location='1-1.4')]
+        self.assertEqual(Registry(self.path).resolve('hatching_egg', moved).port, '/dev/ttyACM1')
+
+    def test_shared_serial_uses_location(self):
+        """Two Beetles with the same (empty) serial are told apart by hub port."""
+        registry = Registry(self.path)
+        registry.assign('twitching_body', board('/dev/ttyACM0', location='1-1.2'))
+        registry.assign('window_spider', board('/dev/ttyACM1', location='1-1.3'))
+        swapped = [board('/dev/ttyACM0', location='1-1.3'), board('/dev/ttyACM1', location='1-1.2')]
+        self.assertEqual(registry.resolve_all(swapped),
+                         {'twitching_body': '/dev/ttyACM1', 'window_spider': '/dev/ttyACM0'})
+        # one of them unplugged: the other board must not stand in for it
+        self.assertEqual(registry.resolve_all(swapped[:1]),
+                         {'twitching_body': None, 'window_spider': '/dev/ttyACM0'})
+
+    def test_errors(self):
+        registry = Registry(self.path)
+        with self.assertRaisesRegex(LookupError, 'no prop named'):
+            registry.resolve('hatching_egg', [])
+        registry.assign('hatching_egg', board('/dev/ttyACM0', serial='1'))
+        with self.assertRaisesRegex(LookupError, 'not plugged in'):
+            registry.resolve('hatching_egg', [board('/dev/ttyACM0', serial='2')])
+        registry.forget('hatching_egg')
+        self.assertEqual(Registry(self.path).props, {})
+        with self.assertRaises(LookupError):
+            registry.forget('hatching_egg')
+
+    def test_corrupt_file(self):
+        """A truncated or hand-edited registry names the file instead of a traceback."""
+        self.path.parent.mkdir(parents=True)
+        for text in ('{"props": {"hatching_egg": ', '{"boards": {}}', '[]', '{"props": []}'):
+            self.path.write_text(text)
+            with self.assertRaisesRegex(ValueError, r'serial-devices\.json (is not valid JSON|has no .props. object)'):
+                Registry(self.path)
+
+    def test_resolve_port_passes_paths_through(self):
+        self.assertEqual(resolve_port('/dev/ttyACM3', Registry(self.path)), '/dev/ttyACM3')
+        self.assertFalse(os.path.exists(self.path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Unit tests for firmware_commands.py
+
+The command tables are checked against the sketches' switch statements,
+and run_command() against a scripted board on a pty.
+"""
+
+import asyncio
+import dataclasses
+import os
+import re
+import unittest
+from pathlib import Path
+
+from firmware_commands import (ANIMATION_TESTER, MOTION_TRIGGER, SERVO_TEST, run_command,
+                               wait_ready)
+from serial_async import ExpectTimeout, SerialClient
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+def sketch_commands(firmware, function):
+    """Commands a sketch function handles: lowercase switch cases and `command == "X"` words."""
+    source = (REPO_ROOT / firmware.sketch / f"{Path(firmware.sketch).name}.ino").read_text()
+    body = source[source.index(f"void {function}("):]
+    body = body[:(body + "\n").index("\n}\n")]  # the last function may end the file
+    keys = set(re.findall(r"case '(.)':", body))
+    keys |= set(re.findall(r'command == "(\w+)"', body))
+    return {key for key in keys if not (len(key) == 1 and key.isupper()) and key not in '?\r\n'}
+
+
+class TestCommandTables(unittest.TestCase):
+    """Every command the firmware handles is in its table, and nothing else."""
+
+    def test_servo_test_table(self):
+        self.assertEqual(set(SERVO_TEST.commands), sketch_commands(SERVO_TEST, 'processCommand'))
+
+    def test_animation_tester_table(self):
+        self.assertEqual(set(ANIMATION_TESTER.commands),
+                         sketch_commands(ANIMATION_TESTER, 'handleSerialCommand'))
+
+    def test_motion_trigger_table(self):
+        self.assertEqual(set(MOTION_TRIGGER.commands), sketch_commands(MOTION_TRIGGER, 'serialEvent'))
+
+    def test_unknown_command_raises(self):
+        with self.assertRaises(ValueError):
+            SERVO_TEST.command('x')
+
+
+class TestRunCommand(unittest.TestCase):
+    """run_command() and wait_ready() against a scripted servo_test board."""
+
+    def setUp(self):
+        self.master, self.slave = os.openpty()
+        self.port = os.ttyname(self.slave)
+
+    def tearDown(self):
+        os.close(self.master)
+        os.close(self.slave)
+
+    def test_status_returns_at_prompt(self):
+        """The status reply ends at the idle prompt, well before the timeout."""
+        async def scenario():
+            loop = asyncio.get_running_loop()
+            async with SerialClient(self.port, SERVO_TEST.baud) as client:
+                os.write(self.master, b'=== SERVO TEST ===\r\n=== COMMANDS ===\r\nCmd: ')
+                ready = await wait_ready(client, SERVO_TEST)
+                loop.call_later(0.03, os.write, self.master,
+                                b'\r\n=== STATUS ===\r\nDetected: YES\r\n\r\nCmd: ')
+                reply = await run_command(client, SERVO_TEST, 's')
+                return ready, reply
+        (ready, lines), reply = asyncio.run(scenario())
+        self.assertTrue(ready)
+        self.assertEqual(lines, ['=== SERVO TEST ===', '=== COMMANDS ===', 'Cmd: '])
+        self.assertEqual(reply.lines, ['', '=== STATUS ===', 'Detected: YES', '', 'Cmd: '])
+        self.assertLess(reply.elapsed_s, 0.5)
+
+    def test_board_already_running(self):
+        """No startup output is reported as not ready instead of raising."""
+        quick = dataclasses.replace(SERVO_TEST, ready_timeout_s=0.05)
+
+        async def scenario():
+            async with SerialClient(self.port) as client:
+                return await wait_ready(client, quick)
+        self.assertEqual(asyncio.run(scenario()), (False, []))
+
+    def test_missing_reply_times_out(self):
+        """A board that never answers raises ExpectTimeout."""
+        async def scenario():
+            async with SerialClient(self.port) as client:
+                await client.transact('s', SERVO_TEST.command('s').reply, 0.05, prompt=True)
+        with self.assertRaises(ExpectTimeout):
+            asyncio.run(scenario())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Unit tests for serial_async.py
+
+The client is pointed at the slave side of a pseudo-terminal and the test
+plays the board on the master side.
+"""
+
+import asyncio
+import os
+import time
+import unittest
+
+from serial_async import ExpectTimeout, LineSplitter, SerialClient, SerialClosed
+
+
+class TestLineSplitter(unittest.TestCase):
+    """Tests for incremental line splitting."""
+
+    def test_lines_split_across_chunks(self):
+        """Partial lines are joined, CRLF is stripped and the tail is kept."""
+        splitter = LineSplitter()
+        self.assertEqual(splitter.feed(b'STA'), [])
+        self.assertEqual(splitter.feed(b'TE: still\r\nSTATE: sl'), ['STATE: still'])
+        self.assertEqual(splitter.feed(b'ow\r\n\r\nOK\nre'), ['STATE: slow', '', 'OK'])
+        self.assertEqual(splitter.flush(), 're')
+        self.assertEqual(splitter.flush(), '')
+
+    def test_invalid_bytes_are_dropped(self):
+        """Line noise at reset does not raise."""
+        self.assertEqual(LineSplitter().feed(b'\xff\xfeREADY\r\n'), ['READY'])
+
+
+class TestSerialClient(unittest.TestCase):
+    """Tests for SerialClient against a pty."""
+
+    def setUp(self):
+        self.master, slave = os.openpty()
+        self.port = os.ttyname(slave)
+        self.slave = slave
+
+    def tearDown(self):
+        for fd in (self.master, self.slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def run_async(self, coro):
+        return asyncio.run(asyncio.wait_for(coro, 10))
+
+    def test_readline_and_write(self):
+        """Lines written by the board arrive in order; writes reach the board."""
+        async def scenario():
+            async with SerialClient(self.port) as client:
+                os.write(self.master, b'=== SERVO TEST ===\r\nCmd: ')
+                self.assertEqual(await client.readline(1), '=== SERVO TEST ===')
+                os.write(self.master, b's\r\n')
+                self.assertEqual(await client.readline(1), 'Cmd: s')
+                await client.write('h')
+                await asyncio.sleep(0.05)
+                return os.read(self.master, 100)
+        self.assertEqual(self.run_async(scenario()), b'h')
+
+    def test_readline_timeout(self):
+        """No data within the timeout raises TimeoutError."""
+        async def scenario():
+            async with SerialClient(self.port) as client:
+                await client.readline(0.05)
+        with self.assertRaises(TimeoutError):
+            self.run_async(scenario())
+
+    def test_lines_stop_after_idle_timeout(self):
+        """lines() yields what arrived and ends once the board goes quiet."""
+        async def scenario():
+            async with SerialClient(self.port) as client:
+                os.write(self.master, b''.join(b'line %d\r\n' % i for i in range(500)))
+                return [line async for line in client.lines(duration=5, idle_timeout=0.1)]
+        self.assertEqual(self.run_async(scenario()), [f'line {i}' for i in range(500)])
+
+    def test_waiting_does_not_spin(self):
+        """A quiet 0.3 s read window uses (almost) no CPU and no wakeups."""
+        async def scenario():
+            async with SerialClient(self.port) as client:
+                cpu = time.process_time()
+                lines = [line async for line in client.lines(duration=0.3)]
+                return lines, time.process_time() - cpu, client.wakeups
+        lines, cpu_s, wakeups = self.run_async(scenario())
+        self.assertEqual(lines, [])
+        self.assertLess(cpu_s, 0.05)
+        self.assertEqual(wakeups, 0)
+
+    def test_hang_up_ends_iteration(self):
+        """Closing the board side delivers the tail, then raises SerialClosed."""
+        async def scenario():
+            async with SerialClient(self.port) as client:
+                os.close(self.slave)
+                os.write(self.master, b'done\r\npartial')
+                await asyncio.sleep(0.05)
+                os.close(self.master)
+                lines = [line async for line in client.lines(duration=1)]
+                with self.assertRaises(SerialClosed):
+                    await client.readline(0.1)
+                return lines
+        self.assertEqual(self.run_async(scenario()), ['done', 'partial'])
+
+
+
+class TestExpect(unittest.TestCase):
+    """Tests for expect() and transact()."""
+
+    def setUp(self):
+        self.master, self.slave = os.openpty()
+        self.port = os.ttyname(self.slave)
+
+    def tearDown(self):
+        os.close(self.master)
+        os.close(self.slave)
+
+    def run_async(self, coro):
+        return asyncio.run(asyncio.wait_for(coro, 10))
+
+    def board(self, delay_s, data):
+        """Write data from the board side after delay_s."""
+        asyncio.get_running_loop().call_later(delay_s, os.write, self.master, data)
+
+    def test_returns_at_matching_line(self):
+        """expect() stops at the first match and leaves later lines queued."""
+        async def scenario():
+            async with SerialClient(self.port) as client:
+                self.board(0.05, b'Selected animation 2\r\nStarting: resting\r\n'
+                                 b'Animation complete\r\n')
+                reply = await client.expect(r'^Starting: (\w+)', timeout=1)
+                return reply, await client.readline(1)
+        reply, rest = self.run_async(scenario())
+        self.assertEqual(reply.lines, ['Selected animation 2', 'Starting: resting'])
+        self.assertEqual(reply.match.group(1), 'resting')
+        self.assertGreaterEqual(reply.elapsed_s, 0.04)
+        self.assertEqual(rest, 'Animation complete')
+
+    def test_prompt_must_stay_idle(self):
+        """A prompt printed inside a reply is not the end; the idle one is."""
+        async def scenario():
+            async with SerialClient(self.port) as client:
+                self.board(0.01, b'\r\n=== COMMANDS ===\r\n  h - Help\r\nCmd: ')
+                self.board(0.015, b'\r\nCmd: ')
+                return await client.expect(r'^Cmd: $', timeout=1, prompt=True)
+        reply = self.run_async(scenario())
+        self.assertEqual(reply.lines, ['', '=== COMMANDS ===', '  h - Help', 'Cmd: ', 'Cmd: '])
+
+    def test_timeout_keeps_received_lines(self):
+        """ExpectTimeout is a TimeoutError carrying what did arrive."""
+        async def scenario():
+            async with SerialClient(self.port) as client:
+                os.write(self.master, b'> I2C scan...\r\n  None found\r\n')
+                await client.expect(r'PCA9685!', timeout=0.1)
+        with self.assertRaises(ExpectTimeout) as cm:
+            self.run_async(scenario())
+        self.assertIsInstance(cm.exception, TimeoutError)
+        self.assertEqual(cm.exception.lines, ['> I2C scan...', '  None found'])
+
+    def test_transact_discards_stale_output(self):
+        """Output from before the command cannot satisfy its reply."""
+        async def scenario():
+            async with SerialClient(self.port) as client:
+                os.write(self.master, b'Starting: old\r\n')
+                await asyncio.sleep(0.02)
+                self.board(0.05, b'Restarting current animation...\r\nStarting: new\r\n')
+                reply = await client.transact('r', r'^Starting: (\w+)', timeout=1)
+                return reply, os.read(self.master, 100)
+        reply, sent = self.run_async(scenario())
+        self.assertEqual(reply.lines, ['Restarting current animation...', 'Starting: new'])
+        self.assertEqual(sent, b'r')
+
+
+if __name__ == '__main__':
+    unittest.main()
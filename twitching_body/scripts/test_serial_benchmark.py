@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Unit tests for serial_benchmark.py
+"""
+
+import asyncio
+import os
+import statistics
+import unittest
+
+from firmware_commands import ANIMATION_TESTER
+from serial_async import SerialClient
+from serial_benchmark import benchmark, jitter, latency_stats, percentile
+
+
+class TestStatistics(unittest.TestCase):
+    """Tests for percentiles and jitter."""
+
+    def test_percentile_matches_statistics_quantiles(self):
+        values = sorted([5, 1, 9, 3, 7, 2, 8, 100, 4, 6])
+        cuts = statistics.quantiles(values, n=100, method='inclusive')
+        for p in (50, 95, 99):
+            self.assertAlmostEqual(percentile(values, p), cuts[p - 1])
+        self.assertEqual(percentile([42], 99), 42)
+        with self.assertRaises(ValueError):
+            percentile([], 50)
+
+    def test_jitter_is_mean_consecutive_difference(self):
+        self.assertEqual(jitter([10, 14, 12, 12]), 2)
+        self.assertEqual(jitter([10]), 0)
+
+    def test_latency_stats(self):
+        stats = latency_stats([3_000_000, 1_000_000, 2_000_000], [5, 7, 6])
+        self.assertEqual(stats['samples'], 3)
+        self.assertEqual((stats['min'], stats['p50'], stats['max']),
+                         (1_000_000, 2_000_000, 3_000_000))
+        self.assertEqual(stats['jitter'], 1_500_000)
+        self.assertEqual(stats['complete_p50'], 6)
+
+
+class TestBenchmark(unittest.TestCase):
+    """benchmark() against a scripted animation_tester on a pty."""
+
+    def setUp(self):
+        self.master, self.slave = os.openpty()
+        os.set_blocking(self.master, False)
+        self.port = os.ttyname(self.slave)
+
+    def tearDown(self):
+        os.close(self.master)
+        os.close(self.slave)
+
+    def answer(self, delay_s):
+        """Reply to each command byte after delay_s, like handleSerialCommand()."""
+        loop = asyncio.get_running_loop()
+
+        def on_command():
+            for key in os.read(self.master, 64).decode():
+                reply = (f"Selected animation {key}\r\nStarting: anim{key}\r\n" if key.isdigit()
+                         else "Restarting current animation...\r\nStarting: anim\r\n")
+                loop.call_later(delay_s, os.write, self.master, reply.encode())
+        loop.add_reader(self.master, on_command)
+
+    def test_counts_and_latency(self):
+        """Every command is sampled `rounds` times, and latency covers the board delay."""
+        async def scenario():
+            self.answer(0.005)
+            async with SerialClient(self.port, ANIMATION_TESTER.baud) as client:
+                return await benchmark(client, ANIMATION_TESTER, ('0', '6', 'r'), rounds=5)
+        results = asyncio.run(asyncio.wait_for(scenario(), 10))
+        self.assertEqual(list(results), ['0', '6', 'r'])
+        for stats in results.values():
+            self.assertEqual(stats['samples'], 5)
+            self.assertGreaterEqual(stats['min'], 5_000_000)
+            self.assertLess(stats['p50'], 200_000_000)
+            self.assertLessEqual(stats['p50'], stats['p95'])
+            self.assertLessEqual(stats['p95'], stats['p99'])
+            self.assertLessEqual(stats['p99'], stats['max'])
+
+    def test_unknown_command_sends_nothing(self):
+        async def scenario():
+            async with SerialClient(self.port) as client:
+                await benchmark(client, ANIMATION_TESTER, ('l', 'x'), rounds=1)
+        with self.assertRaises(ValueError):
+            asyncio.run(scenario())
+        with self.assertRaises(BlockingIOError):
+            os.read(self.master, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
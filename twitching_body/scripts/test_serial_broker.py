@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Tests for serial_broker.py, with a virtual animation_tester as the board
+"""
+
+import asyncio
+import contextlib
+import io
+import math
+import os
+import tempfile
+import termios
+import time
+import unittest
+from unittest import mock
+
+from device_registry import Registry
+from firmware_commands import ANIMATION_TESTER, run_command, wait_ready
+from serial_async import SerialClient
+import serial_broker
+from serial_broker import BrokerClient, BrokerError, SerialBroker
+from serial_test import test_serial as run_serial_test
+from virtual_firmware import AnimationTester, Timing
+
+
+class TestSerialBroker(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.tmp.name, 'broker.sock')
+        self.device = AnimationTester(Timing(speed=math.inf))
+        self.device.start()
+
+    def tearDown(self):
+        self.device.stop()
+        self.tmp.cleanup()
+
+    def with_broker(self, scenario):
+        """Run scenario(broker) while a broker serves on self.socket_path."""
+        async def main():
+            broker = SerialBroker(self.socket_path, Registry(os.path.join(self.tmp.name, 'r.json')))
+            server = asyncio.ensure_future(broker.serve())
+            while not os.path.exists(self.socket_path):
+                await asyncio.sleep(0.001)
+            try:
+                return await scenario(broker)
+            finally:
+                server.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await server
+        with contextlib.redirect_stdout(io.StringIO()):  # "Opened ..." log lines
+            return asyncio.run(asyncio.wait_for(main(), 10))
+
+    def attach(self):
+        return BrokerClient(self.socket_path, self.device.port, ANIMATION_TESTER.baud)
+
+    def test_clients_share_one_open_port(self):
+        """Later clients get the banner replayed and talk to the same open port."""
+        async def scenario(broker):
+            async with self.attach() as first:
+                ready, _ = await wait_ready(first, ANIMATION_TESTER)
+                started = await run_command(first, ANIMATION_TESTER, '5')
+            async with self.attach() as second:
+                replayed, _ = await wait_ready(second, ANIMATION_TESTER)
+                listing = await run_command(second, ANIMATION_TESTER, 'l')
+            port, = broker.ports.values()
+            return ready, started, replayed, listing, (first.held, second.held), port
+        ready, started, replayed, listing, held, port = self.with_broker(scenario)
+        self.assertTrue(ready)
+        self.assertEqual(started.lines[-1], 'Starting: Grasping (Reaching and Pulling)')
+        self.assertTrue(replayed)
+        self.assertEqual(held, (False, True))
+        self.assertEqual(listing.lines[-1], 'Current: 5')  # state survived the reattach
+        self.assertIsNone(port.fd)  # closed when the broker stopped
+
+    def test_port_keeps_dtr(self):
+        async def scenario(broker):
+            async with self.attach():
+                port, = broker.ports.values()
+                return termios.tcgetattr(port.fd)[2]
+        self.assertFalse(self.with_broker(scenario) & termios.HUPCL)
+
+    def test_refused_attach(self):
+        async def scenario(broker):
+            errors = []
+            for target, baud in (('hatching_egg', 115200), (self.device.port, 1200)):
+                try:
+                    async with BrokerClient(self.socket_path, target, baud):
+                        pass
+                except BrokerError as e:
+                    errors.append(str(e))
+            return errors, broker.ports
+        errors, ports = self.with_broker(scenario)
+        self.assertRegex(errors[0], "no prop named 'hatching_egg'")
+        self.assertRegex(errors[1], 'bootloader')
+        self.assertEqual(ports, {})
+
+    def test_silent_client_gets_err(self):
+        """A client that never sends ATTACH is answered and disconnected."""
+        async def scenario(broker):
+            reader, writer = await asyncio.open_unix_connection(self.socket_path)
+            reply = await reader.readline()
+            writer.close()
+            return reply
+        with mock.patch.object(serial_broker, 'HANDSHAKE_TIMEOUT_S', 0.05):
+            reply = self.with_broker(scenario)
+        self.assertEqual(reply, b'ERR no ATTACH line within 0.05 s\n')
+
+    def test_serial_test_through_broker(self):
+        async def scenario(broker):
+            with contextlib.redirect_stdout(io.StringIO()) as out:
+                first = await run_serial_test(self.device.port, ANIMATION_TESTER,
+                                              broker=self.socket_path)
+                second = await run_serial_test(self.device.port, ANIMATION_TESTER,
+                                               broker=self.socket_path)
+            return first, second, out.getvalue()
+        first, second, out = self.with_broker(scenario)
+        self.assertTrue(first)
+        self.assertTrue(second)
+        self.assertEqual(out.count('Ready! Use serial commands'), 2)
+
+    def test_concurrent_attaches_open_the_port_once(self):
+        """Attaches arriving while the port is being opened share that open."""
+        open_fd = serial_broker.BrokerPort._open_fd
+
+        async def slow_open_fd(port):
+            await asyncio.sleep(0.01)  # let the other attaches run mid-open
+            return await open_fd(port)
+
+        async def scenario(broker):
+            opened = await asyncio.gather(*(broker.open_port(self.device.port,
+                                                             ANIMATION_TESTER.baud)
+                                            for _ in range(3)))
+            return opened, list(broker.ports.values())
+        with mock.patch.object(serial_broker.BrokerPort, '_open_fd', slow_open_fd):
+            opened, ports = self.with_broker(scenario)
+        self.assertEqual(len(ports), 1)
+        self.assertEqual([port for port, _ in opened], ports * 3)
+        self.assertEqual(sorted(held for _, held in opened), [False, True, True])
+
+    def drain_banner(self):
+        """Read the board's startup output directly, so it is silent when the broker opens it."""
+        async def drain():
+            async with SerialClient(self.device.port, ANIMATION_TESTER.baud) as client:
+                await wait_ready(client, ANIMATION_TESTER)
+                await client.expect(r'^=+$', 1)  # end of the help
+        asyncio.run(drain())
+
+    @mock.patch.object(serial_broker, 'TRANSCRIPT_IDLE_S', 0.05)
+    def test_silent_board_has_empty_transcript(self):
+        """Replies after a quiet first TRANSCRIPT_IDLE_S are not a startup banner."""
+        async def scenario(broker):
+            port, _ = await broker.open_port(self.device.port, ANIMATION_TESTER.baud)
+            await asyncio.sleep(0.1)
+            async with self.attach() as client:
+                await run_command(client, ANIMATION_TESTER, 'l')
+            async with self.attach() as client:
+                return client.replayed, bytes(port.transcript)
+        self.drain_banner()
+        replayed, transcript = self.with_broker(scenario)
+        self.assertEqual((replayed, transcript), (0, b''))
+
+    def test_running_board_skips_startup_wait(self):
+        """A held port that printed nothing has no banner to wait for."""
+        async def scenario(broker):
+            await broker.open_port(self.device.port, ANIMATION_TESTER.baud)
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                success = await run_serial_test(self.device.port, ANIMATION_TESTER,
+                                                broker=self.socket_path)
+            return success, time.perf_counter() - start
+        self.drain_banner()
+        success, elapsed = self.with_broker(scenario)
+        self.assertTrue(success)
+        self.assertLess(elapsed, ANIMATION_TESTER.ready_timeout_s / 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Tests for the virtual_firmware package
+
+Each virtual device is driven through the same SerialClient and command
+tables the hardware scripts use, so these double as hardware-free tests
+of serial_test.py and the benchmark.
+"""
+
+import asyncio
+import contextlib
+import io
+import math
+import re
+import time
+import unittest
+
+from firmware_commands import (ANIMATION_TESTER, MOTION_TRIGGER, TWITCHING_SERVOS, run_command,
+                               wait_ready)
+from serial_async import SerialClient
+from serial_benchmark import benchmark
+from serial_test import test_serial as run_serial_test
+from virtual_firmware import AnimationTester, MotionTrigger, Timing, TwitchingServos
+from virtual_firmware.twitching_servos import CYCLES
+
+INSTANT = Timing(speed=math.inf)
+
+
+def run(scenario, timeout=10):
+    return asyncio.run(asyncio.wait_for(scenario, timeout))
+
+
+class TestAnimationTester(unittest.TestCase):
+    """The harness against a virtual animation_tester."""
+
+    def test_commands_and_benchmark(self):
+        async def scenario(port):
+            async with SerialClient(port, ANIMATION_TESTER.baud) as client:
+                ready, lines = await wait_ready(client, ANIMATION_TESTER)
+                listing = await run_command(client, ANIMATION_TESTER, 'l')
+                started = await run_command(client, ANIMATION_TESTER, '4')
+                results = await benchmark(client, ANIMATION_TESTER, ANIMATION_TESTER.benchmark, 3)
+                return ready, lines, listing, started, results
+        with AnimationTester(INSTANT) as device:
+            ready, lines, listing, started, results = run(scenario(device.port))
+        self.assertTrue(ready)
+        self.assertIn('Available animations: 7', lines)
+        self.assertIn('3. Slow Struggle (Testing the Shell)', listing.lines)
+        self.assertEqual(listing.lines[-1], 'Current: 3')  # DEFAULT_ANIMATION
+        self.assertEqual(started.lines[-2:], ['Selected animation 4',
+                                              'Starting: Breaking Through (Violent Pushing)'])
+        self.assertEqual({stats['samples'] for stats in results.values()}, {3})
+
+    def test_trigger_and_unknown_command(self):
+        async def scenario(device):
+            async with SerialClient(device.port, ANIMATION_TESTER.baud) as client:
+                await client.expect(r'^=+$', 1)  # end of the help after "Ready!"
+                await client.expect(r'^=+$', 1)
+                device.press_trigger()
+                triggered = await client.expect(r'^Starting: ', 1)
+                unknown = await client.transact('x', r'^Type ', 1)
+                return triggered.lines, unknown.lines
+        with AnimationTester(INSTANT) as device:
+            triggered, unknown = run(scenario(device))
+        self.assertEqual(triggered[-2:], ['TRIGGERED!', 'Starting: Slow Struggle (Testing the Shell)'])
+        self.assertEqual(unknown, ['Unknown command: x', "Type 'h' for help"])
+
+    def test_realistic_timing(self):
+        """A non-looping animation completes after its duration of wall time."""
+        async def scenario(port):
+            async with SerialClient(port, ANIMATION_TESTER.baud) as client:
+                await wait_ready(client, ANIMATION_TESTER)
+                await run_command(client, ANIMATION_TESTER, '0')
+                return await client.expect(r'^Animation complete$', 2)
+        with AnimationTester(Timing(speed=1), [('Short', 300, False)]) as device:
+            done = run(scenario(device.port))
+        self.assertGreaterEqual(done.elapsed_s, 0.28)
+        self.assertLess(done.elapsed_s, 0.8)
+
+    def test_serial_test_script(self):
+        with AnimationTester(INSTANT) as device, contextlib.redirect_stdout(io.StringIO()) as out:
+            self.assertTrue(run(run_serial_test(device.port, ANIMATION_TESTER)))
+        self.assertIn('Current: 3', out.getvalue())
+
+
+class TestMotionTrigger(unittest.TestCase):
+    """Line commands, debounce and cooldown of a virtual motion_trigger."""
+
+    def test_line_commands(self):
+        async def scenario(port):
+            async with SerialClient(port, MOTION_TRIGGER.baud) as client:
+                ready, lines = await wait_ready(client, MOTION_TRIGGER)
+                status = await run_command(client, MOTION_TRIGGER, 'STATUS')
+                test = await run_command(client, MOTION_TRIGGER, 'TEST')
+                return ready, lines, status.lines, test.lines
+        with MotionTrigger(INSTANT) as device:
+            ready, lines, status, test = run(scenario(device.port))
+        self.assertTrue(ready)
+        self.assertEqual(lines, ['STARTUP', 'Switch trigger ready',
+                                 'Press switch to trigger scare', 'READY'])
+        # lastTriggerTime starts at 0, so the board is "cooling down" for its first 3 s
+        self.assertEqual(status, ['Switch: RELEASED', 'Cooldown: 1300 ms remaining'])
+        self.assertEqual(test, ['TRIGGER', 'Manual test trigger'])
+
+    def test_press_release_and_cooldown(self):
+        async def scenario(device):
+            async with SerialClient(device.port, MOTION_TRIGGER.baud) as client:
+                await wait_ready(client, MOTION_TRIGGER)
+                await asyncio.sleep(0.05)  # 2.5 s at 50x: past the initial cooldown
+                device.press()
+                pressed = await client.expect(r'^Switch pressed at: ', 1)
+                device.release()
+                released = await client.expect(r'^SWITCH_RELEASED$', 1)
+                device.press()
+                cooldown = await client.expect(r' more seconds$', 1)
+                return pressed.lines, released.lines, cooldown.lines
+        with MotionTrigger(Timing(speed=50)) as device:
+            pressed, released, cooldown = run(scenario(device))
+        self.assertEqual(pressed[0], 'TRIGGER')
+        self.assertRegex(pressed[1], r'^Switch pressed at: [34] seconds$')
+        self.assertEqual(released, ['SWITCH_RELEASED'])
+        self.assertEqual(cooldown, ['COOLDOWN', 'Wait 2 more seconds'])
+
+
+class TestTwitchingServos(unittest.TestCase):
+    """STATE output of a virtual twitching_servos."""
+
+    @staticmethod
+    async def read_lines(port, count, timeout=10):
+        lines = []
+        async with SerialClient(port, TWITCHING_SERVOS.baud) as client:
+            ready, _ = await wait_ready(client, TWITCHING_SERVOS)
+            assert ready
+            while len(lines) < count:
+                lines.append(await client.readline(timeout))
+        return lines
+
+    def test_state_sequence(self):
+        """Still -> slow -> jerk with a THRASH every 100 ms, for every cycle."""
+        with TwitchingServos(INSTANT, seed=1) as device:
+            lines = run(self.read_lines(device.port, 80))
+        slow = r'STATE: Slow movement for {:.2f} seconds \(targets: H:\d+ LA:(\d+) RA:(\d+)\)'
+        for cycle, (still_ms, slow_ms, jerk_ms) in enumerate(CYCLES):
+            next_cycle = (cycle + 1) % len(CYCLES) + 1
+            self.assertEqual(lines.pop(0), '')
+            self.assertEqual(lines.pop(0), f'STATE: Still for {still_ms / 1000:.2f} seconds')
+            arms = re.fullmatch(slow.format(slow_ms / 1000), lines.pop(0))
+            self.assertIsNotNone(arms)
+            self.assertEqual(sorted(int(arm) >= 150 for arm in arms.groups()), [False, True])
+            self.assertRegex(lines.pop(0), rf'^STATE: QUICK JERK for {jerk_ms} ms \(targets: ')
+            for _ in range(jerk_ms // 100):
+                self.assertRegex(lines.pop(0), r'^  THRASH! New targets: H:\d+ LA:\d+ RA:\d+$')
+            self.assertEqual(lines.pop(0), f'>>> Starting cycle {next_cycle} of 5')
+
+    def test_seed_is_reproducible(self):
+        with TwitchingServos(INSTANT, seed=7) as first, TwitchingServos(INSTANT, seed=7) as second:
+            self.assertEqual(run(self.read_lines(first.port, 30)),
+                             run(self.read_lines(second.port, 30)))
+
+    def test_time_compression(self):
+        """Without waiting, hours of behaviour stream at thousands of lines per second."""
+        count = 5000
+        with TwitchingServos(INSTANT, seed=2) as device:
+            start = time.perf_counter()
+            lines = run(self.read_lines(device.port, count), timeout=30)
+            elapsed = time.perf_counter() - start
+            virtual_hours = device.now_ms / 3_600_000
+        self.assertEqual(len(lines), count)
+        self.assertGreater(virtual_hours, 1)
+        self.assertGreater(count / elapsed, 1000)
+
+    def test_scaled_timing(self):
+        """At 20x the 3 s still state lasts 150 ms of wall time."""
+        async def scenario(port):
+            async with SerialClient(port, TWITCHING_SERVOS.baud) as client:
+                await client.expect(r'^STATE: Still', 2)
+                return await client.expect(r'^STATE: Slow movement', 2)
+        with TwitchingServos(Timing(speed=20)) as device:
+            slow = run(scenario(device.port))
+        self.assertGreaterEqual(slow.elapsed_s, 0.13)
+        self.assertLess(slow.elapsed_s, 0.4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,26 @@
+"""
+Virtual prop firmware on pseudo-terminals, for testing the serial
+tooling without hardware.
+
+Each device runs a Python port of one sketch's serial behaviour against
+a pty and prints the same lines with the same millis() timing:
+
+- AnimationTester: hatching_egg/arduino/animation_tester
+- MotionTrigger: window_spider_trigger/arduino/motion_trigger
+- TwitchingServos: twitching_body/arduino/twitching_servos
+
+    with AnimationTester(Timing(speed=math.inf)) as device:
+        async with SerialClient(device.port, 115200) as client: ...
+
+Timing(speed=1) is real time; larger speeds compress time (see device.py).
+"""
+
+from .animation_tester import AnimationTester
+from .device import Timing, VirtualDevice
+from .motion_trigger import MotionTrigger
+from .twitching_servos import TwitchingServos
+
+DEVICES = {device.name: device for device in (AnimationTester, MotionTrigger, TwitchingServos)}
+
+__all__ = ['AnimationTester', 'DEVICES', 'MotionTrigger', 'Timing', 'TwitchingServos',
+           'VirtualDevice']
@@ -0,0 +1,41 @@
+"""
+Run a virtual device until Ctrl-C and print its port, e.g.
+
+    python -m virtual_firmware animation_tester
+    python serial_test.py --port /dev/pts/N --firmware animation_tester
+"""
+
+import argparse
+import asyncio
+import math
+
+from . import DEVICES, Timing, TwitchingServos
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m virtual_firmware',
+                                     description='Run virtual prop firmware on a pty')
+    parser.add_argument('device', choices=DEVICES)
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help="virtual ms per wall ms (default 1; 'inf' = no waiting)")
+    parser.add_argument('--loop-ms', type=float, help="time per loop() pass (default: the sketch's)")
+    parser.add_argument('--seed', type=int, help='random seed for twitching_servos targets')
+    args = parser.parse_args()
+
+    timing = Timing(speed=args.speed, loop_ms=args.loop_ms)
+    device_class = DEVICES[args.device]
+    if device_class is TwitchingServos:
+        device = device_class(timing, seed=args.seed)
+    else:
+        device = device_class(timing)
+    device.open_pty()
+    speed = 'no waiting' if math.isinf(args.speed) else f'{args.speed:g}x'
+    print(f"{args.device} on {device.port} ({speed}) - Ctrl-C to stop", flush=True)
+    try:
+        asyncio.run(device.serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
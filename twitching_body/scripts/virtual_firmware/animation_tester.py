@@ -0,0 +1,131 @@
+"""
+Virtual hatching_egg/arduino/animation_tester (115200 baud).
+
+Speaks the sketch's single-character protocol (0-6, s, r, l, h) with the
+animation names, durations and loop flags read from
+hatching_egg/animation-config.json, the file animation_config.h is
+generated from. Servo output is not modelled; only the serial side is.
+"""
+
+import json
+from pathlib import Path
+
+from .device import HIGH, LOW, Timing, VirtualDevice
+
+CONFIG = Path(__file__).resolve().parents[3] / 'hatching_egg' / 'animation-config.json'
+TRIGGER_PIN = 9
+SETUP_MS = 10  # delay(10) after pwm.begin()
+
+
+def load_animations(path=CONFIG):
+    """[(name, duration_ms, loop)] in header order, and the default index."""
+    with open(path) as f:
+        config = json.load(f)
+    animations = config['animations']
+    table = [(anim['name'], anim['duration_ms'], anim['loop']) for anim in animations.values()]
+    return table, list(animations).index(config['default_animation'])
+
+
+class AnimationTester(VirtualDevice):
+    name = 'animation_tester'
+    default_loop_ms = 1  # loop() has no delay; one pass per PCA9685 update
+
+    def __init__(self, timing=Timing(), animations=None, default_animation=0):
+        """animations: [(name, duration_ms, loop)]; None loads animation-config.json."""
+        super().__init__(timing)
+        if animations is None:
+            animations, default_animation = load_animations()
+        self.animations = animations
+        self.current = default_animation
+        self.active = False
+        self.started_ms = 0
+        self._last_trigger = HIGH
+
+    def press_trigger(self):
+        self.set_pin(TRIGGER_PIN, LOW)
+
+    def release_trigger(self):
+        self.set_pin(TRIGGER_PIN, HIGH)
+
+    async def run(self):
+        self.println("Hatching Egg Spider - Animation Tester")
+        self.println("=" * 40)
+        await self.delay(SETUP_MS)
+        self.println(f"Available animations: {len(self.animations)}")
+        self.println("Ready! Use serial commands to test animations.")
+        self.println()
+        self.print_help()
+        while True:
+            await self.idle(self._animation_end())
+            if self.available():
+                self.handle_command()
+            trigger = self.digital_read(TRIGGER_PIN)
+            if trigger == LOW and self._last_trigger == HIGH:
+                self.println("TRIGGERED!")
+                self.start_animation(self.current)
+            self._last_trigger = trigger
+            self.update_animation()
+
+    def _animation_end(self):
+        """millis() at which updateAnimation() next prints, or None."""
+        if not self.active or self.animations[self.current][2]:
+            return None  # looping animations restart silently
+        return self.started_ms + self.animations[self.current][1]
+
+    def start_animation(self, index):
+        if index >= len(self.animations):
+            index = 0
+        self.current = index
+        self.started_ms = self.millis()
+        self.active = True
+        self.println(f"Starting: {self.animations[index][0]}")
+
+    def update_animation(self):
+        end = self._animation_end()
+        if end is not None and self.millis() >= end:
+            self.active = False
+            self.println("Animation complete")
+
+    def handle_command(self):
+        command = chr(self.read_input()[0])  # the rest is drained, as on the board
+        if command in '0123456':
+            index = int(command)
+            if index < len(self.animations):
+                self.println(f"Selected animation {index}")
+                self.start_animation(index)
+            else:
+                self.println("Invalid animation index")
+        elif command in 'sS':
+            self.println("Stopping animation...")
+            self.active = False
+        elif command in 'rR':
+            self.println("Restarting current animation...")
+            self.start_animation(self.current)
+        elif command in 'lL':
+            self.print_animation_list()
+        elif command in 'hH?':
+            self.print_help()
+        elif command not in '\r\n':
+            self.println(f"Unknown command: {command}")
+            self.println("Type 'h' for help")
+
+    def print_help(self):
+        self.println()
+        self.println("===== Hatching Egg Spider Commands =====")
+        self.println("0-6  : Select animation by number")
+        self.println("l    : List all animations")
+        self.println("s    : Stop current animation")
+        self.println("r    : Restart current animation")
+        self.println("h    : Show this help")
+        self.println("=" * 40)
+        self.println()
+
+    def print_animation_list(self):
+        self.println()
+        self.println("Available Animations:")
+        self.println("-" * 21)
+        for index, (name, _, _) in enumerate(self.animations):
+            self.println(f"{index}. {name}")
+        self.println()
+        self.println(f"Current: {self.current}")
+        self.println()
@@ -0,0 +1,267 @@
+"""
+Pseudo-terminal device base: virtual millis(), delays and serial I/O.
+
+A VirtualDevice opens a pty and runs a sketch's setup()/loop() logic as a
+coroutine against the master side; clients open `device.port` (the slave)
+exactly like /dev/ttyACM0. Time is virtual: delay() and idle() advance
+millis() and sleep ms / speed of wall time, so speed=1 reproduces the
+board's timing, speed=100 runs a 5 minute session in 3 s, and
+speed=math.inf runs with no waiting at all (input is still only seen at
+loop() passes, as on the board).
+"""
+
+import asyncio
+import math
+import os
+import termios
+import threading
+import tty
+from dataclasses import dataclass
+
+USB_PACKET_BYTES = 64  # full-speed CDC bulk packet, one per 1 ms USB frame
+OUTPUT_BUFFER_BYTES = 4096  # println() blocks beyond this, like a full CDC buffer
+HIGH, LOW = 1, 0
+
+
+@dataclass(frozen=True)
+class Timing:
+    speed: float = 1.0  # virtual ms per wall ms; math.inf = no waiting
+    loop_ms: float = None  # time per loop() pass (None: the sketch's own)
+    bytes_per_ms: float = USB_PACKET_BYTES  # output pacing in virtual time; 0 = unpaced
+
+
+class VirtualDevice:
+    """Base class: subclasses implement `async def run(self)` with the sketch logic."""
+
+    name = 'device'
+    default_loop_ms = 1
+
+    def __init__(self, timing=Timing()):
+        if timing.speed <= 0:
+            raise ValueError(f"speed must be positive, got {timing.speed}")
+        self.timing = timing
+        self.loop_ms = timing.loop_ms if timing.loop_ms is not None else self.default_loop_ms
+        self.now_ms = 0
+        self.master = None
+        self.port = None
+        self._slave = None
+        self._input = bytearray()
+        self._wake = None
+        self._output = None
+        self._loop = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._backlog = 0
+        self._drained = None
+        self.pins = {}
+        self._pins_changed = False
+        self.lines_sent = 0
+
+    # --- time -------------------------------------------------------------
+
+    def millis(self):
+        return int(self.now_ms)
+
+    def _wall_s(self, ms):
+        return 0 if math.isinf(self.timing.speed) else ms / 1000 / self.timing.speed
+
+    async def delay(self, ms):
+        """Arduino delay(): block for ms; input arriving meanwhile is buffered."""
+        await self._flow_control()
+        self.now_ms += ms
+        await asyncio.sleep(self._wall_s(ms))
+
+    async def _flow_control(self):
+        # Serial.write() blocks while the host is not reading, so virtual
+        # time can never run ahead of the output (this is what bounds
+        # memory at speed=inf)
+        while self._backlog > OUTPUT_BUFFER_BYTES:
+            self._drained.clear()
+            await self._drained.wait()
+
+    async def idle(self, until_ms=None):
+        """Run empty loop() passes until input arrives or millis() reaches until_ms.
+
+        Input and set_pin() changes are noticed at the next pass boundary
+        (a multiple of loop_ms). Returns True if woken by either.
+        """
+        await self._flow_control()
+        if self._input or self._pins_changed:
+            self._pins_changed = False
+            return True
+        woke = await self._wait_wake(until_ms, self.loop_ms)
+        self._pins_changed = False
+        return woke
+
+    async def _wait_wake(self, until_ms, step_ms):
+        """Wait for new input or a pin change, rounding up to a step_ms grid."""
+        if until_ms is not None and until_ms <= self.now_ms:
+            return False
+        self._wake.clear()
+        started, wall = self.now_ms, self._loop.time()
+        if until_ms is None:
+            await self._wake.wait()
+        elif math.isinf(self.timing.speed):
+            self.now_ms = until_ms
+            await asyncio.sleep(0)
+            return False
+        else:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self._wall_s(until_ms - self.now_ms))
+            except asyncio.TimeoutError:
+                self.now_ms = until_ms
+                return False
+        if math.isinf(self.timing.speed):
+            elapsed = 0
+        else:
+            elapsed = (self._loop.time() - wall) * 1000 * self.timing.speed
+        target = started + (math.ceil(elapsed / step_ms) * step_ms if step_ms else elapsed)
+        if until_ms is not None:
+            target = min(target, until_ms)
+        self.now_ms = min(started + elapsed, target)  # that much wall time has passed
+        await self.delay(target - self.now_ms)
+        return True
+
+    # --- pins -------------------------------------------------------------
+
+    def digital_read(self, pin, default=HIGH):
+        return self.pins.get(pin, default)
+
+    def set_pin(self, pin, value):
+        """Drive an input pin (thread-safe); the sketch sees it at its next pass."""
+        def apply():
+            self.pins[pin] = value
+            self._pins_changed = True
+            self._wake.set()
+        self.call(apply)
+
+    # --- serial -----------------------------------------------------------
+
+    def available(self):
+        return len(self._input)
+
+    def read_input(self, count=None):
+        """Take up to count buffered input bytes (all if None)."""
+        count = len(self._input) if count is None else count
+        data = bytes(self._input[:count])
+        del self._input[:count]
+        return data
+
+    async def read_string_until(self, terminator=b'\n', timeout_ms=1000):
+        """Stream::readStringUntil(): up to terminator, or what arrived before
+        no byte came for timeout_ms. The terminator is consumed, not returned.
+
+        At speed=math.inf the timeout passes instantly, so send whole lines.
+        """
+        while terminator not in self._input:
+            if not await self._wait_wake(self.now_ms + timeout_ms, 0):
+                break
+        end = self._input.find(terminator)
+        if end < 0:
+            return self.read_input().decode(errors='replace')
+        line = self.read_input(end + len(terminator))[:end]
+        return line.decode(errors='replace')
+
+    def print(self, text=''):
+        data = str(text).encode()
+        self._backlog += len(data)
+        self._output.put_nowait(data)
+
+    def println(self, text=''):
+        self.lines_sent += 1
+        self.print(f"{text}\r\n")
+
+    def _on_readable(self):
+        # The device keeps its own slave fd open, so a client closing the
+        # port never turns the master into a hang-up
+        try:
+            data = os.read(self.master, 4096)
+        except BlockingIOError:
+            return
+        self._input += data
+        self._wake.set()
+
+    async def _writer(self):
+        """Drain println() output to the pty, paced like USB packets."""
+        while True:
+            data = await self._output.get()
+            while not self._output.empty():
+                data += self._output.get_nowait()
+            view = memoryview(data)
+            while view:
+                chunk = view[:USB_PACKET_BYTES] if self.timing.bytes_per_ms else view
+                try:
+                    written = os.write(self.master, chunk)
+                except BlockingIOError:
+                    # Nobody is reading: wait for room, as a full CDC buffer would
+                    await asyncio.sleep(0.001)
+                    continue
+                view = view[written:]
+                self._backlog -= written
+                if self._backlog <= OUTPUT_BUFFER_BYTES:
+                    self._drained.set()
+                if self.timing.bytes_per_ms:
+                    await asyncio.sleep(self._wall_s(written / self.timing.bytes_per_ms))
+
+    # --- lifecycle ----------------------------------------------------------
+
+    def open_pty(self):
+        self.master, self._slave = os.openpty()
+        tty.setraw(self._slave, termios.TCSANOW)
+        os.set_blocking(self.master, False)
+        self.port = os.ttyname(self._slave)
+
+    async def serve(self):
+        """Run the device on the current event loop until cancelled."""
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._output = asyncio.Queue()
+        self._drained = asyncio.Event()
+        if self.master is None:
+            self.open_pty()
+        self._loop.add_reader(self.master, self._on_readable)
+        writer = asyncio.ensure_future(self._writer())
+        self._ready.set()
+        try:
+            await self.run()
+        finally:
+            writer.cancel()
+            self._loop.remove_reader(self.master)
+
+    def call(self, function, *args):
+        """Run function(*args) on the device's loop (from any thread)."""
+        self._loop.call_soon_threadsafe(function, *args)
+
+    def start(self):
+        """Open the pty and run the device in a background thread; returns the port."""
+        self.open_pty()
+
+        def main():
+            try:
+                asyncio.run(self.serve())
+            except asyncio.CancelledError:
+                pass
+        self._thread = threading.Thread(target=main, name=self.name, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self.port
+
+    def stop(self):
+        if self._thread is not None:
+            self.call(lambda: [task.cancel() for task in asyncio.all_tasks(self._loop)])
+            self._thread.join(timeout=5)
+            self._thread = None
+        for fd in (self.master, self._slave):
+            if fd is not None:
+                os.close(fd)
+        self.master = self._slave = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    async def run(self):
+        raise NotImplementedError
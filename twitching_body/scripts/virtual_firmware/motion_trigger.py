@@ -0,0 +1,94 @@
+"""
+Virtual window_spider_trigger/arduino/motion_trigger (9600 baud).
+
+Reproduces the sketch's switch debounce (50 ms, checked once per 10 ms
+loop() pass), the 3 s trigger cooldown and its serialEvent() line
+commands STATUS, RESET and TEST. press() and release() drive the switch
+pin the way a guest lifting the object would.
+"""
+
+from .device import HIGH, LOW, Timing, VirtualDevice
+
+SWITCH_PIN = 9
+DEBOUNCE_DELAY_MS = 50
+COOLDOWN_DELAY_MS = 3000
+STARTUP_BLINK_MS = 3 * (200 + 200)
+READY_BLINK_MS = 500
+
+
+class MotionTrigger(VirtualDevice):
+    name = 'motion_trigger'
+    default_loop_ms = 10  # delay(10) at the end of loop()
+
+    def __init__(self, timing=Timing()):
+        super().__init__(timing)
+        self.last_trigger_ms = 0
+        self.last_debounce_ms = 0
+        self.switch_state = HIGH
+        self.last_switch_state = HIGH
+        self.switch_pressed = False
+
+    def press(self):
+        self.set_pin(SWITCH_PIN, LOW)
+
+    def release(self):
+        self.set_pin(SWITCH_PIN, HIGH)
+
+    async def run(self):
+        await self.delay(STARTUP_BLINK_MS)
+        self.println("STARTUP")
+        self.println("Switch trigger ready")
+        self.println("Press switch to trigger scare")
+        self.println("READY")
+        await self.delay(READY_BLINK_MS)
+        while True:
+            self.loop_pass()
+            if self.available():
+                await self.serial_event()
+            await self.idle(self._debounce_deadline())
+
+    def _debounce_deadline(self):
+        """First pass at which a pending switch change is accepted, or None."""
+        if self.last_switch_state == self.switch_state:
+            return None
+        passes = DEBOUNCE_DELAY_MS // self.loop_ms + 1
+        return self.last_debounce_ms + passes * self.loop_ms
+
+    def loop_pass(self):
+        reading = self.digital_read(SWITCH_PIN)
+        now = self.millis()
+        if reading != self.last_switch_state:
+            self.last_debounce_ms = now
+        if now - self.last_debounce_ms > DEBOUNCE_DELAY_MS and reading != self.switch_state:
+            self.switch_state = reading
+            if self.switch_state == LOW and not self.switch_pressed:
+                if now - self.last_trigger_ms > COOLDOWN_DELAY_MS:
+                    self.println("TRIGGER")
+                    self.last_trigger_ms = now
+                    self.switch_pressed = True
+                    self.println(f"Switch pressed at: {now // 1000} seconds")
+                else:
+                    self.println("COOLDOWN")
+                    remaining = COOLDOWN_DELAY_MS - (now - self.last_trigger_ms)
+                    self.println(f"Wait {remaining // 1000} more seconds")
+            elif self.switch_state == HIGH and self.switch_pressed:
+                self.switch_pressed = False
+                self.println("SWITCH_RELEASED")
+        self.last_switch_state = reading
+
+    async def serial_event(self):
+        while self.available():
+            command = (await self.read_string_until()).strip()
+            if command == "STATUS":
+                self.println(f"Switch: {'PRESSED' if self.switch_state == LOW else 'RELEASED'}")
+                since_trigger = self.millis() - self.last_trigger_ms
+                if since_trigger < COOLDOWN_DELAY_MS:
+                    self.println(f"Cooldown: {COOLDOWN_DELAY_MS - since_trigger} ms remaining")
+                else:
+                    self.println("Cooldown: Ready")
+            elif command == "RESET":
+                self.last_trigger_ms = 0
+                self.println("Cooldown reset")
+            elif command == "TEST":
+                self.println("TRIGGER")
+                self.println("Manual test trigger")
@@ -0,0 +1,118 @@
+"""
+Virtual twitching_body/arduino/twitching_servos (9600 baud, output only).
+
+Replays the production behaviour cycle: still -> slow movement -> quick
+jerk for each of the five CYCLES, printing the same STATE, THRASH and
+">>> Starting cycle" lines at the same millis() as the sketch. Targets
+come from a seeded random.Random, so a run is reproducible but does not
+match the board's own random() sequence. Serial input is ignored, as on
+the board.
+"""
+
+import random
+
+from .device import Timing, VirtualDevice
+
+# (still, slow movement, quick jerk) ms, as in cycles[] in the sketch
+CYCLES = (
+    (3000, 12000, 800),
+    (2000, 15000, 1000),
+    (4000, 10000, 600),
+    (2500, 18000, 900),
+    (5000, 8000, 700),
+)
+HEAD_REST = 90
+SLOW_MOVEMENT_RANGE = 90
+QUICK_JERK_RANGE = 90
+THRASH_INTERVAL_MS = 100
+STILL, SLOW_MOVEMENT, QUICK_JERK = range(3)
+
+
+class TwitchingServos(VirtualDevice):
+    name = 'twitching_servos'
+    default_loop_ms = 10  # delay(10) at the end of loop()
+
+    def __init__(self, timing=Timing(), seed=None):
+        super().__init__(timing)
+        self.random = random.Random(seed)
+        self.cycle = 0
+        self.state = STILL
+        self.state_started_ms = 0
+        self.state_duration_ms = 0
+        self.last_thrash_ms = 0
+
+    def randint(self, low, high):
+        """Arduino random(low, high): high is exclusive."""
+        return self.random.randrange(low, high)
+
+    async def run(self):
+        await self.delay(500)
+        self.println()
+        self.println("=== Twitching Body Animatronic ===")
+        self.println("Initializing...")
+        await self.delay(3 * 2 * 100)  # blinkLED(3, 100)
+        self.println("I2C initialized")
+        await self.delay(100)
+        self.println("PCA9685 initialized (50Hz)")
+        self.println("Moving to rest positions...")
+        await self.delay(500)
+        self.println("Servos initialized at rest positions")
+        self.println("Starting behavior cycle...")
+        self.println()
+        await self.delay(2 * 2 * 200)  # blinkLED(2, 200)
+        self.start_still()
+        while True:
+            if self.millis() - self.state_started_ms >= self.state_duration_ms:
+                self.transition()
+            if self.state == QUICK_JERK and self.millis() - self.last_thrash_ms >= THRASH_INTERVAL_MS:
+                self.thrash()
+            if await self.idle(self._next_event()):
+                self.read_input()  # nothing reads Serial; drop it
+
+    def _next_event(self):
+        end = self.state_started_ms + self.state_duration_ms
+        if self.state == QUICK_JERK:
+            return min(end, self.last_thrash_ms + THRASH_INTERVAL_MS)
+        return end
+
+    def _start(self, state, duration_ms):
+        self.state = state
+        self.state_started_ms = self.millis()
+        self.state_duration_ms = duration_ms
+
+    def start_still(self):
+        self._start(STILL, CYCLES[self.cycle][0])
+        self.println(f"STATE: Still for {self.state_duration_ms / 1000:.2f} seconds")
+
+    def start_slow_movement(self):
+        self._start(SLOW_MOVEMENT, CYCLES[self.cycle][1])
+        head = HEAD_REST + self.randint(-SLOW_MOVEMENT_RANGE, SLOW_MOVEMENT_RANGE + 1)
+        if self.randint(0, 2):  # pulling up
+            left, right = self.randint(150, 181), self.randint(0, 31)
+        else:  # dropping down
+            left, right = self.randint(0, 31), self.randint(150, 181)
+        self.println(f"STATE: Slow movement for {self.state_duration_ms / 1000:.2f} seconds "
+                     f"(targets: H:{head} LA:{left} RA:{right})")
+
+    def start_quick_jerk(self):
+        self._start(QUICK_JERK, CYCLES[self.cycle][2])
+        head = HEAD_REST + self.randint(-QUICK_JERK_RANGE, QUICK_JERK_RANGE + 1)
+        left, right = self.randint(0, 181), self.randint(0, 181)
+        self.println(f"STATE: QUICK JERK for {self.state_duration_ms} ms "
+                     f"(targets: H:{head} LA:{left} RA:{right})")
+
+    def thrash(self):
+        head, left, right = (self.randint(0, 181) for _ in range(3))
+        self.last_thrash_ms = self.millis()
+        self.println(f"  THRASH! New targets: H:{head} LA:{left} RA:{right}")
+
+    def transition(self):
+        if self.state == STILL:
+            self.start_slow_movement()
+        elif self.state == SLOW_MOVEMENT:
+            self.start_quick_jerk()
+        else:
+            self.cycle = (self.cycle + 1) % len(CYCLES)
+            self.println(f">>> Starting cycle {self.cycle + 1} of {len(CYCLES)}")
+            self.println()
+            self.start_still()